@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Time the POS exporters against mock_pos_server.py, stage by stage.
+
+Modes:
+  http           requests session: login → download
+  browser-cold   new Chrome profile every run: launch → login → navigate → export → download
+  browser-warm   one persistent profile: the saved session replaces the login after run 1
+
+Every run exports into a temp dir (downloads/ is never touched). Browser
+modes are reported as skipped when Chrome/chromedriver is not available.
+
+Usage:
+    python3 bench_exporters.py [--modes http,browser-cold,browser-warm] [--stores calle8,79th,mkt]
+                               [--repeat 3] [--delay-ms 0] [--ui-delay-ms 0] [--export-delay-ms 0]
+                               [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+
+from product_utils import STORES
+
+MODES = ("http", "browser-cold", "browser-warm")
+STAGES = ("launch", "login", "navigate", "export", "download")
+
+
+class StageTimer:
+    """Collects {stage: seconds} for one run."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def stage(self, name):
+        timer = self
+
+        class _Stage:
+            def __enter__(self):
+                self.started = time.perf_counter()
+
+            def __exit__(self, *exc):
+                timer.stages[name] = timer.stages.get(name, 0.0) + time.perf_counter() - self.started
+                return False
+
+        return _Stage()
+
+
+def start_mock_server():
+    from mock_pos_server import serve
+    server = serve(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_http(store_key, out_dir, timer):
+    import requests
+    from pos_http_export import load_endpoints, login, download_export
+    cfg = load_endpoints()[store_key]
+    with timer.stage("launch"):
+        session = requests.Session()
+    with session:
+        with timer.stage("login"):
+            login(session, cfg)
+        with timer.stage("download"):
+            download_export(session, cfg, os.path.join(out_dir, f"inventory_{store_key}.csv"))
+
+
+def run_browser(store_key, out_dir, timer, profile_dir):
+    import pos_export as px
+    from download_watch import DownloadWatcher
+    cfg = px.STORE_EXPORTS[store_key]
+    with timer.stage("launch"):
+        driver = px.make_driver(out_dir, profile_dir)
+    try:
+        with timer.stage("login"):
+            if not px.resume_session(driver, cfg):
+                if cfg["pos"] == "cigarspos":
+                    px.login_cigarspos(driver, cfg)
+                else:
+                    px.login_bottlepos(driver, cfg)
+        with timer.stage("navigate"):
+            px.open_inventory(driver, cfg["pos"])
+        with DownloadWatcher(out_dir) as watcher:
+            with timer.stage("export"):
+                px.click_export(driver)
+            with timer.stage("download"):
+                watcher.wait(timeout=px.DOWNLOAD_TIMEOUT)
+    finally:
+        driver.quit()
+
+
+def bench(modes, stores, repeat):
+    """Returns [{mode, store, runs: [{stage: s}], error}]"""
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="bench_exporters_")
+    try:
+        for mode in modes:
+            for store_key in stores:
+                row = {"mode": mode, "store": store_key, "runs": [], "error": None}
+                warm_profile = os.path.join(work_dir, f"profile_{store_key}")
+                for i in range(repeat):
+                    out_dir = tempfile.mkdtemp(dir=work_dir)
+                    timer = StageTimer()
+                    try:
+                        if mode == "http":
+                            run_http(store_key, out_dir, timer)
+                        else:
+                            profile = warm_profile if mode == "browser-warm" else os.path.join(out_dir, "profile")
+                            run_browser(store_key, out_dir, timer, profile)
+                    except Exception as e:
+                        message = str(e).splitlines()[0].split(";")[0] if str(e) else ""
+                        row["error"] = f"{type(e).__name__}: {message}"
+                        break
+                    row["runs"].append(timer.stages)
+                results.append(row)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results):
+    header = f"{'mode':14} {'store':7} " + " ".join(f"{s:>9}" for s in STAGES) + f" {'total':>9}  runs"
+    print("\n⏱️  Median stage time (ms)\n" + header + "\n" + "-" * len(header))
+    for row in results:
+        if not row["runs"]:
+            print(f"{row['mode']:14} {row['store']:7} skipped: {row['error']}")
+            continue
+        cells = []
+        for stage in STAGES:
+            values = [r[stage] for r in row["runs"] if stage in r]
+            cells.append(f"{statistics.median(values) * 1000:9.1f}" if values else f"{'-':>9}")
+        total = statistics.median(sum(r.values()) for r in row["runs"]) * 1000
+        note = f"  (stopped: {row['error']})" if row["error"] else ""
+        print(f"{row['mode']:14} {row['store']:7} " + " ".join(cells) + f" {total:9.1f}  {len(row['runs'])}{note}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark POS exporter modes against the mock POS.")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--stores", default=",".join(STORES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--delay-ms", type=int, default=0, help="server latency per response")
+    parser.add_argument("--ui-delay-ms", type=int, default=0, help="delay before dialogs/sections appear")
+    parser.add_argument("--export-delay-ms", type=int, default=0, help="delay before the CSV streams")
+    parser.add_argument("--json", help="also write raw results to this file")
+    args = parser.parse_args(argv)
+
+    modes = [m for m in args.modes.split(",") if m]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    os.environ["MOCK_POS_DELAY_MS"] = str(args.delay_ms)
+    os.environ["MOCK_POS_UI_DELAY_MS"] = str(args.ui_delay_ms)
+    os.environ["MOCK_POS_EXPORT_DELAY_MS"] = str(args.export_delay_ms)
+    server = start_mock_server()
+    # must be set before pos_export / pos_http_export read their URLs
+    os.environ["POS_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/{{store}}"
+    try:
+        results = bench(modes, [s for s in args.stores.split(",") if s], args.repeat)
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Raw timings → {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Local SQLite mirror of the catalog for the interactive tools.
+
+`sync` copies stores, categories, products, product_inventory and
+product_images from MySQL into downloads/catalog_mirror.sqlite (override
+with CATALOG_MIRROR_PATH). It builds an FTS5 index on product names. After
+the first run, a table with a last_synced_at / updated_at column only
+fetches rows changed since the previous sync. An id-only query removes
+rows deleted upstream. Tables without a timestamp are copied whole (they
+are small).
+
+image_manager and product_creator read from the mirror when it exists, so
+lookups are local and work offline. Set CATALOG_MIRROR=0 to always query
+MySQL instead.
+
+Usage:
+    python3 catalog_mirror.py sync [--full]
+    python3 catalog_mirror.py search <words>
+    python3 catalog_mirror.py status
+"""
+import os
+import sys
+import time
+import sqlite3
+from contextlib import closing
+from decimal import Decimal
+from datetime import datetime, date
+
+from product_utils import get_db_connection, name_key, get_store
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MIRROR_PATH = os.getenv("CATALOG_MIRROR_PATH", os.path.join(BASE_DIR, "downloads", "catalog_mirror.sqlite"))
+
+# table -> candidate change-tracking columns (first one present is used)
+MIRRORED_TABLES = {
+    "stores": ("updated_at",),
+    "categories": ("updated_at",),
+    "products": ("updated_at",),
+    "product_inventory": ("last_synced_at", "updated_at"),
+    "product_images": ("updated_at",),
+}
+FETCH_BATCH = 2000
+
+
+def enabled():
+    return os.getenv("CATALOG_MIRROR", "1") == "1"
+
+
+def available(path=None):
+    """True when the tools should read from the mirror."""
+    return enabled() and os.path.exists(path or MIRROR_PATH)
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or MIRROR_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _sqlite_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sync
+# ─────────────────────────────────────────────────────────────────────────────
+def _ensure_state(lite):
+    lite.execute("""
+        CREATE TABLE IF NOT EXISTS _mirror_state (
+            table_name TEXT PRIMARY KEY,
+            columns TEXT NOT NULL,
+            change_column TEXT,
+            high_water TEXT,
+            synced_at TEXT
+        )
+    """)
+    lite.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts
+        USING fts5(name, tokenize = "unicode61 tokenchars '/.-'", prefix = '2 3')
+    """)
+
+
+def _change_column(my_cur, table):
+    my_cur.execute(f"SHOW COLUMNS FROM `{table}`")
+    columns = [row[0] for row in my_cur.fetchall()]
+    for candidate in MIRRORED_TABLES[table]:
+        if candidate in columns:
+            return columns, candidate
+    return columns, None
+
+
+def _create_table(lite, table, columns):
+    lite.execute(f'DROP TABLE IF EXISTS "{table}"')
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    lite.execute(f'CREATE TABLE "{table}" ({column_list}, PRIMARY KEY (id))')
+    if table == "products":
+        lite.execute("CREATE INDEX idx_products_name_key ON products (name_key)")
+        lite.execute("DELETE FROM products_fts")
+    elif table == "product_inventory":
+        lite.execute("CREATE INDEX idx_inventory_store ON product_inventory (store_id, product_id)")
+    elif table == "categories":
+        lite.execute("CREATE INDEX idx_categories_name_key ON categories (name_key)")
+
+
+def _index_names(lite, rows, columns):
+    """Refresh products_fts for upserted product rows."""
+    id_pos, name_pos = columns.index("id"), columns.index("name")
+    ids = [(row[id_pos],) for row in rows]
+    lite.executemany("DELETE FROM products_fts WHERE rowid = ?", ids)
+    lite.executemany("INSERT INTO products_fts (rowid, name) VALUES (?, ?)",
+                     [(row[id_pos], row[name_pos]) for row in rows])
+
+
+def sync_table(my_conn, lite, table, full=False):
+    """Mirror one table; returns (rows upserted, rows deleted)."""
+    my_cur = my_conn.cursor()
+    try:
+        columns, change_column = _change_column(my_cur, table)
+        select_columns = [f"`{c}`" for c in columns]
+        if table in ("products", "categories") and "name_key" not in columns:
+            # not migrated upstream yet (migrate_name_keys.py): fill it locally
+            columns = columns + ["name_key"]
+            select_columns.append("NULL")
+        state = lite.execute("SELECT * FROM _mirror_state WHERE table_name = ?", (table,)).fetchone()
+        rebuild = full or state is None or state["columns"] != ",".join(columns)
+        if rebuild:
+            _create_table(lite, table, columns)
+
+        sql = f"SELECT {', '.join(select_columns)} FROM `{table}`"
+        params = ()
+        if change_column and not rebuild and state["high_water"]:
+            # >= so rows sharing the last second are picked up again (upserts are idempotent)
+            sql += f" WHERE `{change_column}` >= %s OR `{change_column}` IS NULL"
+            params = (state["high_water"],)
+        my_cur.execute(sql, params)
+
+        placeholders = ", ".join(["?"] * len(columns))
+        key_pos = columns.index("name_key") if "name_key" in columns else None
+        name_pos = columns.index("name") if "name" in columns else None
+        change_pos = columns.index(change_column) if change_column else None
+        high_water = state["high_water"] if state and not rebuild else None
+        upserted = 0
+        while True:
+            batch = my_cur.fetchmany(FETCH_BATCH)
+            if not batch:
+                break
+            rows = []
+            for row in batch:
+                row = [_sqlite_value(v) for v in row]
+                if key_pos is not None and not row[key_pos]:
+                    row[key_pos] = name_key(row[name_pos])
+                if change_pos is not None and row[change_pos] and (high_water is None or row[change_pos] > high_water):
+                    high_water = row[change_pos]
+                rows.append(row)
+            lite.executemany(f'INSERT OR REPLACE INTO "{table}" VALUES ({placeholders})', rows)
+            if table == "products":
+                _index_names(lite, rows, columns)
+            upserted += len(rows)
+
+        deleted = 0
+        if not rebuild:
+            my_cur.execute(f"SELECT id FROM `{table}`")
+            live = {row[0] for row in my_cur.fetchall()}
+            gone = [(row[0],) for row in lite.execute(f'SELECT id FROM "{table}"') if row[0] not in live]
+            if gone:
+                lite.executemany(f'DELETE FROM "{table}" WHERE id = ?', gone)
+                if table == "products":
+                    lite.executemany("DELETE FROM products_fts WHERE rowid = ?", gone)
+                deleted = len(gone)
+
+        lite.execute(
+            "INSERT OR REPLACE INTO _mirror_state VALUES (?, ?, ?, ?, ?)",
+            (table, ",".join(columns), change_column, high_water, datetime.now().isoformat(timespec="seconds")),
+        )
+        return upserted, deleted
+    finally:
+        my_cur.close()
+
+
+def sync(full=False, path=None):
+    """Bring the mirror up to date with MySQL (read from the replica when configured)."""
+    path = path or MIRROR_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    started = time.time()
+    my_conn = get_db_connection(read_only=True)
+    lite = connect(path)
+    try:
+        _ensure_state(lite)
+        for table in MIRRORED_TABLES:
+            upserted, deleted = sync_table(my_conn, lite, table, full)
+            lite.commit()
+            print(f"  🪞 {table:18} {upserted:6} upserted, {deleted} deleted")
+    finally:
+        lite.close()
+        my_conn.close()
+    print(f"✅ Catalog mirror synced in {time.time() - started:.1f}s → {path}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reads (same shapes as the product_utils / image_manager helpers)
+# ─────────────────────────────────────────────────────────────────────────────
+def _key_range(prefix):
+    """name_key bounds for a prefix, so the lookup is an index range scan."""
+    key = name_key(prefix)
+    return key, key + "\uffff"
+
+
+def search_products_by_name(base_product_name, path=None):
+    """Products whose name starts with base_product_name (list of {id, name})."""
+    lo, hi = _key_range(base_product_name)
+    with closing(connect(path)) as lite:
+        rows = lite.execute(
+            "SELECT id, name FROM products WHERE name_key >= ? AND name_key < ? ORDER BY name", (lo, hi)
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_products_by_names(names, path=None):
+    """Dictionary of name_key -> product dictionary (id, name, upc, stockcode, unit_price)."""
+    keys = list(dict.fromkeys(name_key(n) for n in names if name_key(n)))
+    found = {}
+    with closing(connect(path)) as lite:
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            for row in lite.execute(
+                f"SELECT id, name, name_key, upc, stockcode, unit_price FROM products "
+                f"WHERE name_key IN ({', '.join(['?'] * len(chunk))})", chunk
+            ):
+                product = dict(row)
+                found[product.pop("name_key")] = product
+    return found
+
+
+def get_product_by_key(name, path=None):
+    """Product {id, name} with the same name_key as name, or None."""
+    with closing(connect(path)) as lite:
+        row = lite.execute("SELECT id, name FROM products WHERE name_key = ? LIMIT 1", (name_key(name),)).fetchone()
+    return dict(row) if row else None
+
+
+def get_category_id_by_name(category_name, path=None):
+    with closing(connect(path)) as lite:
+        row = lite.execute("SELECT id FROM categories WHERE name_key = ? LIMIT 1", (name_key(category_name),)).fetchone()
+    return row["id"] if row else None
+
+
+def search(words, store=None, limit=50, path=None):
+    """
+    Full-text search on product names: every word must match the start of
+    a name token ("geek pul" finds GEEKBAR PULSE ...). Optionally limited
+    to products stocked at a store.
+    """
+    tokens = [t.replace('"', '') for t in name_key(words).split()]
+    if not tokens:
+        return []
+    query = " AND ".join(f'"{t}"*' for t in tokens)
+    sql = """
+        SELECT p.id, p.name, p.upc, p.unit_price
+        FROM products_fts f JOIN products p ON p.id = f.rowid
+        WHERE products_fts MATCH ?
+    """
+    params = [query]
+    if store:
+        sql += """ AND p.id IN (
+            SELECT pi.product_id FROM product_inventory pi JOIN stores s ON s.id = pi.store_id
+            WHERE UPPER(s.name) = ? AND pi.quantity_on_hand > 0)"""
+        params.append(get_store(store)["name"].upper())
+    sql += " ORDER BY f.rank LIMIT ?"
+    params.append(limit)
+    with closing(connect(path)) as lite:
+        return [dict(row) for row in lite.execute(sql, params)]
+
+
+def status(path=None):
+    path = path or MIRROR_PATH
+    if not os.path.exists(path):
+        print(f"❌ No mirror at {path}; run: python3 catalog_mirror.py sync")
+        return 1
+    with closing(connect(path)) as lite:
+        for row in lite.execute("SELECT * FROM _mirror_state ORDER BY table_name"):
+            count = lite.execute(f'SELECT COUNT(*) FROM "{row["table_name"]}"').fetchone()[0]
+            print(f"  {row['table_name']:18} {count:7} rows  synced {row['synced_at']}"
+                  + (f"  (through {row['change_column']} {row['high_water']})" if row["change_column"] else ""))
+    return 0
+
+
+def main(argv):
+    if argv and argv[0] == "sync":
+        sync(full="--full" in argv[1:])
+        return 0
+    if argv and argv[0] == "search" and len(argv) > 1:
+        started = time.perf_counter()
+        rows = search(" ".join(argv[1:]))
+        for row in rows:
+            print(f"  {row['id']:6}  {row['name']}")
+        print(f"🔍 {len(rows)} matches in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return 0
+    if argv and argv[0] == "status":
+        return status()
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,11 +2,16 @@ import os
 import sys
 import re
 import math
+from decimal import Decimal
 import pandas as pd
 import mysql.connector
 from mysql.connector import errorcode
 from dotenv import load_dotenv
 from urllib.parse import urlparse, unquote
+from pos_cleaner import read_clean_table
+from inventory_validation import validate_inventory, write_rejects
+from pipeline_trace import span, traced, annotate
+from product_utils import get_store, get_store_id, store_names, name_key
 
 load_dotenv()
 
@@ -25,6 +30,10 @@ PARENT_CATEGORIES = {
 }
 
 CATEGORY_ALIASES = {
+    "NICOTINE VAPE": "NICOTINE VAPES",
+    "VAPES": "NICOTINE VAPES",
+    "VAPE": "NICOTINE VAPES",
+    "DISPOSABLE VAPES": "NICOTINE VAPES",
     "ROLLING PAPERS & CONES": "ROLLING PAPERS AND CONES",
     "ROLLING PAPERS": "ROLLING PAPERS AND CONES",
     "ROLLING PAPER,CONES, TIPS AND WRAPS": "ROLLING PAPERS AND CONES",
@@ -36,6 +45,9 @@ CATEGORY_ALIASES = {
     "RAW": "ROLLING PAPERS AND CONES",
 }
 
+# Every category name the loader can place under a parent
+KNOWN_CATEGORIES = set(PARENT_CATEGORIES) | set(CATEGORY_ALIASES)
+
 SUBCATEGORY_RULES = [
     {"name": "RAZ LTX 25K", "slug": "raz-25k", "parent": "NICOTINE VAPES", "tokens": ["RAZ", "LTX", "25K"]},
     {"name": "GEEKBAR X 25K", "slug": "geekbar-x-25k", "parent": "NICOTINE VAPES", "tokens": ["GEEK", "25K"]},
@@ -52,19 +64,14 @@ SUBCATEGORY_RULES = [
 ]
 
 
-STORE_SNAPSHOT_TABLES = {
-    "CALLE 8": "inventory_calle8",
-    "79TH STREET": "inventory_79th",
-    "MARKET": "inventory_mkt"
-}
-
 PRODUCT_SQL = (
     """
     INSERT INTO products
-      (name, upc, stockcode, unit_price, category_id, supplier)
+      (name, name_key, upc, stockcode, unit_price, category_id, supplier)
     VALUES
-      (%s, %s, %s, %s, %s, %s)
+      (%s, %s, %s, %s, %s, %s, %s)
     ON DUPLICATE KEY UPDATE
+      name_key = VALUES(name_key),
       upc = VALUES(upc),
       stockcode = VALUES(stockcode),
       unit_price = VALUES(unit_price),
@@ -96,7 +103,9 @@ def ensure_store_snapshot_table(cur, table_name):
             name VARCHAR(200) NOT NULL,
             upc VARCHAR(32) NOT NULL,
             quantity INT NOT NULL DEFAULT 0,
-            is_active TINYINT(1) NOT NULL DEFAULT 1
+            is_active TINYINT(1) NOT NULL DEFAULT 1,
+            name_key VARCHAR(200) NOT NULL DEFAULT '',
+            KEY idx_name_key (name_key)
         )
         """
     )
@@ -108,8 +117,18 @@ def ensure_store_snapshot_table(cur, table_name):
             ADD COLUMN is_active TINYINT(1) NOT NULL DEFAULT 1 AFTER quantity
             """
         )
+    cur.execute(f"SHOW COLUMNS FROM `{table_name}` LIKE 'name_key'")
+    if not cur.fetchone():
+        cur.execute(
+            f"""
+            ALTER TABLE `{table_name}`
+            ADD COLUMN name_key VARCHAR(200) NOT NULL DEFAULT '',
+            ADD KEY idx_name_key (name_key)
+            """
+        )
 
 
+@traced("db.snapshot_refresh")
 def refresh_store_snapshot_table(cur, table_name, rows):
     cur.execute(f"SELECT name, upc, is_active FROM `{table_name}`")
     existing_flags = {}
@@ -118,13 +137,14 @@ def refresh_store_snapshot_table(cur, table_name, rows):
     cur.execute(f"TRUNCATE TABLE `{table_name}`")
     if not rows:
         return
-    insert_sql = f"INSERT INTO `{table_name}` (name, upc, quantity, is_active) VALUES (%s, %s, %s, %s)"
+    insert_sql = f"INSERT INTO `{table_name}` (name, name_key, upc, quantity, is_active) VALUES (%s, %s, %s, %s, %s)"
     data = []
     for (name, upc), qty in rows.items():
         key = (name, upc)
         active_flag = existing_flags.get(key, 1)
-        data.append((name, upc, qty, active_flag))
+        data.append((name, name_key(name), upc, qty, active_flag))
     cur.executemany(insert_sql, data)
+    annotate(table=table_name, rows=len(data))
 
 
 def collect_store_snapshot_rows(cur, store_id):
@@ -207,7 +227,7 @@ def clamp_int(x, minimum=0):
         v = int(float(str(x).replace(",", "")))
     except Exception:
         v = 0
-    return max(v, minimum)
+    return v if minimum is None else max(v, minimum)
 
 
 def clamp_price(x):
@@ -372,7 +392,7 @@ def load_category_cache(conn):
     cur.close()
     cache = {"by_name": {}, "by_slug": {}}
     for row in rows:
-        key = row["name"].upper()
+        key = name_key(row["name"])
         cache["by_name"][key] = {"id": row["id"], "slug": row["slug"], "parent_id": row["parent_id"]}
         if row["slug"]:
             cache["by_slug"][row["slug"]] = row["id"]
@@ -380,7 +400,7 @@ def load_category_cache(conn):
 
 
 def ensure_category(cur, cache, name, slug_value=None, parent_id=None):
-    key = name.upper()
+    key = name_key(name)
     existing = cache["by_name"].get(key)
     if existing:
         if existing["parent_id"] != parent_id:
@@ -393,7 +413,10 @@ def ensure_category(cur, cache, name, slug_value=None, parent_id=None):
     while slug_candidate in cache["by_slug"]:
         slug_candidate = f"{base}-{suffix}"
         suffix += 1
-    cur.execute("INSERT INTO categories (name, slug, parent_id) VALUES (%s, %s, %s)", (name, slug_candidate, parent_id))
+    cur.execute(
+        "INSERT INTO categories (name, name_key, slug, parent_id) VALUES (%s, %s, %s, %s)",
+        (name, key, slug_candidate, parent_id)
+    )
     new_id = cur.lastrowid
     cache["by_name"][key] = {"id": new_id, "slug": slug_candidate, "parent_id": parent_id}
     cache["by_slug"][slug_candidate] = new_id
@@ -417,30 +440,26 @@ def infer_subcategory(name, parent_name):
     return None
 
 
-def get_store_id(cur, store_name):
-    cur.execute("SELECT id FROM stores WHERE name = %s LIMIT 1", (store_name,))
-    row = cur.fetchone()
-    if not row:
-        raise ValueError(f"Store '{store_name}' not found. Initialize stores before loading data.")
-    return row[0]
-
-
 def prune_missing_inventory(cur, store_id, current_product_ids):
     cur.execute("SELECT product_id FROM product_inventory WHERE store_id = %s", (store_id,))
     existing = {row[0] for row in cur.fetchall()}
-    missing = existing - current_product_ids
-    if not missing:
+    return delete_store_inventory(cur, store_id, existing - current_product_ids)
+
+
+def delete_store_inventory(cur, store_id, product_ids):
+    if not product_ids:
         return 0
     deleted = 0
-    missing_list = list(missing)
+    missing_list = list(product_ids)
     batch_size = 500
     for i in range(0, len(missing_list), batch_size):
         chunk = missing_list[i:i + batch_size]
         placeholders = ",".join(["%s"] * len(chunk))
-        cur.execute(
-            f"DELETE FROM product_inventory WHERE store_id = %s AND product_id IN ({placeholders})",
-            (store_id, *chunk)
-        )
+        with span("db.delete_batch", rows=len(chunk)):
+            cur.execute(
+                f"DELETE FROM product_inventory WHERE store_id = %s AND product_id IN ({placeholders})",
+                (store_id, *chunk)
+            )
         deleted += cur.rowcount or 0
     return deleted
 
@@ -449,7 +468,7 @@ def upsert_product(cur, payload):
     cur.execute(PRODUCT_SQL, payload)
     product_id = cur.lastrowid
     if not product_id:
-        cur.execute("SELECT id FROM products WHERE name = %s LIMIT 1", (payload[0],))
+        cur.execute("SELECT id FROM products WHERE name_key = %s LIMIT 1", (payload[1],))
         row = cur.fetchone()
         if not row:
             raise ValueError(f"Unable to resolve product id for {payload[0]}")
@@ -461,96 +480,203 @@ def upsert_inventory(cur, product_id, store_id, qty, price):
     cur.execute(INVENTORY_SQL, (product_id, store_id, qty, price))
 
 
-def load_csv_to_db(csv_path, supplier_label=None, location=None):
-    supplier_label = supplier_label or os.getenv("SUPPLIER", "CigarPOS")
-    location = location or os.getenv("LOCATION", "Calle 8")
-    df = pd.read_csv(csv_path, dtype=str).fillna("")
+def read_clean_frame(path):
+    """
+    Read a cleaned inventory file into the loader's frame.
+
+    Arrow files written by pos_cleaner are already typed (UPC string,
+    QtyOnHand int32, UnitPrice decimal) and are memory-mapped, so only the
+    empty-value rules apply. Older *_clean.csv files are still parsed as
+    strings and clamped field by field. Negative quantities are kept so the
+    validation stage can reject them.
+    """
+    if path.endswith(".arrow"):
+        df = read_clean_table(path).to_pandas()
+        df["StockCode"] = df["StockCode"].fillna("").str.slice(0, 64)
+        df["UPC"] = df["UPC"].fillna("").str.slice(0, 20)
+        df["UnitPrice"] = df["UnitPrice"].where(df["UnitPrice"].notna(), Decimal("0.00"))
+        df["Category"] = df["Category"].fillna("").str.strip()
+        df["Name"] = df["Name"].fillna("")
+        return df
+    df = pd.read_csv(path, dtype=str).fillna("")
     for col in ["Name", "StockCode", "UPC", "QtyOnHand", "UnitPrice", "Category"]:
         if col not in df.columns:
             df[col] = ""
-    df["Name"] = df["Name"].apply(lambda s: safe_len(apply_brand_specific_rules(normalize_product_name_spacing(s)).upper() if s else '', 200))
     df["StockCode"] = df["StockCode"].apply(lambda s: safe_len(s, 64))
     df["UPC"] = df["UPC"].apply(clean_upc)
-    df["QtyOnHand"] = df["QtyOnHand"].apply(clamp_int)
+    df["QtyOnHand"] = df["QtyOnHand"].apply(lambda x: clamp_int(x, minimum=None))
     df["UnitPrice"] = df["UnitPrice"].apply(clamp_price)
     df["Category"] = df["Category"].apply(as_str)
-    
+    return df
+
+
+def fetch_price_history(cur, store_id):
+    """Return {product name: (product id, last loaded unit price)} for a store."""
+    cur.execute(
+        """
+        SELECT p.name, p.id, pi.unit_price
+        FROM product_inventory pi
+        JOIN products p ON p.id = pi.product_id
+        WHERE pi.store_id = %s
+        """,
+        (store_id,)
+    )
+    return {as_str(name): (pid, float(price or 0)) for name, pid, price in cur.fetchall()}
+
+
+@traced("snapshots")
+def rebuild_snapshot_tables(locations=None):
+    """Refresh the per-store snapshot tables (all stores by default) in one transaction."""
+    conn = get_conn()
+    cur = conn.cursor()
+    refreshed = []
+    try:
+        for store_label in locations or store_names():
+            try:
+                store = get_store(store_label)
+            except ValueError:
+                continue
+            snapshot_table = store["snapshot_table"]
+            refreshed.append(store["key"])
+            store_id = get_store_id(store_label, cur)
+            ensure_store_snapshot_table(cur, snapshot_table)
+            refresh_store_snapshot_table(cur, snapshot_table, collect_store_snapshot_rows(cur, store_id))
+            print(f"  📸 Refreshed {snapshot_table}")
+        conn.commit()
+        annotate(stores=",".join(refreshed))
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+@traced("load_csv_to_db")
+def load_csv_to_db(csv_path, supplier_label=None, location=None, refresh_snapshot=True):
+    supplier_label = supplier_label or os.getenv("SUPPLIER", "CigarPOS")
+    location = location or os.getenv("LOCATION", "Calle 8")
+    df = read_clean_frame(csv_path)
+    source_names = df["Name"].copy()   # cleaned names, before the name rules (see export_diff.record_load)
+    df["Name"] = df["Name"].apply(lambda s: safe_len(apply_brand_specific_rules(normalize_product_name_spacing(s)).upper() if s else '', 200))
+
     # Exclude specific flavors as requested by user
     df = df[~df["Name"].str.upper().str.contains("RAZ 9K CACTUS JACK", na=False)].copy()
     df = df[~df["Name"].str.upper().str.contains("RAZ 9K ORANGE RASPBERRY", na=False)].copy()
 
-    df = df[df["Name"].str.len() > 0].copy()
+    # A change set from export_diff only carries the rows that changed since
+    # the last load: upserts are written, retired names are dropped, and
+    # everything else in the store is left as it is. Keep rows are unchanged
+    # rows of the current export; a retired name that still appears on an
+    # upsert or keep row (after the name rules above) stays.
+    delta = "Change" in df.columns
+    retired_names = set()
+    if delta:
+        live_names = set(df.loc[df["Change"] != "retire", "Name"])
+        retired_names = set(df.loc[df["Change"] == "retire", "Name"]) - live_names
+        df = df[df["Change"] == "upsert"].drop(columns=["Change"])
+        print(f"🔀 Delta load: {len(df)} upserts, {len(retired_names)} retired names")
+
     rows = len(df)
-    if rows == 0:
+    annotate(location=location, rows=rows, delta=delta, retired=len(retired_names))
+    if rows == 0 and not retired_names:
         print("No rows to load.")
         return
     supplier_value = safe_len(supplier_label, 120)
     store_label = safe_len(location, 100)
-    store_key = store_label.upper()
-    snapshot_table = STORE_SNAPSHOT_TABLES.get(store_key)
+    try:
+        snapshot_table = get_store(store_label)["snapshot_table"]
+    except ValueError:
+        snapshot_table = None
     conn = get_conn()
     cur = conn.cursor()
     try:
         host = os.getenv("DB_HOST") or os.getenv("MYSQLHOST") or "127.0.0.1"
         print(f"📦 Connected to database ({host})...")
-        store_id = get_store_id(cur, store_label)
-        cache = load_category_cache(conn)
-        print("  Ensuring categories...")
-        parent_ids = ensure_parent_categories(cur, cache)
-        if snapshot_table:
-            ensure_store_snapshot_table(cur, snapshot_table)
-        conn.commit()
+        store_id = get_store_id(store_label, cur)
+
+        # Validate before the first write so bad input never costs a rollback.
+        # Rejected rows are quarantined: their current inventory is left as-is.
+        with span("db.price_history"):
+            price_history = fetch_price_history(cur, store_id)
+        with span("validate") as s:
+            df, rejects = validate_inventory(
+                df, KNOWN_CATEGORIES, {name: price for name, (_, price) in price_history.items()}
+            )
+            s.attrs.update(accepted=len(df), rejected=len(rejects))
+        rejects["source_name"] = source_names.loc[rejects.index]
+        rejects_file = write_rejects(rejects, csv_path)
+        if rejects_file:
+            print(f"  🚫 Quarantined {len(rejects)} rows → {rejects_file}")
+        quarantined_ids = {price_history[n][0] for n in rejects["Name"] if n in price_history}
+        rows = len(df)
+
+        with span("db.categories"):
+            cache = load_category_cache(conn)
+            print("  Ensuring categories...")
+            parent_ids = ensure_parent_categories(cur, cache)
+            if snapshot_table:
+                ensure_store_snapshot_table(cur, snapshot_table)
+            conn.commit()
         print("  Loading products...")
         current_product_ids = set()
         processed = 0
-        for _, record in df.iterrows():
-            parent_name = as_str(record["Category"]).upper()
-            parent_name = CATEGORY_ALIASES.get(parent_name, parent_name)
-            if parent_name not in parent_ids:
-                continue
-            parent_id = parent_ids[parent_name]
-            sub_rule = infer_subcategory(record["Name"], parent_name)
-            if sub_rule:
-                category_id = ensure_category(cur, cache, sub_rule["name"], sub_rule["slug"], parent_id)
-            else:
-                category_id = parent_id
-            name_value = as_str(record["Name"])
-            upc_value = as_str(record["UPC"])
-            stockcode_value = as_str(record["StockCode"])
-            price_value = clamp_price(record["UnitPrice"])
-            qty_value = clamp_int(record["QtyOnHand"])
-            product_id = upsert_product(
-                cur,
-                (
-                    name_value,
-                    upc_value,
-                    stockcode_value,
-                    price_value,
-                    int(category_id),
-                    supplier_value,
+        with span("db.upsert") as upsert_span:
+            for _, record in df.iterrows():
+                parent_name = as_str(record["Category"]).upper()
+                parent_name = CATEGORY_ALIASES.get(parent_name, parent_name)
+                parent_id = parent_ids[parent_name]
+                sub_rule = infer_subcategory(record["Name"], parent_name)
+                if sub_rule:
+                    category_id = ensure_category(cur, cache, sub_rule["name"], sub_rule["slug"], parent_id)
+                else:
+                    category_id = parent_id
+                name_value = as_str(record["Name"])
+                upc_value = as_str(record["UPC"])
+                stockcode_value = as_str(record["StockCode"])
+                price_value = record["UnitPrice"]
+                qty_value = int(record["QtyOnHand"])
+                product_id = upsert_product(
+                    cur,
+                    (
+                        name_value,
+                        name_key(name_value),
+                        upc_value,
+                        stockcode_value,
+                        price_value,
+                        int(category_id),
+                        supplier_value,
+                    )
                 )
-            )
-            current_product_ids.add(product_id)
-            upsert_inventory(cur, product_id, store_id, qty_value, price_value)
-            processed += 1
-            if processed % 100 == 0:
-                print(f"    Processed {processed}/{rows}")
-        removed = prune_missing_inventory(cur, store_id, current_product_ids)
+                current_product_ids.add(product_id)
+                upsert_inventory(cur, product_id, store_id, qty_value, price_value)
+                processed += 1
+                if processed % 100 == 0:
+                    print(f"    Processed {processed}/{rows}")
+            upsert_span["rows"] = processed
+        with span("db.prune") as prune_span:
+            if delta:
+                retired_ids = {price_history[n][0] for n in retired_names if n in price_history}
+                removed = delete_store_inventory(cur, store_id, retired_ids - current_product_ids - quarantined_ids)
+            else:
+                removed = prune_missing_inventory(cur, store_id, current_product_ids | quarantined_ids)
+            prune_span["rows"] = removed
         if removed:
             print(f"  🧹 Removed {removed} inventory rows for {store_label}.")
         else:
             print("  🧹 No obsolete inventory to prune.")
-        if snapshot_table:
+        if snapshot_table and refresh_snapshot:
             snapshot_rows = collect_store_snapshot_rows(cur, store_id)
             refresh_store_snapshot_table(cur, snapshot_table, snapshot_rows)
-        conn.commit()
+        with span("db.commit"):
+            conn.commit()
         print(f"✅ Upserted {processed} inventory rows for {store_label}.")
     except mysql.connector.Error as e:
         conn.rollback()
         if e.errno == errorcode.ER_NO_SUCH_TABLE:
             print("Error: Required tables do not exist.")
         elif e.errno == errorcode.ER_BAD_FIELD_ERROR:
-            print("Error: Column mismatch between CSV and database schema.")
+            print("Error: Column mismatch between CSV and database schema (run migrate_name_keys.py if name_key is missing).")
         else:
             print("MySQL Error:", e)
         raise
@@ -10,6 +10,7 @@ import os
 import mysql.connector
 from dotenv import load_dotenv
 from urllib.parse import urlparse, unquote
+from product_utils import name_key
 
 load_dotenv()
 
@@ -86,8 +87,8 @@ def consolidate_categories():
     try:
         # 1. Get or create the canonical category
         cur.execute(
-            "SELECT id FROM categories WHERE UPPER(name) = %s LIMIT 1",
-            (CANONICAL_NAME.upper(),)
+            "SELECT id FROM categories WHERE name_key = %s LIMIT 1",
+            (name_key(CANONICAL_NAME),)
         )
         canonical_result = cur.fetchone()
         
@@ -108,16 +109,16 @@ def consolidate_categories():
                 print(f"📝 Found existing category with slug 'rolling-papers-cones': '{old_name}'")
                 print(f"   Renaming to '{CANONICAL_NAME}'...")
                 cur.execute(
-                    "UPDATE categories SET name = %s WHERE id = %s",
-                    (CANONICAL_NAME, canonical_id)
+                    "UPDATE categories SET name = %s, name_key = %s WHERE id = %s",
+                    (CANONICAL_NAME, name_key(CANONICAL_NAME), canonical_id)
                 )
                 conn.commit()
                 print(f"✅ Renamed to '{CANONICAL_NAME}' (ID: {canonical_id})")
             else:
                 print(f"📝 Creating canonical category '{CANONICAL_NAME}'...")
                 cur.execute(
-                    "INSERT INTO categories (name, slug, parent_id) VALUES (%s, %s, %s)",
-                    (CANONICAL_NAME, "rolling-papers-cones", None)
+                    "INSERT INTO categories (name, name_key, slug, parent_id) VALUES (%s, %s, %s, %s)",
+                    (CANONICAL_NAME, name_key(CANONICAL_NAME), "rolling-papers-cones", None)
                 )
                 canonical_id = cur.lastrowid
                 conn.commit()
@@ -127,8 +128,8 @@ def consolidate_categories():
         old_category_ids = []
         for old_name in OLD_CATEGORY_NAMES:
             cur.execute(
-                "SELECT id FROM categories WHERE UPPER(name) = %s",
-                (old_name.upper(),)
+                "SELECT id FROM categories WHERE name_key = %s",
+                (name_key(old_name),)
             )
             result = cur.fetchone()
             if result:
@@ -0,0 +1,123 @@
+"""
+Detect finished POS "Export CSV" downloads from filesystem events.
+
+Chrome writes the file as <name>.crdownload and renames it to items-*.csv
+when it is complete. A watchdog observer (inotify on Linux) on the store's
+download directory rechecks the directory on every event, so the rename is
+seen as it happens. An export only counts as finished when it is non-empty
+and no *.crdownload is left next to it (Chrome can create the final name
+before the download is done). Files older than the export click are
+ignored, so stale items-*.csv left behind by a failed cleanup can never be
+picked up. Without watchdog installed it falls back to polling the directory.
+"""
+import os
+import glob
+import time
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # polling fallback below
+    Observer = None
+    FileSystemEventHandler = object
+
+EXPORT_PATTERN = "items-*.csv"
+POLL_INTERVAL = 0.5
+# Filesystems with coarse timestamps can date a new file slightly before the click
+MTIME_SLACK = 2.0
+
+
+class _ExportHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # create / write / close / .crdownload rename or delete: any of them can finish the export
+        self.watcher._check()
+
+
+class DownloadWatcher:
+    """
+    Watch a download directory for the export triggered inside the `with` block.
+
+        with DownloadWatcher(download_dir) as watcher:
+            click_export(driver)
+            csv_path = watcher.wait(timeout=90)
+    """
+
+    def __init__(self, dir_path, pattern=EXPORT_PATTERN):
+        self.dir_path = dir_path
+        self.pattern = pattern
+        self.since = None
+        self.path = None
+        self._found = threading.Event()
+        self._observer = None
+
+    def __enter__(self):
+        os.makedirs(self.dir_path, exist_ok=True)
+        self.since = time.time()
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_ExportHandler(self), self.dir_path, recursive=False)
+            self._observer.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        return False
+
+    def _check(self):
+        if self._found.is_set():
+            return
+        path = finished_export(self.dir_path, self.since, self.pattern)
+        if path:
+            self.path = path
+            self._found.set()
+
+    def wait(self, timeout=90):
+        """Return the path of the finished export, or raise TimeoutError."""
+        if self._observer is None:
+            return wait_for_csv(self.dir_path, timeout, since=self.since, pattern=self.pattern)
+        # The download may have finished between __enter__ and the observer start;
+        # the periodic recheck also covers a last write that raised no event
+        end = time.time() + timeout
+        self._check()
+        while not self._found.wait(max(0.0, min(POLL_INTERVAL * 4, end - time.time()))):
+            if time.time() >= end:
+                raise TimeoutError(f"No new {self.pattern} found in {self.dir_path} within {timeout}s")
+            self._check()
+        return self.path
+
+
+def finished_export(dir_path, since=None, pattern=EXPORT_PATTERN):
+    """
+    Newest non-empty export at or after `since`, or None while any
+    .crdownload is still in the directory (the download isn't done).
+    """
+    if glob.glob(os.path.join(dir_path, "*.crdownload")):
+        return None
+    candidates = []
+    for path in glob.glob(os.path.join(dir_path, pattern)):
+        try:
+            stat = os.stat(path)
+        except OSError:  # renamed/removed again before we looked
+            continue
+        if stat.st_size > 0 and (since is None or stat.st_mtime >= since - MTIME_SLACK):
+            candidates.append((stat.st_mtime, path))
+    return max(candidates)[1] if candidates else None
+
+
+def wait_for_csv(dir_path, timeout=90, since=None, pattern=EXPORT_PATTERN):
+    """Polling fallback: wait until a new non-empty export appears and all .crdownload files are gone."""
+    end = time.time() + timeout
+    while time.time() < end:
+        # ONLY look for the POS export pattern, ignore inventory*.csv
+        path = finished_export(dir_path, since, pattern)
+        if path:
+            return path
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"No new {pattern} found in {dir_path} within {timeout}s")
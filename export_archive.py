@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Content-addressed archive of raw POS exports.
+
+Every raw "Export CSV" download is stored once, zstd-compressed, under
+downloads/archive/objects/<sha[:2]>/<sha256>.csv.zst. Identical exports share
+one object. index.jsonl records one line per (store, export time) so any past
+export can be found by date and read back without re-downloading it.
+
+Usage:
+    python3 export_archive.py add <store> <raw.csv>
+    python3 export_archive.py list [store]
+    python3 export_archive.py restore <store> <YYYY-MM-DD[THH:MM:SS]> <dest.csv>
+"""
+import os
+import io
+import sys
+import json
+import bisect
+import hashlib
+from datetime import datetime
+import zstandard as zstd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DIR = os.path.join(BASE_DIR, "downloads", "archive")
+OBJECTS_DIR = os.path.join(ARCHIVE_DIR, "objects")
+INDEX_PATH = os.path.join(ARCHIVE_DIR, "index.jsonl")
+LOADED_DIR = os.path.join(ARCHIVE_DIR, "loaded")  # one <store>.json per store
+
+ZSTD_LEVEL = 10
+
+_index_cache = {"mtime": None, "entries": []}
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def object_path(sha):
+    return os.path.join(OBJECTS_DIR, sha[:2], f"{sha}.csv.zst")
+
+
+def archive_export(store_key, raw_path, exported_at=None):
+    """
+    Add a raw export to the archive and index it under the store and time.
+
+    Args:
+        store_key: "calle8", "79th", or "mkt"
+        raw_path: Path to the raw export CSV
+        exported_at: datetime of the export (defaults to now)
+
+    Returns:
+        The index entry dict
+    """
+    exported_at = exported_at or datetime.now()
+    sha = _sha256_file(raw_path)
+    dest = object_path(sha)
+    if not os.path.exists(dest):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = dest + ".tmp"
+        with open(raw_path, "rb") as src, open(tmp, "wb") as out:
+            zstd.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(src, out)
+        os.replace(tmp, dest)
+        stored = "new"
+    else:
+        stored = "dedup"
+
+    entry = {
+        "store": store_key,
+        "exported_at": exported_at.isoformat(timespec="seconds"),
+        "sha256": sha,
+        "size": os.path.getsize(raw_path),
+        "source": os.path.basename(raw_path),
+    }
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    with open(INDEX_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    print(f"🗄️  Archived {store_key} export {sha[:12]} ({stored})")
+    return entry
+
+
+def load_index():
+    """All index entries sorted by (store, exported_at); cached until the file changes."""
+    if not os.path.exists(INDEX_PATH):
+        return []
+    mtime = os.path.getmtime(INDEX_PATH)
+    if _index_cache["mtime"] != mtime:
+        with open(INDEX_PATH, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        entries.sort(key=lambda e: (e["store"], e["exported_at"]))
+        _index_cache.update(mtime=mtime, entries=entries)
+    return _index_cache["entries"]
+
+
+def list_exports(store_key=None):
+    entries = load_index()
+    if store_key is None:
+        return list(entries)
+    return [e for e in entries if e["store"] == store_key]
+
+
+def find_export(store_key, at=None):
+    """
+    Return the latest export of a store at or before `at` (datetime or ISO
+    string, date-only strings mean end of that day), or None.
+    """
+    entries = list_exports(store_key)
+    if not entries:
+        return None
+    if at is None:
+        return entries[-1]
+    if isinstance(at, datetime):
+        key = at.isoformat(timespec="seconds")
+    else:
+        key = at if "T" in at else f"{at}T23:59:59"
+    times = [e["exported_at"] for e in entries]
+    pos = bisect.bisect_right(times, key)
+    return entries[pos - 1] if pos else None
+
+
+def previous_export(store_key, entry):
+    """Return the export indexed right before `entry` for the same store, or None."""
+    entries = list_exports(store_key)
+    for i, e in enumerate(entries):
+        if e["exported_at"] == entry["exported_at"] and e["sha256"] == entry["sha256"]:
+            return entries[i - 1] if i else None
+    return None
+
+
+def mark_loaded(store_key, entry, filters_signature=None, **state):
+    """
+    Record `entry` as the last export successfully loaded into the DB for a
+    store. Extra keyword arguments (e.g. export_diff's full_loaded_at and
+    quarantined names) are stored with it and come back from last_loaded().
+    """
+    os.makedirs(LOADED_DIR, exist_ok=True)
+    path = os.path.join(LOADED_DIR, f"{store_key}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(entry, filters_signature=filters_signature, **state), f, indent=2)
+    os.replace(tmp, path)
+
+
+def last_loaded(store_key, filters_signature=None):
+    """
+    Return the entry of the last export loaded for a store, or None when
+    nothing was loaded yet or it was loaded under different filters.
+    """
+    path = os.path.join(LOADED_DIR, f"{store_key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    if entry.get("filters_signature") != filters_signature:
+        return None
+    if not os.path.exists(object_path(entry["sha256"])):
+        return None
+    return entry
+
+
+def read_export_bytes(entry):
+    """Decompress an archived export to bytes."""
+    with open(object_path(entry["sha256"]), "rb") as f:
+        return zstd.ZstdDecompressor().stream_reader(f).read()
+
+
+def open_export(entry):
+    """Archived export as a binary file object (e.g. for pd.read_csv)."""
+    return io.BytesIO(read_export_bytes(entry))
+
+
+def restore_export(entry, dest_path):
+    """Write an archived export back out as a plain CSV."""
+    with open(object_path(entry["sha256"]), "rb") as src, open(dest_path, "wb") as out:
+        zstd.ZstdDecompressor().copy_stream(src, out)
+    return dest_path
+
+
+def main(argv):
+    if len(argv) >= 3 and argv[0] == "add":
+        archive_export(argv[1], argv[2])
+    elif argv and argv[0] == "list":
+        for e in list_exports(argv[1] if len(argv) > 1 else None):
+            print(f"{e['store']:8} {e['exported_at']}  {e['sha256'][:12]}  {e['size']:>9,} B  {e['source']}")
+    elif len(argv) >= 4 and argv[0] == "restore":
+        entry = find_export(argv[1], argv[2])
+        if not entry:
+            print(f"❌ No {argv[1]} export on or before {argv[2]}")
+            return 1
+        restore_export(entry, argv[3])
+        print(f"✅ Restored {entry['store']} export from {entry['exported_at']} → {argv[3]}")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
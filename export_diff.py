@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Row-level diff between consecutive raw POS exports.
+
+CigarsPOS/BottlePOS exports carry a stable "ID" per item. Each row is reduced
+to a 64-bit fingerprint of the columns the cleaner uses, the two exports are
+joined on ID, and only added / removed / changed rows are kept. The change
+set is cleaned and handed to clean_data.py, which then normalizes and writes
+only those rows instead of the whole ~2,800 row export.
+
+Unchanged rows are never rewritten by a delta, so storefront sales drift
+from POS stock until an item changes. A full load therefore runs at least
+every FULL_SYNC_HOURS (default 24). Rows the loader quarantined are not part
+of the loaded baseline: record_load() keeps their names and the next delta
+sends them again.
+
+Usage:
+    python3 export_diff.py <store> <previous.csv> <current.csv>
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+import pandas as pd
+import pyarrow as pa
+
+from pos_cleaner import (
+    read_export, clean_rows, write_clean_outputs, write_clean_table, to_arrow_table,
+    clean_path_for, STORE_FILTERS_SIGNATURE,
+)
+from export_archive import last_loaded, mark_loaded, restore_export
+from inventory_validation import rejects_path_for
+from pipeline_trace import span, annotate
+
+KEY_COLUMN = "ID"
+FULL_SYNC_HOURS = float(os.getenv("FULL_SYNC_HOURS", 24))
+
+# Raw change kinds
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"      # new version of a changed row
+PREVIOUS = "previous"    # old version of a changed row (its name may have changed)
+
+# Cleaned change kinds, read by clean_data.py
+UPSERT = "upsert"
+RETIRE = "retire"
+KEEP = "keep"            # unchanged current row, only sent so retirements can be checked against it
+
+
+def row_fingerprints(df, columns):
+    """64-bit hash per row over `columns`, indexed by the POS item ID."""
+    hashes = pd.util.hash_pandas_object(df[columns], index=False)
+    return pd.Series(hashes.to_numpy(), index=df[KEY_COLUMN].to_numpy())
+
+
+def diff_exports(prev_df, curr_df, columns):
+    """
+    Compare two raw export frames (same columns, including ID).
+
+    Returns a frame of the affected raw rows with a "change" column:
+    added / removed / changed (new version) / previous (old version).
+    """
+    prev_df = prev_df.drop_duplicates(KEY_COLUMN, keep="last")
+    curr_df = curr_df.drop_duplicates(KEY_COLUMN, keep="last")
+    prev_fp = row_fingerprints(prev_df, columns)
+    curr_fp = row_fingerprints(curr_df, columns)
+
+    added = curr_fp.index.difference(prev_fp.index)
+    removed = prev_fp.index.difference(curr_fp.index)
+    common = curr_fp.index.intersection(prev_fp.index)
+    changed = common[curr_fp[common].to_numpy() != prev_fp[common].to_numpy()]
+
+    prev_by_id = prev_df.set_index(KEY_COLUMN, drop=False)
+    curr_by_id = curr_df.set_index(KEY_COLUMN, drop=False)
+    parts = [
+        curr_by_id.loc[added].assign(change=ADDED),
+        curr_by_id.loc[changed].assign(change=CHANGED),
+        prev_by_id.loc[changed].assign(change=PREVIOUS),
+        prev_by_id.loc[removed].assign(change=REMOVED),
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def read_export_pair(prev_path, curr_path):
+    """
+    Read two exports for diffing. Returns (prev_df, curr_df, mapping), or
+    None when the exports have different layouts or no ID column.
+    """
+    prev_df, prev_mapping = read_export(prev_path, extra_columns=(KEY_COLUMN,))
+    curr_df, curr_mapping = read_export(curr_path, extra_columns=(KEY_COLUMN,))
+    if prev_mapping != curr_mapping or KEY_COLUMN not in prev_df or KEY_COLUMN not in curr_df:
+        return None
+    return prev_df, curr_df, curr_mapping
+
+
+def clean_change_set(changes, mapping, store_key, current, retry_names=()):
+    """
+    Clean a raw change set into loader rows with a "Change" column.
+
+    Added/changed rows that pass the store filters become upserts, and so do
+    the rows of `current` named in retry_names (quarantined last load). Removed
+    rows and old versions of changed rows become retirements, unless their
+    name is still in `current` (the full cleaned current export): several
+    POS IDs can share a name, and an unchanged row keeps it alive. Brand
+    rules in the loader can also merge different cleaned names, so when any
+    retirement is left the rest of `current` is sent as keep rows and the
+    loader only drops a retired name that no upsert or keep row carries.
+    """
+    new_rows = changes[changes["change"].isin([ADDED, CHANGED])]
+    old_rows = changes[changes["change"].isin([REMOVED, PREVIOUS])]
+    upserts = clean_rows(new_rows, mapping, store_key)
+    retry = current[current["Name"].isin(set(retry_names)) & ~current["Name"].isin(set(upserts["Name"]))]
+    upserts = pd.concat([upserts, retry]).assign(Change=UPSERT)
+    retired = clean_rows(old_rows, mapping, store_key)
+    retired = retired[~retired["Name"].isin(set(current["Name"]))].assign(Change=RETIRE)
+    parts = [upserts, retired]
+    if len(retired):
+        parts.append(current[~current["Name"].isin(set(upserts["Name"]))].assign(Change=KEEP))
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_change_set(cleaned, path):
+    table = to_arrow_table(cleaned.drop(columns=["Change"]))
+    table = table.append_column("Change", pa.array(cleaned["Change"].tolist(), pa.string()))
+    write_clean_table(table, path)
+
+
+def changes_path_for(raw_path):
+    return os.path.splitext(raw_path)[0] + "_changes.arrow"
+
+
+def clean_for_load_full(raw_path, store_key, write_csv=True):
+    df, mapping = read_export(raw_path)
+    cleaned_path = clean_path_for(raw_path)
+    out = clean_rows(df, mapping, store_key)
+    write_clean_outputs(out, cleaned_path, write_csv)
+    annotate(mode="full", raw_rows=len(df), rows=len(out))
+    return cleaned_path
+
+
+def clean_for_load(raw_path, store_key, write_csv=True):
+    """
+    Clean a fresh export and pick what the loader should read.
+
+    The full cleaned file is always rewritten (it is what product_utils and
+    humans read, and cleaning is cheap). When the last export loaded for the
+    store is in the archive, was cleaned under the same filters and the last
+    full load is less than FULL_SYNC_HOURS old, the loader gets a change set
+    against it instead of the full file. Set FULL_SYNC=1 to force a full load.
+
+    Returns:
+        Path of the file to pass to clean_data.py
+    """
+    with span("clean", store=store_key):
+        return _clean_for_load(raw_path, store_key, write_csv)
+
+
+def _clean_for_load(raw_path, store_key, write_csv):
+    baseline = None if os.getenv("FULL_SYNC") == "1" else last_loaded(store_key, STORE_FILTERS_SIGNATURE)
+    if baseline is None:
+        return clean_for_load_full(raw_path, store_key, write_csv)
+    if full_load_due(baseline):
+        print(f"🔁 Last full load of {store_key} is over {FULL_SYNC_HOURS:g}h old; doing a full load.")
+        return clean_for_load_full(raw_path, store_key, write_csv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prev_path = restore_export(baseline, os.path.join(tmp, "previous.csv"))
+        pair = read_export_pair(prev_path, raw_path)
+    if pair is None:
+        print("⚠️  Export layout changed since the last load; doing a full load.")
+        return clean_for_load_full(raw_path, store_key, write_csv)
+
+    prev_df, curr_df, mapping = pair
+    cleaned_path = clean_path_for(raw_path)
+    out = clean_rows(curr_df, mapping, store_key)
+    write_clean_outputs(out, cleaned_path, write_csv)
+
+    columns = sorted({c for c in mapping.values() if c})
+    changes = diff_exports(prev_df, curr_df, columns)
+    summary = changes["change"].value_counts().to_dict()
+    print(f"🔀 Diff vs export of {baseline['exported_at']}: "
+          f"{summary.get(ADDED, 0)} added, {summary.get(CHANGED, 0)} changed, {summary.get(REMOVED, 0)} removed")
+    change_path = changes_path_for(raw_path)
+    retry_names = baseline.get("quarantined", [])
+    if retry_names:
+        print(f"🔁 Retrying {len(retry_names)} rows quarantined in the last load")
+    change_set = clean_change_set(changes, mapping, store_key, out, retry_names)
+    write_change_set(change_set, change_path)
+    annotate(mode="delta", raw_rows=len(curr_df), rows=len(out), changed_rows=len(change_set))
+    return change_path
+
+
+def full_load_due(baseline):
+    """True when the loaded baseline has no full load within FULL_SYNC_HOURS."""
+    full_loaded_at = baseline.get("full_loaded_at")
+    if not full_loaded_at:
+        return True
+    return datetime.now() - datetime.fromisoformat(full_loaded_at) >= timedelta(hours=FULL_SYNC_HOURS)
+
+
+def quarantined_names(cleaned_path):
+    """Cleaned names of the rows the loader quarantined from cleaned_path (its *_rejects.csv)."""
+    path = rejects_path_for(cleaned_path)
+    if not os.path.exists(path):
+        return []
+    rejects = pd.read_csv(path, dtype=str, keep_default_na=False)
+    if "source_name" not in rejects:
+        return []
+    return sorted(set(rejects["source_name"]) - {""})
+
+
+def record_load(store_key, entry, cleaned_path):
+    """
+    Mark an export as loaded after clean_data.py succeeded on cleaned_path.
+
+    Quarantined rows are left out of the baseline (their names are kept so
+    the next delta sends them again), and a full load resets the clock for
+    the periodic full load.
+    """
+    if cleaned_path.endswith("_changes.arrow"):
+        previous = last_loaded(store_key, STORE_FILTERS_SIGNATURE) or {}
+        full_loaded_at = previous.get("full_loaded_at")
+    else:
+        full_loaded_at = datetime.now().isoformat(timespec="seconds")
+    mark_loaded(store_key, entry, STORE_FILTERS_SIGNATURE,
+                full_loaded_at=full_loaded_at, quarantined=quarantined_names(cleaned_path))
+
+
+def main(argv):
+    if len(argv) != 3:
+        print(__doc__)
+        return 1
+    store_key, prev_path, curr_path = argv
+    pair = read_export_pair(prev_path, curr_path)
+    if pair is None:
+        print("❌ Exports have different layouts (or no ID column); nothing to diff.")
+        return 1
+    prev_df, curr_df, mapping = pair
+    changes = diff_exports(prev_df, curr_df, sorted({c for c in mapping.values() if c}))
+    print(changes["change"].value_counts().to_string())
+    cleaned = clean_change_set(changes, mapping, store_key, clean_rows(curr_df, mapping, store_key))
+    print(f"\n{(cleaned['Change'] == UPSERT).sum()} rows to upsert, "
+          f"{(cleaned['Change'] == RETIRE).sum()} to retire after store filters")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
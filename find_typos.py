@@ -1,16 +1,7 @@
-import os
-import mysql.connector
-from dotenv import load_dotenv
-
-load_dotenv()
+from product_utils import get_db_connection
 
 try:
-    conn = mysql.connector.connect(
-        host=os.getenv("DB_HOST") or "127.0.0.1",
-        user=os.getenv("DB_USER") or "root",
-        password=os.getenv("DB_PASSWORD") or "",
-        database=os.getenv("DB_NAME") or "miami_vape_shops"
-    )
+    conn = get_db_connection(read_only=True)
     cur = conn.cursor()
     
     cur.execute(
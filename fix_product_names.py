@@ -12,6 +12,7 @@ import mysql.connector
 from mysql.connector import errorcode
 from dotenv import load_dotenv
 from urllib.parse import urlparse, unquote
+from product_utils import name_key
 
 load_dotenv()
 
@@ -103,7 +104,10 @@ def fix_product_names():
                 
                 if new_name != old_name:
                     print(f"    ✏️  '{old_name}' → '{new_name}'")
-                    cur.execute("UPDATE products SET name = %s WHERE id = %s", (new_name, product_id))
+                    cur.execute(
+                        "UPDATE products SET name = %s, name_key = %s WHERE id = %s",
+                        (new_name, name_key(new_name), product_id)
+                    )
                     total_updates += 1
         
         conn.commit()
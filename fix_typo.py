@@ -23,7 +23,12 @@ try:
             print(f"  {pid}: {name}")
         
         # Fix them
-        cur.execute("UPDATE products SET name = REPLACE(name, 'RAZZ LTX 25K', 'RAZ LTX 25K') WHERE name LIKE '%RAZZ LTX 25K%'")
+        cur.execute("""
+            UPDATE products
+            SET name = REPLACE(name, 'RAZZ LTX 25K', 'RAZ LTX 25K'),
+                name_key = REPLACE(name_key, 'RAZZ LTX 25K', 'RAZ LTX 25K')
+            WHERE name LIKE '%RAZZ LTX 25K%'
+        """)
         conn.commit()
         print(f"\n✅ Fixed {cur.rowcount} typos!")
     else:
@@ -4,71 +4,48 @@ import os
 import sys
 import re
 from pathlib import Path
-from product_utils import get_db_connection
+from product_utils import get_db_connection, mark_write, name_key
+import catalog_mirror
+from image_manifest import ImageManifest
 
 
 IMAGES_DIR = os.path.join(os.path.dirname(__file__), "public", "images", "imagesForProducts")
 
 
+_manifest = None
+
+
+def get_manifest(refresh=False):
+    """The image manifest, loaded once per run (refresh=True rescans changed folders)."""
+    global _manifest
+    if _manifest is None:
+        _manifest = ImageManifest.load(IMAGES_DIR)
+    elif refresh:
+        _manifest.refresh()
+    return _manifest
+
+
 def get_available_folders():
     """Get list of image folders."""
     if not os.path.isdir(IMAGES_DIR):
         print(f"❌ Images directory not found: {IMAGES_DIR}")
         return []
     
-    folders = []
     try:
-        for item in os.listdir(IMAGES_DIR):
-            item_path = os.path.join(IMAGES_DIR, item)
-            if os.path.isdir(item_path):
-                image_count = count_images_in_folder(item)
-                if image_count > 0:
-                    folders.append((item, image_count))
+        return get_manifest().folders()
     except Exception as e:
         print(f"❌ Error reading images directory: {e}")
         return []
-    
-    return sorted(folders)
 
 
 def count_images_in_folder(folder_name):
     """Count image files in a folder."""
-    folder_path = os.path.join(IMAGES_DIR, folder_name)
-    if not os.path.isdir(folder_path):
-        return 0
-    
-    image_exts = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
-    count = 0
-    try:
-        for item in os.listdir(folder_path):
-            if os.path.isfile(os.path.join(folder_path, item)):
-                if os.path.splitext(item)[1].lower() in image_exts:
-                    count += 1
-    except Exception:
-        pass
-    
-    return count
+    return get_manifest().image_count(folder_name)
 
 
 def get_images_in_folder(folder_name):
     """Get list of image files (without extension) in a folder."""
-    folder_path = os.path.join(IMAGES_DIR, folder_name)
-    if not os.path.isdir(folder_path):
-        return []
-    
-    image_exts = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
-    images = []
-    try:
-        for item in os.listdir(folder_path):
-            filepath = os.path.join(folder_path, item)
-            if os.path.isfile(filepath):
-                if os.path.splitext(item)[1].lower() in image_exts:
-                    name_without_ext = os.path.splitext(item)[0]
-                    images.append(name_without_ext)
-    except Exception:
-        pass
-    
-    return sorted(images)
+    return sorted(image["stem"] for image in get_manifest().images(folder_name))
 
 
 def extract_flavor_from_filename(filename, folder_name):
@@ -122,15 +99,17 @@ def extract_flavor_from_filename(filename, folder_name):
 
 
 def search_products_by_name(base_product_name):
-    """Search for products in DB that start with base_product_name."""
-    conn = get_db_connection()
+    """Search for products (local catalog mirror, else DB) that start with base_product_name."""
+    if catalog_mirror.available():
+        return catalog_mirror.search_products_by_name(base_product_name)
+    conn = get_db_connection(read_only=True)
     cur = conn.cursor(dictionary=True)
     try:
-        search_pattern = base_product_name.upper().strip() + "%"
+        search_pattern = name_key(base_product_name).replace("%", "\\%") + "%"
         cur.execute("""
             SELECT id, name 
             FROM products 
-            WHERE UPPER(name) LIKE %s 
+            WHERE name_key LIKE %s 
             ORDER BY name
         """, (search_pattern,))
         products = cur.fetchall()
@@ -142,38 +121,34 @@ def search_products_by_name(base_product_name):
 
 def find_matching_product(base_product_name, flavor_name):
     """
-    Find product in DB matching base name + flavor.
+    Find product (local catalog mirror, else DB) matching base name + flavor.
     
     Example: base="OLIT HOOKALIT 60K", flavor="BAJA SPLASH"
     Searches for: "OLIT HOOKALIT 60K BAJA SPLASH"
     """
-    conn = get_db_connection()
+    base_upper = base_product_name.upper().strip()
+    flavor_upper = flavor_name.upper().strip()
+    
+    # If flavor matches or contains the base name, treat it as the base product (no flavor suffix)
+    base_normalized = base_upper.replace('/', '_').replace(' ', '')
+    flavor_normalized = flavor_upper.replace('/', '_').replace(' ', '')
+    if flavor_normalized == base_normalized or base_normalized in flavor_normalized or flavor_normalized in base_normalized:
+        full_name = base_upper
+    else:
+        full_name = f"{base_upper} {flavor_upper}"
+    
+    # name_key treats / and _ as equivalent (can't use / in filenames)
+    if catalog_mirror.available():
+        return catalog_mirror.get_product_by_key(full_name)
+    conn = get_db_connection(read_only=True)
     cur = conn.cursor(dictionary=True)
     try:
-        base_upper = base_product_name.upper().strip()
-        flavor_upper = flavor_name.upper().strip()
-        
-        # If flavor matches or contains the base name, treat it as the base product (no flavor suffix)
-        base_normalized = base_upper.replace('/', '_').replace(' ', '')
-        flavor_normalized = flavor_upper.replace('/', '_').replace(' ', '')
-        if flavor_normalized == base_normalized or base_normalized in flavor_normalized or flavor_normalized in base_normalized:
-            full_name = base_upper
-        else:
-            full_name = f"{base_upper} {flavor_upper}"
-        
-        # Also try matching with / and _ as equivalent (can't use / in filenames)
-        full_name_slash = full_name.replace('_', '/')
-        full_name_underscore = full_name.replace('/', '_')
-        
         cur.execute("""
             SELECT id, name 
             FROM products 
-            WHERE UPPER(name) = %s
-               OR UPPER(name) = %s
-               OR UPPER(name) = %s
-               OR UPPER(REPLACE(name, '/', '_')) = UPPER(REPLACE(%s, '/', '_'))
+            WHERE name_key = %s
             LIMIT 1
-        """, (full_name, full_name_slash, full_name_underscore, full_name))
+        """, (name_key(full_name),))
         
         product = cur.fetchone()
         return product
@@ -212,22 +187,30 @@ def display_folder_choice(folders):
             print("Invalid input. Please enter a number.")
 
 
+UPSERT_IMAGE_SQL = """
+    INSERT INTO product_images (product_id, image_url, image_alt)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        image_url = VALUES(image_url),
+        image_alt = VALUES(image_alt)
+"""
+
+
+def product_image_row(product_id, image_folder, image_filename):
+    """(product_id, image_url, image_alt) parameters for UPSERT_IMAGE_SQL."""
+    image_url = f"/images/imagesForProducts/{image_folder}/{image_filename}"
+    image_alt = f"{image_folder.replace('_', ' ')} • {image_filename.replace('_', ' ').replace('.jpg', '').replace('.jpeg', '').replace('.png', '')}"
+    return product_id, image_url, image_alt
+
+
 def insert_image_to_product(product_id, image_folder, image_filename):
     """Insert image mapping into product_images table."""
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        image_url = f"/images/imagesForProducts/{image_folder}/{image_filename}"
-        image_alt = f"{image_folder.replace('_', ' ')} • {image_filename.replace('_', ' ').replace('.jpg', '').replace('.jpeg', '').replace('.png', '')}"
-        
-        cur.execute("""
-            INSERT INTO product_images (product_id, image_url, image_alt)
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                image_url = VALUES(image_url),
-                image_alt = VALUES(image_alt)
-        """, (product_id, image_url, image_alt))
+        cur.execute(UPSERT_IMAGE_SQL, product_image_row(product_id, image_folder, image_filename))
         conn.commit()
+        mark_write()
         return True
     except Exception as e:
         print(f"   ⚠️  Error saving to DB: {e}")
@@ -308,11 +291,7 @@ def main():
             product = find_matching_product(base_product_name, flavor_name)
             
             if product:
-                image_filename = None
-                for item in os.listdir(os.path.join(IMAGES_DIR, folder_name)):
-                    if os.path.splitext(item)[0].upper() == image_name.upper():
-                        image_filename = item
-                        break
+                image_filename = get_manifest().filename_for(folder_name, image_name)
                 
                 result = confirm_product_match(base_product_name, flavor_name, product['name'], product['id'], folder_name, image_filename or f"{image_name}.jpg")
                 
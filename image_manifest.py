@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Cached manifest of the product images in public/images/imagesForProducts.
+
+The manifest (downloads/image_manifest.json) lists every folder's images
+with size, mtime and SHA-256. Loading it lists every folder and stats its
+files (no reads), so a file overwritten in place is noticed even though its
+folder's mtime did not change. Only new or modified files (size or mtime
+differs) are re-hashed.
+
+    manifest = ImageManifest.load()
+    manifest.folders()                          # [(folder, image count)]
+    manifest.images("RAZ 9K")                   # [{file, stem, size, mtime_ns, sha256}]
+    manifest.filename_for("RAZ 9K", "MIAMIMINT")  # "MIAMIMINT.jpg"
+
+Usage:
+    python3 image_manifest.py            # refresh and summarize
+    python3 image_manifest.py --dupes    # identical images under different names
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(BASE_DIR, "public", "images", "imagesForProducts")
+MANIFEST_PATH = os.path.join(BASE_DIR, "downloads", "image_manifest.json")
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_folder(folder_path, previous=None):
+    """{filename: {size, mtime_ns, sha256}} for a folder's images, reusing unchanged hashes."""
+    previous = previous or {}
+    images = {}
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTS:
+                continue
+            stat = entry.stat()
+            old = previous.get(entry.name)
+            if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+                images[entry.name] = old
+            else:
+                images[entry.name] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "sha256": file_sha256(entry.path),
+                }
+    return images
+
+
+class ImageManifest:
+    def __init__(self, images_dir=IMAGES_DIR, path=MANIFEST_PATH):
+        self.images_dir = images_dir
+        self.path = path
+        self.data = {"version": MANIFEST_VERSION, "root": images_dir, "folders": {}}
+        self.rescanned = []
+        self._stems = {}   # folder -> {STEM: filename}, built on first lookup
+
+    @classmethod
+    def load(cls, images_dir=IMAGES_DIR, path=MANIFEST_PATH):
+        """Load the saved manifest and bring it up to date with the image folders."""
+        manifest = cls(images_dir, path)
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("version") == MANIFEST_VERSION and saved.get("root") == images_dir:
+                    manifest.data = saved
+            except (OSError, ValueError):
+                pass   # rebuilt below
+        manifest.refresh()
+        return manifest
+
+    def refresh(self):
+        """
+        Re-stat every folder's files, re-hashing new or modified ones; drop
+        folders that are gone. Returns the names of folders whose images changed.
+        """
+        old_folders = self.data["folders"]
+        folders = {}
+        self.rescanned = []
+        if os.path.isdir(self.images_dir):
+            with os.scandir(self.images_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    old = old_folders.get(entry.name)
+                    images = scan_folder(entry.path, old["images"] if old else None)
+                    folders[entry.name] = {"mtime_ns": entry.stat().st_mtime_ns, "images": images}
+                    if not old or old["images"] != images:
+                        self.rescanned.append(entry.name)
+        changed = self.rescanned or set(old_folders) != set(folders)
+        self.data["folders"] = folders
+        self._stems = {k: v for k, v in self._stems.items() if k in folders and k not in self.rescanned}
+        if changed:
+            self.save()
+        return self.rescanned
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def folders(self):
+        """[(folder name, image count)] for folders with at least one image, sorted."""
+        return sorted((name, len(info["images"])) for name, info in self.data["folders"].items() if info["images"])
+
+    def image_count(self, folder):
+        return len(self.data["folders"].get(folder, {}).get("images", {}))
+
+    def images(self, folder):
+        """A folder's images sorted by file name: [{file, stem, size, mtime_ns, sha256}]."""
+        images = self.data["folders"].get(folder, {}).get("images", {})
+        return [
+            dict(info, file=name, stem=os.path.splitext(name)[0])
+            for name, info in sorted(images.items())
+        ]
+
+    def filename_for(self, folder, stem):
+        """File name (with extension) of the image whose name without extension is stem, any case."""
+        stems = self._stems.get(folder)
+        if stems is None:
+            stems = {}
+            for name in sorted(self.data["folders"].get(folder, {}).get("images", {}), reverse=True):
+                stems[os.path.splitext(name)[0].upper()] = name   # first name wins on clashes
+            self._stems[folder] = stems
+        return stems.get(stem.upper())
+
+    def duplicates(self):
+        """{sha256: [folder/file, ...]} for content that appears more than once."""
+        by_hash = {}
+        for folder, info in self.data["folders"].items():
+            for name, image in info["images"].items():
+                by_hash.setdefault(image["sha256"], []).append(f"{folder}/{name}")
+        return {h: paths for h, paths in by_hash.items() if len(paths) > 1}
+
+
+def main(argv):
+    started = time.perf_counter()
+    manifest = ImageManifest.load()
+    elapsed = (time.perf_counter() - started) * 1000
+    folders = manifest.folders()
+    print(f"🖼️  {sum(c for _, c in folders)} images in {len(folders)} folders "
+          f"({len(manifest.rescanned)} folders changed, {elapsed:.1f} ms) → {manifest.path}")
+    if "--dupes" in argv:
+        for paths in manifest.duplicates().values():
+            print("  🔁 " + "  ==  ".join(paths))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Batch image → product linker (non-interactive image_manager).
+
+It loads the whole catalog once (product_utils.Catalog, one streamed
+query) plus the current product_images, takes each folder's candidates by
+name prefix from the catalog, extracts each image's flavor with
+image_manager's filename rules, and scores all image/product pairs at once
+with rapidfuzz.process.cdist. Clear matches from every folder are upserted
+into product_images with one executemany in one transaction. Only the ambiguous ones go to
+downloads/image_match_review.csv:
+
+  - best score below --threshold
+  - runner-up within --margin of the best
+  - two images competing for the same product
+  - the product already has a different image (unless --replace)
+
+Each folder's base product name comes from image_folder_mapping.json (the
+same folder -> product mapping index.js uses), falling back to the folder
+name; --base overrides it for a single folder.
+
+Usage:
+    python3 image_matcher.py "RAZ 9K"                      # base name = mapping or folder name
+    python3 image_matcher.py FUMEPRO30K --base "FUME PRO 30K"
+    python3 image_matcher.py --all [--dry-run] [--replace] [--threshold 90] [--margin 5]
+"""
+import os
+import re
+import sys
+import csv
+import json
+import time
+import argparse
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from product_utils import Catalog, get_db_connection, mark_write, name_key
+from image_manager import IMAGES_DIR, UPSERT_IMAGE_SQL, extract_flavor_from_filename, get_manifest, product_image_row
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REVIEW_PATH = os.path.join(BASE_DIR, "downloads", "image_match_review.csv")
+FOLDER_MAPPING_PATH = os.path.join(BASE_DIR, "image_folder_mapping.json")
+
+DEFAULT_THRESHOLD = 90
+DEFAULT_MARGIN = 5
+REVIEW_FIELDS = ["folder", "image", "flavor", "reason", "product_id", "product", "score", "runner_up", "runner_up_score"]
+
+
+def match_text(value):
+    """Upper-case words only ("Blue Razz/Ice" -> "BLUE RAZZ ICE")."""
+    return " ".join(re.sub(r"[^A-Z0-9]+", " ", name_key(value)).split())
+
+
+def load_folder_mapping(path=FOLDER_MAPPING_PATH):
+    """{image folder: base product name} from image_folder_mapping.json ({} if missing)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"⚠️  {path} not found or invalid; using folder names as base names")
+        return {}
+
+
+def load_product_images():
+    """{product_id: image_url} for every product that has an image."""
+    conn = get_db_connection(read_only=True)
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT product_id, image_url FROM product_images")
+        return dict(cur.fetchall())
+    finally:
+        cur.close()
+        conn.close()
+
+
+def product_flavor(product, base):
+    """The part of the product name after the base (the base itself for the plain product)."""
+    flavor = match_text(product.name_key)
+    if flavor.startswith(base):
+        flavor = flavor[len(base):].strip()
+    return flavor or base
+
+
+def image_flavor(stem, folder, base):
+    """image_manager's flavor for a file, folded to the base when it names the base product."""
+    flavor = match_text(extract_flavor_from_filename(stem, folder))
+    squashed, base_squashed = flavor.replace(" ", ""), base.replace(" ", "")
+    if not squashed or squashed == base_squashed or base_squashed in squashed or squashed in base_squashed:
+        return base
+    return flavor
+
+
+def score_matrix(image_flavors, product_flavors):
+    """
+    images x products similarity (0-100): the better of token-set/sort on
+    the words and a plain ratio with spaces removed, so run-together file
+    names ("BLUEBERRYWATERMELON") still match spaced product names.
+    """
+    token_set = process.cdist(image_flavors, product_flavors, scorer=fuzz.token_set_ratio, workers=-1)
+    token_sort = process.cdist(image_flavors, product_flavors, scorer=fuzz.token_sort_ratio, workers=-1)
+    squashed = process.cdist([f.replace(" ", "") for f in image_flavors],
+                             [f.replace(" ", "") for f in product_flavors],
+                             scorer=fuzz.ratio, workers=-1)
+    return np.maximum((token_set + token_sort) / 2, squashed)
+
+
+def match_folder(folder, catalog, current_images, base=None,
+                 threshold=DEFAULT_THRESHOLD, margin=DEFAULT_MARGIN, replace=False):
+    """
+    Match a folder's images to products.
+
+    Args:
+        catalog: Catalog.from_db() (candidates are the products starting with base)
+        current_images: load_product_images()
+
+    Returns:
+        (rows to upsert as (product_id, image_url, image_alt), review dictionaries, unchanged count)
+    """
+    base_name = base or folder
+    base = match_text(base_name)
+    images = get_manifest().images(folder)
+    products = catalog.with_prefix(base_name)
+    if not images:
+        return [], [], 0
+    if not products:
+        review = [{"folder": folder, "image": image["file"], "flavor": image_flavor(image["stem"], folder, base),
+                   "reason": f"no products start with '{base_name}'"} for image in images]
+        return [], review, 0
+
+    flavors = [image_flavor(image["stem"], folder, base) for image in images]
+    scores = score_matrix(flavors, [product_flavor(p, base) for p in products])
+
+    order = np.argsort(-scores, axis=1)
+    best = order[:, 0]
+    best_scores = scores[np.arange(len(images)), best]
+    if len(products) > 1:
+        runner_up = order[:, 1]
+        runner_scores = scores[np.arange(len(images)), runner_up]
+    else:
+        runner_up = np.full(len(images), -1)
+        runner_scores = np.zeros(len(images))
+
+    def review_entry(i, reason):
+        entry = {
+            "folder": folder, "image": images[i]["file"], "flavor": flavors[i], "reason": reason,
+            "product_id": products[best[i]].id, "product": products[best[i]].name,
+            "score": round(float(best_scores[i]), 1),
+        }
+        if runner_up[i] >= 0:
+            entry["runner_up"] = products[runner_up[i]].name
+            entry["runner_up_score"] = round(float(runner_scores[i]), 1)
+        return entry
+
+    review = []
+    claims = {}   # product index -> image indexes that picked it
+    for i in range(len(images)):
+        if best_scores[i] < threshold:
+            review.append(review_entry(i, "low score"))
+        elif best_scores[i] - runner_scores[i] < margin:
+            review.append(review_entry(i, "close runner-up"))
+        else:
+            claims.setdefault(int(best[i]), []).append(i)
+
+    rows = []
+    unchanged = 0
+    for j, claimants in claims.items():
+        claimants.sort(key=lambda i: -best_scores[i])
+        winner = claimants[0]
+        if len(claimants) > 1 and best_scores[winner] - best_scores[claimants[1]] < margin:
+            for i in claimants:
+                review.append(review_entry(i, "several images match this product"))
+            continue
+        for i in claimants[1:]:
+            review.append(review_entry(i, f"product taken by {images[winner]['file']}"))
+
+        row = product_image_row(products[j].id, folder, images[winner]["file"])
+        current = current_images.get(products[j].id)
+        if current == row[1]:
+            unchanged += 1
+        elif current and not replace:
+            review.append(review_entry(winner, f"product already has {current}"))
+        else:
+            rows.append(row)
+    return rows, review, unchanged
+
+
+def write_links(rows):
+    """Upsert product_images rows in one executemany; returns rows written."""
+    if not rows:
+        return 0
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.executemany(UPSERT_IMAGE_SQL, rows)
+        conn.commit()
+        mark_write()
+        return len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def write_review(review, path=REVIEW_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REVIEW_FIELDS)
+        writer.writeheader()
+        writer.writerows(review)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Link a folder's images to products without prompts.")
+    parser.add_argument("folder", nargs="?", help="image folder under imagesForProducts")
+    parser.add_argument("--base", help="base product name (default: image_folder_mapping.json, else the folder name)")
+    parser.add_argument("--all", action="store_true", help="every folder, each with its mapped or folder name as base")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="minimum score to link")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="lead needed over the runner-up")
+    parser.add_argument("--replace", action="store_true", help="overwrite products that already have another image")
+    parser.add_argument("--dry-run", action="store_true", help="score and report, write nothing to the DB")
+    args = parser.parse_args(argv)
+    if args.all and args.base:
+        parser.error("--base applies to a single folder; it can't be combined with --all")
+
+    manifest = get_manifest()
+    if args.all:
+        folders = [name for name, _ in manifest.folders()]
+    elif args.folder and manifest.image_count(args.folder):
+        folders = [args.folder]
+    else:
+        print(f"❌ No images found in {os.path.join(IMAGES_DIR, args.folder or '')}")
+        return 1
+
+    started = time.perf_counter()
+    catalog = Catalog.from_db()
+    current_images = load_product_images()
+    mapping = load_folder_mapping()
+    all_rows = []
+    all_review = []
+    for folder in folders:
+        base = args.base or mapping.get(folder, folder)
+        rows, review, unchanged = match_folder(folder, catalog, current_images, base,
+                                               args.threshold, args.margin, args.replace)
+        all_rows.extend(rows)
+        all_review.extend(review)
+        print(f"  🖼️  {folder:36} {len(rows):4} to link, {unchanged:4} unchanged, {len(review):4} for review")
+
+    # Every folder's links in one executemany and one transaction
+    linked = len(all_rows) if args.dry_run else write_links(all_rows)
+    write_review(all_review)
+    print(f"✅ {linked} images {'would be linked' if args.dry_run else 'linked'} in "
+          f"{time.perf_counter() - started:.1f}s; {len(all_review)} for review → {REVIEW_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -283,20 +283,26 @@ const SHOP_ALIAS_MAP = new Map([
 function buildSnapshotAggSql(tables = SNAPSHOT_TABLES) {
   const list = Array.isArray(tables) && tables.length ? tables : SNAPSHOT_TABLES;
   const rowsSql = list
-    .map((table) => `SELECT name, quantity, is_active FROM \`${table}\``)
+    .map((table) => `SELECT name_key, quantity, is_active FROM \`${table}\``)
     .join('\n    UNION ALL\n    ');
   return `
     SELECT
-      UPPER(name) AS name_key,
+      name_key,
       SUM(CASE WHEN COALESCE(is_active, 1) = 1 THEN quantity ELSE 0 END) AS total_qty,
       MAX(CASE WHEN COALESCE(is_active, 1) = 1 THEN 1 ELSE 0 END) AS any_active
     FROM (
       ${rowsSql}
     ) snapshot_rows
-    GROUP BY UPPER(name)
+    GROUP BY name_key
   `;
 }
 
+// Same folding as product_utils.name_key(): the indexed name_key columns
+// on products, categories and the snapshot tables hold this value.
+function nameKey(value = '') {
+  return String(value || '').toUpperCase().replace(/_/g, '/').split(/\s+/).filter(Boolean).join(' ');
+}
+
 function normalizeShop(value = '') {
   const key = String(value || '').trim().toLowerCase();
   return SHOP_ALIAS_MAP.get(key) || DEFAULT_SHOP;
@@ -2545,7 +2551,9 @@ async function ensureSnapshotTables() {
           name VARCHAR(200) NOT NULL,
           upc VARCHAR(32) NOT NULL,
           quantity INT NOT NULL DEFAULT 0,
-          is_active TINYINT(1) NOT NULL DEFAULT 1
+          is_active TINYINT(1) NOT NULL DEFAULT 1,
+          name_key VARCHAR(200) NOT NULL DEFAULT '',
+          KEY idx_name_key (name_key)
         )
       `);
       const [cols] = await queryWithRetry(`SHOW COLUMNS FROM \`${table}\` LIKE 'is_active'`);
@@ -2555,6 +2563,21 @@ async function ensureSnapshotTables() {
           ADD COLUMN is_active TINYINT(1) NOT NULL DEFAULT 1 AFTER quantity
         `);
       }
+      const [keyCols] = await queryWithRetry(`SHOW COLUMNS FROM \`${table}\` LIKE 'name_key'`);
+      if (!keyCols.length) {
+        await queryWithRetry(`
+          ALTER TABLE \`${table}\`
+          ADD COLUMN name_key VARCHAR(200) NOT NULL DEFAULT '',
+          ADD KEY idx_name_key (name_key)
+        `);
+      }
+      // Rows written before the column existed: same key clean_data.py writes
+      const [unkeyed] = await queryWithRetry(
+        `SELECT id, name FROM \`${table}\` WHERE name_key = '' AND name <> ''`
+      );
+      for (const row of unkeyed) {
+        await queryWithRetry(`UPDATE \`${table}\` SET name_key = ? WHERE id = ?`, [nameKey(row.name), row.id]);
+      }
     }
   } catch (err) {
     console.error('Error ensuring snapshot tables:', err.message);
@@ -3130,7 +3153,7 @@ app.post('/api/uber/delivery-options', async (req, res) => {
             `SELECT p.id as product_id, i.quantity
              FROM \`${table}\` i
              JOIN products p ON (
-               UPPER(p.name) = UPPER(i.name)
+               p.name_key = i.name_key
                OR (UPPER(p.name) LIKE CONCAT('%', UPPER(i.name), '%'))
                OR (UPPER(i.name) LIKE CONCAT('%', UPPER(p.name), '%'))
              )
@@ -3571,15 +3594,15 @@ app.post('/api/authorize/charge', async (req, res) => {
           const [rows] = await queryWithRetry(
             `SELECT i.quantity
              FROM ${inventoryTable} i
-             JOIN products p ON UPPER(p.name) = UPPER(i.name)
+             JOIN products p ON p.name_key = i.name_key
              WHERE p.id = ? AND i.is_active = 1`,
             [productId]
           );
           availableQty = Number(rows[0]?.quantity || 0);
         } else if (fallbackName) {
           const [rows] = await queryWithRetry(
-            `SELECT quantity FROM ${inventoryTable} WHERE name = ? AND is_active = 1`,
-            [fallbackName]
+            `SELECT quantity FROM ${inventoryTable} WHERE name_key = ? AND is_active = 1`,
+            [nameKey(fallbackName)]
           );
           availableQty = Number(rows[0]?.quantity || 0);
         }
@@ -3850,7 +3873,7 @@ app.post('/api/authorize/charge', async (req, res) => {
               // 1. Update legacy snapshot table (used for frontend listing)
               await conn.query(
                 `UPDATE ${inventoryTable} i
-                 JOIN products p ON UPPER(p.name) = UPPER(i.name)
+                 JOIN products p ON p.name_key = i.name_key
                  SET i.quantity = GREATEST(i.quantity - ?, 0)
                  WHERE p.id = ? AND i.is_active = 1`,
                 [qty, productId]
@@ -3858,7 +3881,8 @@ app.post('/api/authorize/charge', async (req, res) => {
               // 2. Update central product_inventory table (used for real-time checks)
               await conn.query(
                 `UPDATE product_inventory
-                 SET quantity_on_hand = GREATEST(CAST(quantity_on_hand AS SIGNED) - ?, 0)
+                 SET quantity_on_hand = GREATEST(CAST(quantity_on_hand AS SIGNED) - ?, 0),
+                     last_synced_at = NOW()
                  WHERE product_id = ? AND store_id = ?`,
                 [qty, productId, numericStoreId]
               );
@@ -3867,16 +3891,17 @@ app.post('/api/authorize/charge', async (req, res) => {
               await conn.query(
                 `UPDATE ${inventoryTable}
                  SET quantity = GREATEST(quantity - ?, 0)
-                 WHERE name = ? AND is_active = 1`,
-                [qty, fallbackName]
+                 WHERE name_key = ? AND is_active = 1`,
+                [qty, nameKey(fallbackName)]
               );
               // 2. Update central product_inventory table
               await conn.query(
                 `UPDATE product_inventory pi
                  JOIN products p ON p.id = pi.product_id
-                 SET pi.quantity_on_hand = GREATEST(CAST(pi.quantity_on_hand AS SIGNED) - ?, 0)
-                 WHERE UPPER(p.name) = UPPER(?) AND pi.store_id = ?`,
-                [qty, fallbackName, numericStoreId]
+                 SET pi.quantity_on_hand = GREATEST(CAST(pi.quantity_on_hand AS SIGNED) - ?, 0),
+                     pi.last_synced_at = NOW()
+                 WHERE p.name_key = ? AND pi.store_id = ?`,
+                [qty, nameKey(fallbackName), numericStoreId]
               );
             }
           }
@@ -4030,7 +4055,7 @@ app.get('/products', async (req, res) => {
     const inventoryJoinSql = `
         INNER JOIN (
           ${snapshotAggSql}
-        ) snap ON snap.name_key = UPPER(p.name) AND (snap.any_active = 1 OR ${SHOW_ALL_LOCAL ? '1=1' : '0=1'})
+        ) snap ON snap.name_key = p.name_key AND (snap.any_active = 1 OR ${SHOW_ALL_LOCAL ? '1=1' : '0=1'})
         LEFT JOIN product_images pi ON pi.product_id = p.id
       `;
 
@@ -0,0 +1,95 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Reason codes written to the *_rejects.csv file
+EMPTY_NAME = "EMPTY_NAME"
+UNKNOWN_CATEGORY = "UNKNOWN_CATEGORY"
+BAD_UPC_CHECK_DIGIT = "BAD_UPC_CHECK_DIGIT"
+NEGATIVE_QTY = "NEGATIVE_QTY"
+ABSURD_QTY = "ABSURD_QTY"
+PRICE_OUTLIER = "PRICE_OUTLIER"
+
+MAX_QUANTITY = int(os.getenv("VALIDATION_MAX_QTY", 5000))
+PRICE_OUTLIER_RATIO = float(os.getenv("VALIDATION_PRICE_RATIO", 5.0))
+MAX_PRICE = float(os.getenv("VALIDATION_MAX_PRICE", 10000))
+
+# UPC-A, EAN-13 and GTIN-14 carry a standard mod-10 check digit. 8-digit codes
+# are skipped because CigarsPOS mixes EAN-8 and zero-suppressed UPC-E there, and
+# short store codes (PLUs) have no check digit at all.
+GTIN_LENGTHS = (12, 13, 14)
+_GTIN_WEIGHTS = np.array([3, 1] * 6 + [3])
+
+
+def upc_check_digit_ok(upcs):
+    """Vectorized GTIN check-digit test; True for codes without a check digit."""
+    upcs = upcs.fillna("").astype(str)
+    checked = upcs.str.len().isin(GTIN_LENGTHS) & upcs.str.fullmatch(r"[0-9]+").astype(bool)
+    ok = pd.Series(True, index=upcs.index)
+    if not checked.any():
+        return ok
+    padded = upcs[checked].str.zfill(14)
+    digits = np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8).reshape(-1, 14) - ord("0")
+    expected = (10 - (digits[:, :13] @ _GTIN_WEIGHTS) % 10) % 10
+    ok[checked] = expected == digits[:, 13]
+    return ok
+
+
+def validate_inventory(df, known_categories, price_history=None,
+                       max_quantity=MAX_QUANTITY, price_ratio=PRICE_OUTLIER_RATIO, max_price=MAX_PRICE):
+    """
+    Split a cleaned inventory frame into rows safe to load and rejects.
+
+    Args:
+        df: Frame with Name, UPC, QtyOnHand, UnitPrice, Category (names already normalized)
+        known_categories: Upper-cased category names the loader can place
+        price_history: Optional {product name: last loaded unit price} for this store
+        max_quantity: Quantities above this are treated as keying errors
+        price_ratio: Prices more than this factor above/below history are outliers
+        max_price: Prices above this are outliers even without history
+
+    Returns:
+        (accepted, rejects) - rejects carries a "reason" column with ;-joined codes
+    """
+    names = df["Name"].fillna("").astype(str).str.strip()
+    categories = df["Category"].fillna("").astype(str).str.strip().str.upper()
+    qty = pd.to_numeric(df["QtyOnHand"], errors="coerce").fillna(0)
+    price = pd.to_numeric(df["UnitPrice"].astype(float), errors="coerce")
+
+    checks = {
+        EMPTY_NAME: names.str.len() == 0,
+        UNKNOWN_CATEGORY: ~categories.isin(known_categories),
+        BAD_UPC_CHECK_DIGIT: ~upc_check_digit_ok(df["UPC"]),
+        NEGATIVE_QTY: qty < 0,
+        ABSURD_QTY: qty > max_quantity,
+        PRICE_OUTLIER: price.abs() > max_price,
+    }
+    if price_history:
+        ref = names.map(price_history).astype(float)
+        has_ref = ref.notna() & (ref > 0) & price.notna() & (price > 0)
+        checks[PRICE_OUTLIER] |= has_ref & ((price > ref * price_ratio) | (price < ref / price_ratio))
+
+    failed = pd.DataFrame(checks, index=df.index)
+    bad = failed.any(axis=1)
+    rejects = df[bad].copy()
+    if len(rejects):
+        codes = np.array(list(failed.columns), dtype=object)
+        rejects["reason"] = [";".join(codes[row]) for row in failed[bad].to_numpy()]
+    else:
+        rejects["reason"] = pd.Series(dtype=str)
+    return df[~bad].copy(), rejects
+
+
+def rejects_path_for(source_path):
+    return os.path.splitext(source_path)[0] + "_rejects.csv"
+
+
+def write_rejects(rejects, source_path):
+    """Write rejected rows next to the loader input. Returns the path, or None if there were none."""
+    path = rejects_path_for(source_path)
+    if rejects.empty:
+        if os.path.exists(path):
+            os.remove(path)  # don't leave a stale file from an earlier run
+        return None
+    rejects.to_csv(path, index=False)
+    return path
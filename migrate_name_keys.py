@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Add the indexed name_key column to products, categories and the store
+snapshot tables, and backfill it with product_utils.name_key().
+
+Lookups by name (product_utils, image_manager, index.js) compare name_key
+instead of UPPER(name), so they can use the index. products and categories
+get a UNIQUE index; names that fold to the same key are listed and must be
+merged first (re-run the script afterwards). Safe to run more than once.
+
+Usage:
+    python3 migrate_name_keys.py
+"""
+import sys
+import mysql.connector
+
+from product_utils import get_db_connection, name_key, STORES
+from clean_data import ensure_store_snapshot_table
+
+UNIQUE_TABLES = ("products", "categories")
+BATCH_SIZE = 500
+
+
+def ensure_name_key_column(cur, table):
+    cur.execute(f"SHOW COLUMNS FROM `{table}` LIKE 'name_key'")
+    if not cur.fetchone():
+        print(f"  ➕ Adding {table}.name_key")
+        cur.execute(f"ALTER TABLE `{table}` ADD COLUMN name_key VARCHAR(200) NULL AFTER name")
+
+
+def backfill(cur, table):
+    """Set name_key where it differs from the folded name; returns {key: [(id, name)]}."""
+    cur.execute(f"SELECT id, name, name_key FROM `{table}`")
+    by_key = {}
+    updates = []
+    for row_id, name, current in cur.fetchall():
+        key = name_key(name)
+        by_key.setdefault(key, []).append((row_id, name))
+        if current != key:
+            updates.append((key, row_id))
+    for start in range(0, len(updates), BATCH_SIZE):
+        cur.executemany(f"UPDATE `{table}` SET name_key = %s WHERE id = %s", updates[start:start + BATCH_SIZE])
+    print(f"  🔑 {table}: {len(updates)} of {sum(len(v) for v in by_key.values())} keys updated")
+    return by_key
+
+
+def ensure_unique_index(cur, table, by_key):
+    index_name = f"uniq_{table}_name_key"
+    cur.execute(f"SHOW INDEX FROM `{table}` WHERE Key_name = %s", (index_name,))
+    if cur.fetchall():
+        return True
+    collisions = {k: rows for k, rows in by_key.items() if len(rows) > 1}
+    if collisions:
+        print(f"  ⚠️  {table}: {len(collisions)} names collide after folding; unique index not added:")
+        for key, rows in sorted(collisions.items()):
+            print(f"     {key}: " + ", ".join(f"#{row_id} '{name}'" for row_id, name in rows))
+        return False
+    cur.execute(f"ALTER TABLE `{table}` ADD UNIQUE KEY `{index_name}` (name_key)")
+    print(f"  ✅ {table}: unique index {index_name} added")
+    return True
+
+
+def migrate():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    ok = True
+    try:
+        for table in UNIQUE_TABLES:
+            print(f"📦 {table}")
+            ensure_name_key_column(cur, table)
+            by_key = backfill(cur, table)
+            conn.commit()
+            ok = ensure_unique_index(cur, table, by_key) and ok
+        for store in STORES.values():
+            table = store["snapshot_table"]
+            print(f"📸 {table}")
+            ensure_store_snapshot_table(cur, table)   # adds name_key + idx_name_key if missing
+            backfill(cur, table)
+            conn.commit()
+    except mysql.connector.Error as e:
+        conn.rollback()
+        print(f"❌ MySQL Error: {e}")
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if migrate() else 1)
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the CigarsPOS / BottlePOS admin, for testing and timing
+the exporters without touching the real POS.
+
+Every store lives under /<store>/ and serves:
+  - the JSON login + CSV export endpoints from pos_endpoints.json (HTTP exporter)
+  - the pages the Chrome exporter drives: jQuery UI style "Ok" dialogs, the
+    login form (in an iframe for CigarsPOS), the register/location selects,
+    the admin tab with the Items → Inventory sidebar and the Export CSV button
+
+The export streams downloads/<store>/inventory_<store>.csv when it exists
+(the recorded export), otherwise a small built-in sample.
+
+Delays (milliseconds) make it behave more like the real thing:
+  MOCK_POS_DELAY_MS         added to every response
+  MOCK_POS_UI_DELAY_MS      before each dialog / page section appears
+  MOCK_POS_EXPORT_DELAY_MS  before the export starts streaming
+
+Usage:
+    python3 mock_pos_server.py [port]
+    POS_BASE_URL=http://127.0.0.1:8765/{store} python3 pos_http_export.py mkt /tmp/mkt.csv
+"""
+import os
+import sys
+import json
+import time
+import secrets
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from product_utils import STORES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS_PATH = os.path.join(BASE_DIR, "pos_endpoints.json")
+DEFAULT_PORT = 8765
+
+SAMPLE_CSV = (
+    "ID,Name,Stock Code,UPC,Qty On Hand,Unit Price,Category\r\n"
+    "1,RAZ LTX 25K BLUE RAZZ ICE,RAZ25-01,810084490011,12,24.99,NICOTINE VAPES\r\n"
+    "2,GEEK BAR PULSE X 25K SOUR STRAWS,GBX-07,850016972088,7,22.99,NICOTINE VAPES\r\n"
+    "3,RAW CLASSIC KING SIZE SLIM,RAW-KS,716165177395,40,2.99,ROLLING PAPERS\r\n"
+)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pages (only the parts the exporters touch)
+# ─────────────────────────────────────────────────────────────────────────────
+PAGE_HEAD = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>%(title)s</title>
+<style>
+  .ui-dialog{position:fixed;top:80px;left:30%%;z-index:20;background:#fff;border:1px solid #999;padding:12px}
+  .ui-widget-overlay{position:fixed;inset:0;z-index:10;background:rgba(0,0,0,.3)}
+  .hidden{display:none}
+  #menuparentitems .submenu{display:none}
+  #menuparentitems.open .submenu{display:block}
+</style>
+<script>
+  var UI_DELAY = %(ui_delay)d;
+  function later(fn) { setTimeout(fn, UI_DELAY); }
+  function okDialog(text, done) {
+    var overlay = document.createElement('div');
+    overlay.className = 'ui-widget-overlay ui-front';
+    var dlg = document.createElement('div');
+    dlg.className = 'ui-dialog';
+    dlg.innerHTML = '<p>' + text + '</p><div class="ui-dialog-buttonset">' +
+      '<button type="button" title="Ok"><i class="icon-ok"></i> Ok</button></div>';
+    dlg.querySelector('button').onclick = function () {
+      dlg.style.display = 'none'; overlay.remove(); if (done) done();
+    };
+    document.body.appendChild(overlay); document.body.appendChild(dlg);
+  }
+  function postLogin(path, form, done) {
+    fetch(path, {method: 'POST', credentials: 'same-origin',
+                 headers: {'Content-Type': 'application/x-www-form-urlencoded'},
+                 body: new URLSearchParams(form).toString()})
+      .then(function (r) { return r.json(); })
+      .then(function (b) { if (b.success) done(); else okDialog(b.message); });
+  }
+</script></head><body>
+"""
+
+CIGARSPOS_LOGIN_PAGE = """
+<iframe id="loginframe" src="login-frame.html" style="width:400px;height:220px;border:0"></iframe>
+<div id="devicesetup" class="hidden">
+  <h3>Initial Device Setup</h3>
+  <select id="posdevices"></select>
+  <select id="poslocations"></select>
+  <button type="button" id="registerbtn">Register</button>
+</div>
+<button type="button" id="admin_btn" class="hidden">Admin</button>
+<script>
+  later(function () { okDialog('Welcome to CigarsPOS'); });
+  window.addEventListener('message', function (e) {
+    if (e.data !== 'logged-in') return;
+    document.getElementById('loginframe').style.display = 'none';
+    later(function () {
+      document.getElementById('devicesetup').classList.remove('hidden');
+      later(function () {
+        document.getElementById('posdevices').innerHTML =
+          '<option>Select...</option><option>Register1 (Inventory)</option>';
+        document.getElementById('poslocations').innerHTML =
+          '<option>Select...</option><option>Front</option><option>Inventory</option>';
+      });
+    });
+  });
+  document.getElementById('registerbtn').onclick = function () {
+    document.getElementById('devicesetup').classList.add('hidden');
+    later(function () {
+      okDialog('Electron print support is not available in this browser.', function () {
+        document.getElementById('admin_btn').classList.remove('hidden');
+      });
+    });
+  };
+  document.getElementById('admin_btn').onclick = function () { window.open('admin/', '_blank'); };
+</script>
+"""
+
+CIGARSPOS_LOGIN_FRAME = """
+<form onsubmit="return false">
+  <input id="username" name="username" placeholder="Username*">
+  <input id="password" name="password" type="password" placeholder="Password*">
+  <button type="button" id="loginbutton" title="Login">Login</button>
+</form>
+<script>
+  document.getElementById('loginbutton').onclick = function () {
+    postLogin('%(login_path)s', {
+      '%(username_field)s': document.getElementById('username').value,
+      '%(password_field)s': document.getElementById('password').value
+    }, function () { parent.postMessage('logged-in', '*'); });
+  };
+</script>
+"""
+
+BOTTLEPOS_LOGIN_PAGE = """
+<form onsubmit="return false">
+  <input id="loguser" name="loguser">
+  <input id="logpass" name="logpass" type="password">
+  <button type="button" id="loginbutton">Login</button>
+</form>
+<script>
+  later(function () { okDialog('Please log in'); });
+  document.getElementById('loginbutton').onclick = function () {
+    postLogin('%(login_path)s', {
+      '%(username_field)s': document.getElementById('loguser').value,
+      '%(password_field)s': document.getElementById('logpass').value
+    }, function () { location.reload(); });
+  };
+</script>
+"""
+
+ADMIN_PAGE = """
+<div id="sidebar"><ul>
+  <li id="menuparentitems"><a class="dropdown-toggle" href="javascript:void(0)">Items</a>
+    <ul class="submenu"><li id="menuitems"><a href="#stock"><span>Inventory</span></a></li></ul>
+  </li>
+</ul></div>
+<div id="content"></div>
+<script>
+  document.querySelector('#menuparentitems .dropdown-toggle').onclick = function () {
+    document.getElementById('menuparentitems').classList.toggle('open');
+  };
+  document.querySelector('#menuitems a').onclick = function () {
+    later(function () {
+      document.getElementById('content').innerHTML =
+        '<div id="menustock"><button type="button" id="exportbtn">Export CSV</button></div>';
+      document.getElementById('exportbtn').onclick = function () {
+        location.href = '%(export_path)s';
+      };
+    });
+  };
+</script>
+"""
+
+
+def load_routes(path=ENDPOINTS_PATH):
+    """{store_key: {"pos", "login", "export", "username_field", "password_field"}}"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    routes = {}
+    for key, store in STORES.items():
+        pos = raw["pos"][store["pos"]]
+        routes[key] = {
+            "pos": store["pos"],
+            "login": pos["login"]["path"],
+            "export": pos["export"]["path"],
+            "username_field": pos["login"]["username_field"],
+            "password_field": pos["login"]["password_field"],
+        }
+    return routes
+
+
+def export_csv_for(store_key):
+    store = STORES[store_key]
+    path = os.path.join(BASE_DIR, store["download_dir"], store["raw_name"])
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return SAMPLE_CSV.encode("utf-8")
+
+
+def _delay_ms(name):
+    return int(os.getenv(name, 0))
+
+
+class MockPOSHandler(BaseHTTPRequestHandler):
+    routes = load_routes()
+    sessions = set()
+    username = os.getenv("POS_USERNAME", "sandro")
+    password = os.getenv("POS_PASSWORD", "12301230")
+
+    def log_message(self, fmt, *args):
+        if os.getenv("MOCK_POS_VERBOSE") == "1":
+            super().log_message(fmt, *args)
+
+    def _split(self):
+        """(store_key, route path, query) for /<store>/<route>?query"""
+        url = urlparse(self.path)
+        parts = url.path.split("/", 2)
+        store = parts[1] if len(parts) > 1 else ""
+        rest = "/" + parts[2] if len(parts) > 2 else "/"
+        return store, rest, parse_qs(url.query)
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        time.sleep(_delay_ms("MOCK_POS_DELAY_MS") / 1000)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, title, body, route):
+        html = (PAGE_HEAD % {"title": title, "ui_delay": _delay_ms("MOCK_POS_UI_DELAY_MS")}
+                + body % {"login_path": self._abs(route["login"]),
+                          "export_path": self._abs(route["export"]),
+                          "username_field": route["username_field"],
+                          "password_field": route["password_field"]}
+                + "</body></html>")
+        self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _abs(self, route_path):
+        store = self._split()[0]
+        return f"/{store}{route_path}"
+
+    def _logged_in(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return "mockpos_session" in cookie and cookie["mockpos_session"].value in self.sessions
+
+    def do_POST(self):
+        store, path, _ = self._split()
+        route = self.routes.get(store)
+        if not route or path != route["login"]:
+            return self._send(404, b'{"success": false, "message": "not found"}')
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        user = form.get(route["username_field"], [""])[0]
+        pwd = form.get(route["password_field"], [""])[0]
+        if (user, pwd) != (self.username, self.password):
+            return self._send(200, b'{"success": false, "message": "Invalid username or password"}')
+        token = secrets.token_hex(16)
+        self.sessions.add(token)
+        self._send(200, b'{"success": true}',
+                   headers={"Set-Cookie": f"mockpos_session={token}; Path=/{store}/; HttpOnly"})
+
+    def do_GET(self):
+        store, path, _ = self._split()
+        route = self.routes.get(store)
+        if not route:
+            return self._send(404, b"not found", "text/plain")
+        cigarspos = route["pos"] == "cigarspos"
+
+        if path == route["export"]:
+            if not self._logged_in():
+                # like the real POS: an expired session gets the login page, not an error
+                return self._page("Login", CIGARSPOS_LOGIN_FRAME if cigarspos else BOTTLEPOS_LOGIN_PAGE, route)
+            time.sleep(_delay_ms("MOCK_POS_EXPORT_DELAY_MS") / 1000)
+            filename = datetime.now().strftime("items-%m_%d_%y%H_%M_%S.csv")
+            return self._send(200, export_csv_for(store), "text/csv",
+                              headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+        if cigarspos and path == "/index.html":
+            return self._page("CigarsPOS", CIGARSPOS_LOGIN_PAGE, route)
+        if cigarspos and path == "/login-frame.html":
+            return self._page("Login", CIGARSPOS_LOGIN_FRAME, route)
+        if path == "/admin/":
+            if self._logged_in():
+                return self._page("Administration", ADMIN_PAGE, route)
+            if cigarspos:
+                return self._page("Login", CIGARSPOS_LOGIN_FRAME, route)
+            return self._page("Login", BOTTLEPOS_LOGIN_PAGE, route)
+        self._send(404, b"not found", "text/plain")
+
+
+def serve(port=DEFAULT_PORT, handler=MockPOSHandler):
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    print(f"🧪 Mock POS listening on http://127.0.0.1:{server.server_address[1]}/<store>/ "
+          f"({', '.join(handler.routes)})")
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    try:
+        serve(port).serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Lightweight tracing for sync runs (export → clean → load → storefront).
+
+A run id (SYNC_RUN_ID) is created by the first traced process and inherited
+by every child process through the environment, together with the id of
+the span that launched it (SYNC_TRACE_PARENT). Spans are appended as JSON
+lines to downloads/traces/<run id>.jsonl, one line per finished span:
+
+    {"run", "id", "parent", "name", "start", "end", "duration", "pid", ...attrs}
+
+Set SYNC_TRACE=0 to turn tracing off.
+
+Usage:
+    python3 pipeline_trace.py list
+    python3 pipeline_trace.py report [run_id]     # default: latest run
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import functools
+import threading
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACE_DIR = os.path.join(BASE_DIR, "downloads", "traces")
+
+RUN_ID_ENV = "SYNC_RUN_ID"
+PARENT_ENV = "SYNC_TRACE_PARENT"
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def enabled():
+    return os.getenv("SYNC_TRACE", "1") == "1"
+
+
+def _new_run_id():
+    return datetime.now().strftime("%Y%m%dT%H%M%S-") + uuid.uuid4().hex[:6]
+
+
+def run_id():
+    """The current run id; created (and exported to children) on first use."""
+    rid = getattr(_local, "run_id", None) or os.getenv(RUN_ID_ENV)
+    if not rid:
+        rid = _new_run_id()
+        os.environ[RUN_ID_ENV] = rid
+    return rid
+
+
+def start_run():
+    """Begin a new run on this thread (for long-running processes like sync_daemon)."""
+    _local.run_id = _new_run_id()
+    _local.stack = []
+    return _local.run_id
+
+
+def new_span_id():
+    return uuid.uuid4().hex[:16]
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span_id():
+    stack = _stack()
+    return stack[-1].id if stack else os.getenv(PARENT_ENV)
+
+
+def annotate(**attrs):
+    """Add attributes (row counts etc.) to the innermost open span, if any."""
+    stack = _stack()
+    if stack:
+        stack[-1].attrs.update(attrs)
+
+
+def trace_path(rid=None):
+    return os.path.join(TRACE_DIR, f"{rid or run_id()}.jsonl")
+
+
+def record(name, start, end, span_id=None, parent=None, **attrs):
+    """Append one finished span. start/end are epoch seconds."""
+    if not enabled():
+        return
+    entry = {
+        "run": run_id(),
+        "id": span_id or new_span_id(),
+        "parent": parent if parent is not None else current_span_id(),
+        "name": name,
+        "start": round(start, 6),
+        "end": round(end, 6),
+        "duration": round(end - start, 6),
+        "pid": os.getpid(),
+    }
+    entry.update(attrs)
+    line = json.dumps(entry, default=str) + "\n"
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    with _write_lock:
+        # one short O_APPEND write per span, so lines from parallel processes don't interleave
+        fd = os.open(trace_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+
+class span:
+    """
+    Time a block as a span; nested spans (and child processes started with
+    child_env()) become its children. Attributes can be added while it runs:
+
+        with span("load", store="mkt") as s:
+            ...
+            s["rows"] = len(df)
+    """
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.id = new_span_id()
+        self.parent = None
+        self.start = None
+
+    def __setitem__(self, key, value):
+        self.attrs[key] = value
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def __enter__(self):
+        self.parent = current_span_id()
+        self.start = time.time()
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _stack().pop()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        record(self.name, self.start, time.time(), span_id=self.id, parent=self.parent, **self.attrs)
+        return False
+
+
+def traced(name):
+    """Decorator: run the function inside a span called `name`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def child_env(parent_span_id=None):
+    """Environment for a child process so its spans join this run under the current span."""
+    env = dict(os.environ)
+    env[RUN_ID_ENV] = run_id()
+    parent = parent_span_id or current_span_id()
+    if parent:
+        env[PARENT_ENV] = parent
+    else:
+        env.pop(PARENT_ENV, None)
+    return env
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Report
+# ─────────────────────────────────────────────────────────────────────────────
+def load_trace(rid):
+    with open(trace_path(rid), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def list_runs():
+    if not os.path.isdir(TRACE_DIR):
+        return []
+    runs = [f[:-len(".jsonl")] for f in os.listdir(TRACE_DIR) if f.endswith(".jsonl")]
+    return sorted(runs, key=lambda r: os.path.getmtime(trace_path(r)))
+
+
+def critical_path(spans):
+    """
+    Chain of spans that determined when the run finished: start from the span
+    that ends last, step back to whatever ended last before it started, and
+    descend into the child that ended last inside each span. Spans with an
+    "after" list (names of the spans they waited on) only step back to those.
+    """
+    by_parent = {}
+    ids = {s["id"] for s in spans}
+    for s in spans:
+        parent = s["parent"] if s["parent"] in ids else None
+        by_parent.setdefault(parent, []).append(s)
+
+    def chain(siblings, depth):
+        path = []
+        candidates = sorted(siblings, key=lambda s: s["end"])
+        current = candidates[-1] if candidates else None
+        while current:
+            path.append((depth, current))
+            earlier = [s for s in candidates if s["end"] <= current["start"] + 1e-6 and s is not current]
+            if "after" in current:
+                waited_on = set(current["after"]) | {current["name"]}   # incl. its own earlier attempts
+                earlier = [s for s in earlier if s["name"] in waited_on]
+            current = earlier[-1] if earlier else None
+        path.reverse()
+        full = []
+        for d, s in path:
+            full.append((d, s))
+            full.extend(chain(by_parent.get(s["id"], []), d + 1))
+        return full
+
+    return chain(by_parent.get(None, []), 0)
+
+
+def store_freshness(spans):
+    """
+    {store: seconds} from the end of the store's export to the storefront
+    update (its load, or the snapshot rebuild if one ran after it).
+    """
+    fresh = {}
+    for store in sorted({s["store"] for s in spans if s.get("store")}):
+        # snapshot spans list the stores they refreshed (older traces: all stores)
+        snapshot_end = max((s["end"] for s in spans if s["name"] == "snapshots"
+                            and (not s.get("stores") or store in s["stores"].split(","))), default=None)
+        exports = [s["end"] for s in spans if s.get("store") == store and s["name"] == "export"]
+        loads = [s["end"] for s in spans
+                 if s.get("store") == store and s["name"] == "load" and not s.get("error") and s.get("ok", True)]
+        if not exports or not loads:
+            continue
+        visible = max(loads)
+        if snapshot_end and snapshot_end > visible:
+            visible = snapshot_end
+        fresh[store] = visible - max(exports)
+    return fresh
+
+
+def _attrs(s):
+    skip = {"run", "id", "parent", "name", "start", "end", "duration", "pid", "after"}
+    return ", ".join(f"{k}={v}" for k, v in s.items() if k not in skip)
+
+
+def report(rid=None):
+    runs = list_runs()
+    rid = rid or (runs[-1] if runs else None)
+    if not rid or not os.path.exists(trace_path(rid)):
+        print("❌ No trace found.")
+        return 1
+    spans = load_trace(rid)
+    t0 = min(s["start"] for s in spans)
+    t1 = max(s["end"] for s in spans)
+    print(f"🧭 Run {rid}: {len(spans)} spans, {t1 - t0:.1f}s wall clock\n")
+
+    print("Critical path:")
+    for depth, s in critical_path(spans):
+        extra = _attrs(s)
+        print(f"  {'  ' * depth}{s['name']:<{28 - 2 * depth}} +{s['start'] - t0:7.2f}s {s['duration']:8.2f}s"
+              + (f"  ({extra})" if extra else ""))
+
+    totals = {}
+    for s in spans:
+        t = totals.setdefault(s["name"], [0, 0.0])
+        t[0] += 1
+        t[1] += s["duration"]
+    print("\nTime by span name:")
+    for name, (count, total) in sorted(totals.items(), key=lambda kv: -kv[1][1])[:15]:
+        print(f"  {name:28} x{count:<4} {total:8.2f}s")
+
+    fresh = store_freshness(spans)
+    if fresh:
+        print("\nFreshness (export → storefront):")
+        for store, lag in fresh.items():
+            print(f"  {store:8} {lag:7.1f}s")
+    # only the innermost failing span of each error chain
+    failed_parents = {s["parent"] for s in spans if s.get("error")}
+    errors = [s for s in spans if s.get("error") and s["id"] not in failed_parents]
+    if errors:
+        print("\nErrors:")
+        for s in errors:
+            print(f"  {s['name']}: {s['error']}")
+    return 0
+
+
+def main(argv):
+    if argv and argv[0] == "list":
+        for rid in list_runs():
+            print(rid)
+        return 0
+    if argv and argv[0] == "report":
+        return report(argv[1] if len(argv) > 1 else None)
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,393 @@
+import os
+import re
+import csv
+import json
+import hashlib
+import subprocess
+from functools import lru_cache
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from pipeline_trace import span, child_env
+from product_utils import STORES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Header candidates for the seven fields we keep out of the ~45 column POS export.
+FIELD_CANDIDATES = {
+    "name":     ["Name", "Item Name", "Product Name"],
+    "stock":    ["Stock Code", "Stockcode", "SKU", "Item Code"],
+    "upc":      ["UPC Full", "UPC", "UPC Code", "Barcode", "EAN", "GTIN"],
+    "upc_alt":  ["UPC", "UPC Full", "Barcode", "EAN", "GTIN"],  # may be same as upc, that's fine
+    # prefer the per-store quantity over the "Total" one
+    "qty":      ["Qty On Hand", "Quantity on Hand", "QOH", "On Hand", "Quantity", "Qty", "Total Qty On Hand"],
+    "price":    ["Unit Price", "Price", "Retail", "Selling Price", "Sell Price"],
+    "category": ["Category Name", "Category", "Main Category", "Category Group Name"],
+}
+
+CLEAN_COLUMNS = ["Name", "StockCode", "UPC", "QtyOnHand", "UnitPrice", "Category"]
+
+# Typed layout of the cleaner -> loader hand-off (Arrow IPC file, memory-mappable).
+# UPC stays a string so leading zeros survive without relying on dtype=str.
+# UnitPrice is wider than the DB's DECIMAL(10,2) so a mistyped price reaches
+# inventory_validation (PRICE_OUTLIER) instead of overflowing the cast here.
+PRICE_TYPE = pa.decimal128(18, 2)
+PRICE_LIMIT = 1e15   # inside PRICE_TYPE with room for float rounding
+CLEAN_SCHEMA = pa.schema([
+    ("Name", pa.string()),
+    ("StockCode", pa.string()),
+    ("UPC", pa.string()),
+    ("QtyOnHand", pa.int32()),
+    ("UnitPrice", PRICE_TYPE),
+    ("Category", pa.string()),
+])
+
+# Per-store filters (allowed categories, requested product lines, excluded flavors)
+STORE_FILTERS_PATH = os.path.join(BASE_DIR, "store_filters.json")
+
+
+def load_store_config(path=STORE_FILTERS_PATH):
+    """
+    Load store_filters.json into {store_key: {location, allowed_categories,
+    requested_products, excluded_names}}, upper-casing every entry once.
+
+    Every store in product_utils.STORES gets an entry (location is its
+    name); stores without their own block in the file use "default_store".
+    """
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    category_sets = raw.get("category_sets", {})
+    excluded = tuple(n.upper().strip() for n in raw.get("excluded_names", []))
+    unknown = set(raw.get("stores", {})) - set(STORES)
+    if unknown:
+        raise ValueError(f"{path} has filters for unknown store(s): {', '.join(sorted(unknown))}")
+    config = {}
+    for key, registered in STORES.items():
+        store = raw.get("stores", {}).get(key, raw.get("default_store", {}))
+        categories = store.get("allowed_categories")
+        if isinstance(categories, str):
+            categories = category_sets[categories]
+        requested = store.get("requested_products")
+        config[key] = {
+            "location": registered["name"],
+            "allowed_categories": frozenset(c.upper().strip() for c in categories) if categories else None,
+            "requested_products": tuple(p.upper().strip() for p in requested) if requested else None,
+            "excluded_names": excluded,
+        }
+    return config
+
+
+STORE_CLEAN_CONFIG = load_store_config()
+
+with open(STORE_FILTERS_PATH, "rb") as _f:
+    # changes whenever the filters change, so deltas against a load made
+    # under different filters are not trusted (see export_diff)
+    STORE_FILTERS_SIGNATURE = hashlib.sha1(_f.read()).hexdigest()
+
+# pandas' default na_values: what read_csv(dtype=str) turns into "" after fillna
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+_SCHEMA_CACHE = {}
+
+
+def _norm(s):  # normalize header names
+    return re.sub(r'[^a-z0-9]', '', str(s).lower())
+
+
+def find_col(columns, candidates):
+    """Return the actual column matching any candidate (exact normalized first, then partial)."""
+    norm_map = {_norm(c): c for c in columns}
+    for cand in candidates:
+        key = _norm(cand)
+        if key in norm_map:
+            return norm_map[key]
+    for cand in candidates:
+        key = _norm(cand)
+        for c in columns:
+            if key and key in _norm(c):
+                return c
+    return None
+
+
+def read_header(path):
+    """Read only the header row of a POS export."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def schema_fingerprint(header):
+    return hashlib.sha1("\x1f".join(header).encode("utf-8")).hexdigest()
+
+
+def resolve_columns(header):
+    """
+    Map our field names to the export's column names.
+
+    The mapping only depends on the header, so it is cached per POS schema
+    fingerprint and every later export with the same layout skips the search.
+    """
+    fingerprint = schema_fingerprint(header)
+    mapping = _SCHEMA_CACHE.get(fingerprint)
+    if mapping is None:
+        mapping = {field: find_col(header, cands) for field, cands in FIELD_CANDIDATES.items()}
+        mapping["name"] = mapping["name"] or "Name"
+        _SCHEMA_CACHE[fingerprint] = mapping
+    return mapping
+
+
+def read_export(path, extra_columns=()):
+    """
+    Read the needed columns of a raw POS export as strings.
+
+    extra_columns are exact header names to read as well when present
+    (e.g. the POS "ID" used by export_diff).
+
+    Returns (frame, mapping) where mapping is the resolve_columns() result.
+    """
+    header = read_header(path)
+    mapping = resolve_columns(header)
+    usecols = sorted({c for c in mapping.values() if c} | {c for c in extra_columns if c in header})
+    return _read_csv(path, usecols).fillna(""), mapping
+
+
+def _read_csv(path, usecols):
+    # Read every column as text. pandas' own pyarrow engine infers types first,
+    # so an all-digit UPC column came back as "12436996499.0".
+    table = pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(
+        include_columns=usecols,
+        column_types={c: pa.string() for c in usecols},
+        null_values=NA_VALUES,
+        strings_can_be_null=True,
+    ))
+    return table.to_pandas()   # pyarrow strips the BOM on its own
+
+
+_NUMBER_RE = r"-?\d+(?:\.\d+)?"
+_PLAIN_NUMBER_RE = r"-?[0-9]+(?:\.[0-9]+)?"  # what to_numeric can take as-is
+
+
+def _as_text(s):
+    # object dtype keeps the str accessor on Python's re, so \d and \D match
+    # exactly what the old per-cell re.findall / re.sub calls matched
+    return s.fillna("").astype(str).astype(object)
+
+
+def clean_upc_series(s):
+    """Keep only the digits of the first comma-separated piece, as strings to preserve leading zeros."""
+    # one regex pass: drop everything from the first comma on, and every other non-digit
+    return _as_text(s).str.replace(r"(?s),.*|\D", "", regex=True)
+
+
+def to_int_series(s):
+    """
+    Sum every number in each cell and round to int ("8.00, 5.00" -> 13, "" -> 0).
+
+    Plain numeric cells go straight through to_numeric; only the odd cells
+    (comma lists, stray text) are split with findall, exploded and summed per row.
+    """
+    text = _as_text(s)
+    plain = text.str.fullmatch(_PLAIN_NUMBER_RE).fillna(False).astype(bool)
+    values = pd.to_numeric(text.where(plain), errors="coerce").astype(float)
+    odd = ~plain & text.str.contains(r"\d", regex=True).fillna(False).astype(bool)
+    if odd.any():
+        numbers = text[odd].str.findall(_NUMBER_RE).explode().astype(float)
+        values[odd] = numbers.groupby(level=0).sum()
+    return values.fillna(0).round().astype(int)
+
+
+def to_price_series(s):
+    s = s.astype(str).str.replace(r"[^\d.\-]", "", regex=True)
+    return pd.to_numeric(s, errors="coerce").round(2)
+
+
+def clean_frame(df, mapping):
+    """Build the cleaned table (Name, StockCode, UPC, QtyOnHand, UnitPrice, Category)."""
+    out = pd.DataFrame({"Name": df[mapping["name"]].astype(str).str.strip()})
+
+    if mapping["stock"]:
+        out["StockCode"] = df[mapping["stock"]].astype(str).str.strip()
+
+    # best UPC from two possible sources
+    upc_col, upc_alt_col = mapping["upc"], mapping["upc_alt"]
+    if upc_col:
+        upc_a = clean_upc_series(df[upc_col])
+    else:
+        upc_a = pd.Series("", index=df.index)
+    if upc_alt_col and upc_alt_col != upc_col:
+        upc_b = clean_upc_series(df[upc_alt_col])
+        out["UPC"] = upc_a.where(upc_a.str.len() >= upc_b.str.len(), upc_b)
+    else:
+        out["UPC"] = upc_a
+
+    if mapping["qty"]:
+        out["QtyOnHand"] = to_int_series(df[mapping["qty"]])
+    if mapping["price"]:
+        out["UnitPrice"] = to_price_series(df[mapping["price"]])
+
+    # choose category name (prefer specific name over group)
+    if mapping["category"]:
+        out["Category"] = df[mapping["category"]].astype(str).str.strip()
+    else:
+        out["Category"] = ""
+
+    cols = [c for c in CLEAN_COLUMNS if c in out.columns]
+    return out[cols]
+
+
+def _trie_pattern(node):
+    if "" in node:
+        return ""  # a shorter phrase already ends here, so any continuation matches too
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items())]
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+
+@lru_cache(maxsize=None)
+def compile_phrase_matcher(phrases):
+    """
+    Compile a tuple of phrases into one regex that finds any of them.
+
+    The phrases are folded into a character trie first, so shared prefixes
+    ("RAW CONE ...", "FUME ...") are tested once per position instead of once
+    per phrase, and the whole name column is scanned in a single pass.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return re.compile(_trie_pattern(trie))
+
+
+def contains_any(names_up, phrases):
+    """Vectorized "any phrase in name" over an upper-cased name Series."""
+    if not phrases:
+        return pd.Series(False, index=names_up.index)
+    matcher = compile_phrase_matcher(tuple(phrases))
+    return names_up.str.contains(matcher, na=False).astype(bool)
+
+
+def apply_store_filters(out, requested_products=None, allowed_categories=None, excluded_names=()):
+    """Keep only the rows a store publishes to the storefront."""
+    names_up = out["Name"].str.upper()
+    keep = ~contains_any(names_up, excluded_names)
+
+    if requested_products:
+        keep &= contains_any(names_up, requested_products)
+
+    if allowed_categories:
+        keep &= out["Category"].str.upper().str.strip().isin(allowed_categories)
+
+    return out[keep].copy()
+
+
+def to_arrow_table(out):
+    """Convert a cleaned frame to a CLEAN_SCHEMA table."""
+    n = len(out)
+    qty = out["QtyOnHand"] if "QtyOnHand" in out.columns else pd.Series(0, index=out.index)
+    price = out["UnitPrice"] if "UnitPrice" in out.columns else pd.Series(float("nan"), index=out.index)
+    # clipped prices are still far above VALIDATION_MAX_PRICE, so they get rejected
+    price = price.astype(float).clip(-PRICE_LIMIT, PRICE_LIMIT)
+    columns = {
+        "Name": pa.array(out["Name"].tolist(), pa.string()),
+        "StockCode": pa.array(out["StockCode"].tolist() if "StockCode" in out.columns else [""] * n, pa.string()),
+        "UPC": pa.array(out["UPC"].tolist(), pa.string()),
+        "QtyOnHand": pa.array(qty.to_numpy(dtype="int64"), pa.int64()).cast(pa.int32()),
+        "UnitPrice": pa.array(price.to_numpy(dtype="float64"), pa.float64(), from_pandas=True).cast(PRICE_TYPE),
+        "Category": pa.array(out["Category"].tolist(), pa.string()),
+    }
+    return pa.table(columns, schema=CLEAN_SCHEMA)
+
+
+def clean_path_for(raw_path):
+    return os.path.splitext(raw_path)[0] + "_clean.arrow"
+
+
+def write_clean_table(table, path):
+    """Write an uncompressed Arrow IPC file so the loader can memory-map it."""
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_clean_table(path):
+    """Memory-map a cleaned Arrow IPC file (no parse step)."""
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def clean_rows(df, mapping, store_key):
+    """Clean raw export rows and apply the store's filters."""
+    if store_key not in STORE_CLEAN_CONFIG:
+        raise ValueError(f"Unknown store: {store_key}")
+    config = STORE_CLEAN_CONFIG[store_key]
+    out = clean_frame(df, mapping)
+    return apply_store_filters(
+        out,
+        requested_products=config["requested_products"],
+        allowed_categories=config["allowed_categories"],
+        excluded_names=config["excluded_names"],
+    )
+
+
+def write_clean_outputs(out, cleaned_path, write_csv=True):
+    """Write the Arrow hand-off file and, optionally, a CSV copy for humans."""
+    write_clean_table(to_arrow_table(out), cleaned_path)
+    print(f"Cleaned Arrow → {cleaned_path}  ({len(out)} rows)")
+    if write_csv:
+        csv_path = os.path.splitext(cleaned_path)[0] + ".csv"
+        out.to_csv(csv_path, index=False)
+        print(f"Cleaned CSV → {csv_path}")
+
+
+def clean_export(raw_path, store_key, cleaned_path=None, write_csv=True):
+    """
+    Clean one raw POS export for a store and save it next to the raw file.
+
+    Args:
+        raw_path: Path to the raw "Export CSV" download
+        store_key: "calle8", "79th", or "mkt"
+        cleaned_path: Output path (defaults to <raw name>_clean.arrow)
+        write_csv: Also write <raw name>_clean.csv for humans to inspect
+
+    Returns:
+        Path of the cleaned Arrow file
+    """
+    df, mapping = read_export(raw_path)
+    out = clean_rows(df, mapping, store_key)
+    if cleaned_path is None:
+        cleaned_path = clean_path_for(raw_path)
+    write_clean_outputs(out, cleaned_path, write_csv)
+    return cleaned_path
+
+
+def run_loader(cleaned_path, location, timeout=480):
+    """Load a cleaned Arrow (or CSV) file into the database through clean_data.py."""
+    print("\n📦 Loading data into database...")
+    try:
+        with span("loader_subprocess", location=location) as s:
+            result = subprocess.run(
+                ["python3", os.path.join(BASE_DIR, "clean_data.py"), cleaned_path, location],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                env=child_env(),   # the loader's spans join this run
+            )
+            s["returncode"] = result.returncode
+        print(result.stdout)
+        if result.stderr:
+            print("⚠️  Warnings:", result.stderr)
+        if result.returncode == 0:
+            print(f"✅ Database updated with {location} inventory!")
+        else:
+            print(f"❌ Error loading data (exit code {result.returncode})")
+        return result.returncode == 0
+    except Exception as e:
+        print(f"❌ Error running loader: {e}")
+        return False
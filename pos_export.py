@@ -0,0 +1,462 @@
+import os
+import glob
+import shutil
+import requests
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from pos_cleaner import run_loader, STORE_CLEAN_CONFIG
+from export_archive import archive_export
+from export_diff import clean_for_load, record_load
+from download_watch import DownloadWatcher
+from pos_http_export import http_export, ExportError
+from pipeline_trace import span, annotate
+from product_utils import STORES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))       # folder with this script
+
+POS_USERNAME = os.getenv("POS_USERNAME", "sandro")
+POS_PASSWORD = os.getenv("POS_PASSWORD", "12301230")
+
+# One Chrome user-data dir per store keeps the POS cookies between runs, so a
+# live session can go straight to the admin inventory page.
+PROFILES_DIR = os.getenv("CHROME_PROFILES_DIR", os.path.join(BASE_DIR, "chrome_profiles"))
+
+# Lean exporter browser: headless, eager page loads, no images/media/fonts/analytics.
+# CHROME_HEADLESS=0 shows the window, CHROME_LEAN=0 restores stock Chrome.
+CHROME_HEADLESS = os.getenv("CHROME_HEADLESS", "1") == "1"
+CHROME_LEAN = os.getenv("CHROME_LEAN", "1") == "1"
+
+LEAN_CHROME_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-component-update",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication,InterestFeedContentSuggestions",
+    "--no-first-run",
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+    "--window-size=1280,900",
+]
+
+# Network.setBlockedURLs patterns (the admin UI only needs HTML, JS, CSS and XHR)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.wav", "*.ogg",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+]
+
+# Per-step wait budgets in seconds (replaces one blanket 20s wait)
+STEP_TIMEOUTS = {
+    "session": 8,       # is the saved session still live?
+    "dialog": 3,        # optional jQuery UI alerts
+    "login": 10,        # login form fields and button
+    "device_setup": 10, # CigarsPOS register/location selects
+    "admin": 15,        # admin tab + sidebar
+    "inventory": 10,    # Items menu → Inventory view
+    "export": 10,       # Export CSV button
+}
+DOWNLOAD_TIMEOUT = int(os.getenv("EXPORT_DOWNLOAD_TIMEOUT", 60))
+SESSION_CHECK_TIMEOUT = STEP_TIMEOUTS["session"]
+
+# "browser": Chrome only (default until pos_endpoints.json is checked against the
+# live admin UI); "auto": HTTP export first, Chrome only if it fails; "http": HTTP only
+EXPORT_MODE = os.getenv("POS_EXPORT_MODE", "browser")
+
+# Admin pages per POS flavour (CigarsPOS and BottlePOS share the admin UI but
+# log in differently); the store's host comes from product_utils.STORES.
+POS_PAGES = {
+    "cigarspos": {
+        "login_url": "/index.html?nocache=07",
+        "admin_url": "/admin/",
+    },
+    "bottlepos": {
+        "login_url": "/admin/",  # start at /admin/ for reliability
+        "items_url": "/admin/?nocache=1765836647#!items_1",
+        "admin_url": "/admin/?nocache=1765836647#!items_1",
+    },
+}
+
+
+def _store_export(key, store):
+    # POS_BASE_URL=http://127.0.0.1:8765/{store} points every store at mock_pos_server.py
+    base = os.getenv("POS_BASE_URL", "").format(store=key) or store["pos_url"]
+    cfg = {url_key: base.rstrip("/") + path for url_key, path in POS_PAGES[store["pos"]].items()}
+    cfg.update(
+        pos=store["pos"],
+        download_dir=os.path.join(BASE_DIR, store["download_dir"]),
+        raw_name=store["raw_name"],
+    )
+    return cfg
+
+
+STORE_EXPORTS = {key: _store_export(key, store) for key, store in STORES.items()}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Browser + dialogs
+# ─────────────────────────────────────────────────────────────────────────────
+def profile_dir_for(store_key):
+    return os.path.join(PROFILES_DIR, store_key)
+
+
+def step_wait(driver, step):
+    return WebDriverWait(driver, STEP_TIMEOUTS[step], poll_frequency=0.1)
+
+
+def make_driver(download_dir, profile_dir=None, headless=None, lean=None):
+    """Configure downloads BEFORE launching Chrome (single driver per store)."""
+    headless = CHROME_HEADLESS if headless is None else headless
+    lean = CHROME_LEAN if lean is None else lean
+    os.makedirs(download_dir, exist_ok=True)
+    chrome_options = webdriver.ChromeOptions()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    if lean:
+        chrome_options.page_load_strategy = "eager"   # DOM ready is enough for every step
+        for arg in LEAN_CHROME_ARGS:
+            chrome_options.add_argument(arg)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    chrome_prefs = {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True,
+        "profile.default_content_setting_values.automatic_downloads": 1,
+    }
+    if lean:
+        chrome_prefs["profile.managed_default_content_settings.images"] = 2
+    chrome_options.add_experimental_option("prefs", chrome_prefs)
+    driver = webdriver.Chrome(options=chrome_options)
+    if headless:
+        # headless Chrome ignores the download prefs unless told explicitly
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior",
+                               {"behavior": "allow", "downloadPath": download_dir})
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver
+
+
+def close_ok_dialog_if_present(driver, timeout=STEP_TIMEOUTS["dialog"]):
+    """
+    Close a visible jQuery UI dialog that has an OK button, if it appears.
+    Safe to call even when no dialog exists.
+    """
+    short_wait = WebDriverWait(driver, timeout, poll_frequency=0.1)
+    try:
+        dialog = "//div[contains(@class,'ui-dialog') and not(contains(@style,'display: none'))]"
+        ok_btns = (
+            f"{dialog}//button[@title='Ok' or normalize-space(.)='Ok' "
+            f"or .//i[contains(@class,'icon-ok')]]"
+        )
+        short_wait.until(EC.element_to_be_clickable((By.XPATH, f"({ok_btns})[last()]"))).click()
+        short_wait.until(
+            EC.invisibility_of_element_located((By.CSS_SELECTOR, "div.ui-widget-overlay.ui-front"))
+        )
+    except TimeoutException:
+        pass
+
+
+def click(driver, element):
+    try:
+        element.click()
+    except Exception:
+        driver.execute_script("arguments[0].click();", element)
+
+
+def switch_into_frame_with(driver, xpath):
+    """
+    Some deployments embed the login form in an iframe. Hop through iframes
+    until one contains `xpath`; stays in default content if none does.
+    """
+    driver.switch_to.default_content()
+    if driver.find_elements(By.XPATH, xpath):
+        return
+    for fr in driver.find_elements(By.TAG_NAME, "iframe"):
+        driver.switch_to.default_content()
+        driver.switch_to.frame(fr)
+        if driver.find_elements(By.XPATH, xpath):
+            return
+    driver.switch_to.default_content()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Session reuse
+# ─────────────────────────────────────────────────────────────────────────────
+LOGIN_FIELDS_XPATH = "//input[@id='username' or @name='username' or @id='loguser']"
+
+
+def resume_session(driver, cfg, timeout=SESSION_CHECK_TIMEOUT):
+    """
+    Open the admin inventory URL with the saved profile. Returns True when the
+    admin sidebar shows up (session still valid), False when the POS sends us
+    back to a login form or nothing loads in time.
+    """
+    driver.get(cfg["admin_url"])
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.find_elements(By.ID, "sidebar") or d.find_elements(By.XPATH, LOGIN_FIELDS_XPATH)
+        )
+    except TimeoutException:
+        return False
+    if not driver.find_elements(By.ID, "sidebar") or driver.find_elements(By.XPATH, LOGIN_FIELDS_XPATH):
+        return False
+    close_ok_dialog_if_present(driver, timeout=1)
+    return True
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CigarsPOS: login → device setup → Admin tab
+# ─────────────────────────────────────────────────────────────────────────────
+def login_cigarspos(driver, cfg):
+    driver.get(cfg["login_url"])
+    close_ok_dialog_if_present(driver)
+
+    wait = step_wait(driver, "login")
+    wait.until(lambda d: d.find_elements(By.XPATH, "//input[@id='username' or @name='username'] | //iframe"))
+    switch_into_frame_with(driver, "//input[@id='username' or @name='username']")
+    user = wait.until(EC.visibility_of_element_located(
+        (By.XPATH, "//input[@id='username' or @name='username' or @placeholder='Username*']")))
+    user.clear(); user.send_keys(POS_USERNAME)
+
+    pwd = wait.until(EC.visibility_of_element_located(
+        (By.XPATH, "//input[@type='password' and (@id='password' or @name='password' or @placeholder='Password*')]")))
+    pwd.clear(); pwd.send_keys(POS_PASSWORD)
+
+    login_btn = wait.until(EC.element_to_be_clickable(
+        (By.XPATH, "//button[@id='loginbutton' or @id='loginButton' or @title='Login' or normalize-space(.)='Login']")))
+    click(driver, login_btn)
+
+    # Back to the top doc for the device setup dialog
+    driver.switch_to.default_content()
+
+    # Initial Device Setup → pick "Register1 (Inventory)" and "Inventory" → Register
+    wait = step_wait(driver, "device_setup")
+    el = wait.until(EC.presence_of_element_located((By.ID, "posdevices")))
+    sel = Select(el)
+    wait.until(lambda d: len(sel.options) >= 2)
+    sel.select_by_index(1)  # 2nd option (Register1...)
+
+    loc = wait.until(EC.presence_of_element_located((By.ID, "poslocations")))
+    sel2 = Select(loc)
+    wait.until(EC.presence_of_element_located(
+        (By.XPATH, "//select[@id='poslocations']/option[normalize-space(.)='Inventory']")))
+    sel2.select_by_visible_text("Inventory")
+
+    wait.until(EC.element_to_be_clickable((By.XPATH, "//button[normalize-space(.)='Register']"))).click()
+
+    # Close the "Electron print support..." alert if it shows
+    try:
+        ok_btn = step_wait(driver, "dialog").until(EC.element_to_be_clickable((
+            By.XPATH,
+            "(//div[contains(@class,'ui-dialog') and not(contains(@style,'display: none'))]"
+            "//div[contains(@class,'ui-dialog-buttonset')]//button"
+            "[normalize-space(.)='Ok' or .//i[contains(@class,'icon-ok')]])[last()]"
+        )))
+        ok_btn.click()
+    except TimeoutException:
+        pass
+
+    # Go to Admin (opens in a new tab) and switch to it
+    wait = step_wait(driver, "admin")
+    wait.until(EC.element_to_be_clickable((By.ID, "admin_btn"))).click()
+    wait.until(lambda d: len(d.window_handles) >= 2)
+    for h in driver.window_handles:
+        driver.switch_to.window(h)
+        if "/admin" in driver.current_url.lower() or "administration" in (driver.title or ""):
+            break
+
+    # Sidebar present?
+    wait.until(EC.presence_of_element_located((By.ID, "sidebar")))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BottlePOS: admin login
+# ─────────────────────────────────────────────────────────────────────────────
+def login_bottlepos(driver, cfg):
+    driver.get(cfg["login_url"])
+
+    # Close any initial dialog(s)
+    close_ok_dialog_if_present(driver)
+    close_ok_dialog_if_present(driver)
+
+    # Hop into the correct iframe if needed (use CSS ids to avoid XPath issues)
+    switch_into_frame_with(driver, "//*[@id='loguser']")
+
+    wait = step_wait(driver, "login")
+    user = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "#loguser")))
+    user.clear()
+    user.send_keys(POS_USERNAME)
+
+    pwd = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "#logpass")))
+    pwd.clear()
+    pwd.send_keys(POS_PASSWORD)
+
+    click(driver, wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#loginbutton"))))
+
+    # after login, go to the items page
+    driver.get(cfg["items_url"])
+
+    # Close any post-login dialogs if they appear
+    close_ok_dialog_if_present(driver)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Admin: Items → Inventory → Export CSV
+# ─────────────────────────────────────────────────────────────────────────────
+def open_inventory(driver, pos):
+    wait = step_wait(driver, "inventory")
+    items_li = driver.find_element(By.ID, "menuparentitems")
+    if "open" not in (items_li.get_attribute("class") or ""):
+        click(driver, items_li.find_element(By.CSS_SELECTOR, "a.dropdown-toggle"))
+        wait.until(lambda d: "open" in d.find_element(By.ID, "menuparentitems").get_attribute("class"))
+
+    inv_link = wait.until(EC.element_to_be_clickable((
+        By.XPATH,
+        "//*[@id='sidebar']//li[@id='menuitems']/a"
+        " | //*[@id='sidebar']//a[@href='#stock' or normalize-space()='Inventory' or .//span[normalize-space()='Inventory']]"
+    )))
+    driver.execute_script("arguments[0].scrollIntoView({block:'center'})", inv_link)
+    click(driver, inv_link)
+
+    if pos == "cigarspos":
+        # Ensure we’re on Inventory view
+        wait.until(lambda d: '#stock' in d.current_url.lower() or d.find_elements(By.ID, 'menustock'))
+
+
+def click_export(driver):
+    export_btn = step_wait(driver, "export").until(EC.element_to_be_clickable(
+        (By.XPATH, "//button[normalize-space(.)='Export CSV']")))
+    export_btn.click()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Download handling
+# ─────────────────────────────────────────────────────────────────────────────
+def clear_old_downloads(dir_path):
+    """Remove old items-*.csv files to ensure we pick the fresh one."""
+    for old_file in glob.glob(os.path.join(dir_path, "items-*.csv")):
+        try:
+            os.remove(old_file)
+        except Exception:
+            pass
+
+
+def save_download(csv_path, dest):
+    """Force a stable file name in the project (downloads/<store>/inventory_<store>.csv)."""
+    if os.path.abspath(csv_path) != os.path.abspath(dest):
+        try:
+            os.replace(csv_path, dest)              # atomic overwrite if possible
+        except Exception:
+            shutil.copy2(csv_path, dest)            # fallback: copy if rename fails
+    print("Saved CSV →", dest)
+    return dest
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Entry points
+# ─────────────────────────────────────────────────────────────────────────────
+def browser_export(store_key, driver=None):
+    """
+    Log into a store's POS with Chrome, click Export CSV and save it as
+    downloads/<store>/inventory_<store>.csv. Returns the saved path.
+
+    Pass a warm `driver` (from make_driver) to reuse it; it is left open.
+    Otherwise a new Chrome is started and quit afterwards.
+    """
+    cfg = STORE_EXPORTS[store_key]
+    download_dir = cfg["download_dir"]
+    clear_old_downloads(download_dir)
+
+    own_driver = driver is None
+    if own_driver:
+        with span("browser_launch"):
+            driver = make_driver(download_dir, profile_dir_for(store_key))
+    try:
+        with span("browser_login") as s:
+            s["session_reused"] = resume_session(driver, cfg)
+            if s["session_reused"]:
+                print(f"🔑 Reusing saved {store_key} POS session")
+            elif cfg["pos"] == "cigarspos":
+                login_cigarspos(driver, cfg)
+            else:
+                login_bottlepos(driver, cfg)
+        with span("browser_navigate"):
+            open_inventory(driver, cfg["pos"])
+        with DownloadWatcher(download_dir) as watcher:
+            with span("browser_export_click"):
+                click_export(driver)
+            with span("browser_download"):
+                csv_path = watcher.wait(timeout=DOWNLOAD_TIMEOUT)
+        print(f"Detected raw download: {csv_path}")
+    finally:
+        if own_driver:
+            driver.quit()
+
+    return save_download(csv_path, os.path.join(download_dir, cfg["raw_name"]))
+
+
+def export_store(store_key, mode=None, driver=None):
+    """
+    Export a store's inventory CSV to downloads/<store>/inventory_<store>.csv
+    and archive it. Uses Chrome by default; POS_EXPORT_MODE=auto tries the
+    HTTP exporter first and falls back to Chrome when it fails.
+
+    Args:
+        store_key: "calle8", "79th", or "mkt"
+        mode: "auto", "http" or "browser" (default POS_EXPORT_MODE)
+        driver: Optional warm Chrome for the browser path
+
+    Returns:
+        (raw_path, archive index entry)
+    """
+    mode = mode or EXPORT_MODE
+    cfg = STORE_EXPORTS[store_key]
+    dest = os.path.join(cfg["download_dir"], cfg["raw_name"])
+    with span("export", store=store_key, mode=mode):
+        if mode == "browser":
+            dest = browser_export(store_key, driver)
+            annotate(via="browser")
+        else:
+            try:
+                http_export(store_key, dest)
+                annotate(via="http")
+                print("Saved CSV →", dest)
+            except (ExportError, requests.RequestException) as e:
+                if mode == "http":
+                    raise
+                print(f"⚠️  HTTP export failed for {store_key} ({e}); falling back to Chrome")
+                dest = browser_export(store_key, driver)
+                annotate(via="browser")
+
+        entry = archive_export(store_key, dest)   # keep every day's raw export (deduped, zstd)
+        annotate(bytes=entry["size"], sha256=entry["sha256"][:12])
+    return dest, entry
+
+
+def sync_store(store_key):
+    """Export → clean → load one store (what the get_*_data.py scripts run)."""
+    with span("sync", store=store_key):
+        dest, entry = export_store(store_key)
+
+        # loader input is only the rows changed since the last load when possible
+        cleaned_path = clean_for_load(dest, store_key)
+
+        with span("load", store=store_key) as s:
+            s["ok"] = run_loader(cleaned_path, STORE_CLEAN_CONFIG[store_key]["location"])
+        if s["ok"]:
+            record_load(store_key, entry, cleaned_path)
+        return s["ok"]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Browserless POS export: log in over HTTP and download the same inventory
+CSV the admin UI's "Export CSV" button returns.
+
+Endpoints live in pos_endpoints.json (per POS flavour); each store's flavour
+and host come from product_utils.STORES. They have only been checked against mock_pos_server.py, not captured
+from the live admin UI, so pos_export uses Chrome unless POS_EXPORT_MODE is
+set to "auto" or "http". Set POS_BASE_URL to point every store at another host (the Chrome
+exporter honours it too), e.g. the local stub:
+POS_BASE_URL=http://127.0.0.1:8765/{store}
+
+Usage:
+    python3 pos_http_export.py <store> [dest.csv]
+"""
+import os
+import sys
+import json
+import time
+import requests
+
+from pipeline_trace import span
+from product_utils import STORES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS_PATH = os.path.join(BASE_DIR, "pos_endpoints.json")
+
+POS_USERNAME = os.getenv("POS_USERNAME", "sandro")
+POS_PASSWORD = os.getenv("POS_PASSWORD", "12301230")
+
+CHUNK_SIZE = 1 << 16
+TIMEOUT = (10, 120)  # connect, read
+
+
+class ExportError(Exception):
+    """The HTTP export could not produce a CSV (caller should fall back to the browser)."""
+
+
+def load_endpoints(path=ENDPOINTS_PATH):
+    """Return {store_key: {base_url, login, export}} from pos_endpoints.json."""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    base_override = os.getenv("POS_BASE_URL")
+    endpoints = {}
+    for key, store in STORES.items():
+        pos = raw["pos"][store["pos"]]
+        base_url = base_override.format(store=key) if base_override else store["pos_url"]
+        endpoints[key] = {
+            "base_url": base_url.rstrip("/"),
+            "login": pos["login"],
+            "export": pos["export"],
+        }
+    return endpoints
+
+
+def login(session, cfg):
+    """
+    POST the credentials; the session keeps whatever cookie the POS sets.
+
+    Only a positive answer counts: a JSON object with "success": true, or
+    the session cookie named by the endpoint's optional "session_cookie".
+    Anything else (the SPA's HTML page, a JSON list, a bare 200) is an error.
+    """
+    spec = cfg["login"]
+    resp = session.post(
+        cfg["base_url"] + spec["path"],
+        data={spec["username_field"]: POS_USERNAME, spec["password_field"]: POS_PASSWORD},
+        timeout=TIMEOUT,
+    )
+    if resp.status_code != 200:
+        raise ExportError(f"login returned HTTP {resp.status_code}")
+    try:
+        body = resp.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        body = {}
+    if body.get("success") is False:
+        raise ExportError(f"login rejected: {body.get('message', 'bad credentials')}")
+    cookie = spec.get("session_cookie")
+    if body.get("success") is not True and not (cookie and cookie in resp.cookies):
+        raise ExportError("login response had no success flag or session cookie")
+
+
+def download_export(session, cfg, dest):
+    """Stream the export to dest (via a temp file) and return dest."""
+    spec = cfg["export"]
+    tmp = dest + ".part"
+    with session.get(cfg["base_url"] + spec["path"], params=spec.get("params"),
+                     stream=True, timeout=TIMEOUT) as resp:
+        if resp.status_code != 200:
+            raise ExportError(f"export returned HTTP {resp.status_code}")
+        chunks = resp.iter_content(CHUNK_SIZE)
+        first = next(chunks, b"")
+        # An expired session gets the login page back instead of a CSV
+        head = first.lstrip(b"\xef\xbb\xbf").lstrip()
+        if not head or head.startswith(b"<") or b"," not in head.split(b"\n", 1)[0]:
+            raise ExportError("export did not return a CSV")
+        with open(tmp, "wb") as out:
+            out.write(first)
+            for chunk in chunks:
+                out.write(chunk)
+    os.replace(tmp, dest)
+    return dest
+
+
+def http_export(store_key, dest, endpoints=None):
+    """
+    Export a store's inventory CSV over HTTP.
+
+    Args:
+        store_key: "calle8", "79th", or "mkt"
+        dest: Where to write the CSV
+        endpoints: Optional result of load_endpoints()
+
+    Returns:
+        dest
+
+    Raises:
+        ExportError (or requests.RequestException) when the export fails
+    """
+    cfg = (endpoints or load_endpoints())[store_key]
+    started = time.time()
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    with requests.Session() as session:
+        with span("http_login"):
+            login(session, cfg)
+        with span("http_download") as s:
+            download_export(session, cfg, dest)
+            s["bytes"] = os.path.getsize(dest)
+    print(f"🌐 HTTP export for {store_key}: {os.path.getsize(dest):,} bytes in {time.time() - started:.1f}s")
+    return dest
+
+
+def main(argv):
+    if not argv:
+        print(__doc__)
+        return 1
+    store_key = argv[0]
+    dest = argv[1] if len(argv) > 1 else f"inventory_{store_key}.csv"
+    try:
+        http_export(store_key, dest)
+    except (ExportError, requests.RequestException) as e:
+        print(f"❌ HTTP export failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
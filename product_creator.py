@@ -2,43 +2,36 @@
 
 import sys
 import re
+import catalog_mirror
 from product_utils import (
-    STORE_MAPPING,
+    STORES,
+    get_db_connection,
+    get_snapshot_table,
     search_products,
-    get_product_by_name,
-    insert_product,
-    insert_inventory,
+    get_products_by_names,
+    insert_products_bulk,
+    insert_inventory_bulk,
+    upsert_snapshot_rows_bulk,
     get_category_id_by_name,
     normalize_product_name,
-    get_db_connection
+    name_key
 )
 
-SNAPSHOT_TABLES = {
-    "Calle 8": "inventory_calle8",
-    "79th Street": "inventory_79th",
-    "Market": "inventory_mkt"
-}
-
-
 def get_store_choice():
     """Prompt user to select a store."""
     print("\n" + "="*50)
     print("SELECT STORE")
     print("="*50)
-    print("1. CALLE8")
-    print("2. 79TH")
-    print("3. MKT")
+    stores = list(STORES.values())
+    for idx, store in enumerate(stores, 1):
+        print(f"{idx}. {store['code']}")
     
     while True:
-        choice = input("\nEnter store number (1-3): ").strip()
-        if choice == "1":
-            return "Calle 8"
-        elif choice == "2":
-            return "79th Street"
-        elif choice == "3":
-            return "Market"
+        choice = input(f"\nEnter store number (1-{len(stores)}): ").strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(stores):
+            return stores[int(choice) - 1]["name"]
         else:
-            print("Invalid choice. Please enter 1, 2, or 3.")
+            print(f"Invalid choice. Please enter a number from 1 to {len(stores)}.")
 
 
 def search_and_display_products(store_name, search_term):
@@ -162,29 +155,62 @@ def add_to_no_group(product_name, index_path):
 
 def add_to_snapshot_table(store_name, name, upc, quantity):
     """Add product to store's snapshot table."""
-    if store_name not in SNAPSHOT_TABLES:
+    try:
+        get_snapshot_table(store_name)
+    except ValueError:
         return False
-    
-    table_name = SNAPSHOT_TABLES[store_name]
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute(f"""
-            DELETE FROM `{table_name}` WHERE UPPER(name) = UPPER(%s) AND upc = %s
-        """, (name, upc))
-        
-        cur.execute(f"""
-            INSERT INTO `{table_name}` (name, upc, quantity, is_active)
-            VALUES (%s, %s, %s, 1)
-        """, (name, upc, quantity))
-        conn.commit()
+        upsert_snapshot_rows_bulk(store_name, [{"name": name, "upc": upc, "quantity": quantity}])
         return True
     except Exception as e:
         print(f"   ⚠️  Error adding to snapshot: {e}")
         return False
+
+
+def recheck_mirror_hits(confirmed):
+    """
+    The mirror can lag MySQL: look the confirmed names up again on the
+    primary so a product deleted (or created) upstream since the last sync
+    doesn't fail the inventory foreign key or the unique name_key.
+    
+    Args:
+        confirmed: Products from confirm_and_add (existing/category_id are fixed in place)
+    
+    Returns:
+        (products that can be written, number skipped)
+    """
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    try:
+        live = get_products_by_names([p["name"] for p in confirmed], cur)
+        category_ids = {p["category_id"] for p in confirmed if p["category_id"]}
+        live_categories = set()
+        if category_ids:
+            cur.execute(f"SELECT id FROM categories WHERE id IN ({', '.join(['%s'] * len(category_ids))})",
+                        list(category_ids))
+            live_categories = {row["id"] for row in cur.fetchall()}
     finally:
         cur.close()
         conn.close()
+    
+    kept = []
+    skipped = 0
+    for p in confirmed:
+        existing = live.get(name_key(p["name"]))
+        if p["existing"] and not existing:
+            print(f"   ⚠️  {p['name']} (ID: {p['existing']['id']}) is no longer in the database. Creating it again.")
+        elif existing and not p["existing"]:
+            print(f"   ✅ Product already exists (ID: {existing['id']})")
+        p["existing"] = existing
+        if not existing and p["category_id"] not in live_categories:
+            p["category_id"] = (get_category_id_by_name(p["category_name"])
+                                or get_category_id_by_name("MISCELLANEOUS SMOKE SHOP"))
+            if not p["category_id"]:
+                print(f"   ❌ Could not find category for {p['name']}. Skipping.")
+                skipped += 1
+                continue
+        kept.append(p)
+    return kept, skipped
 
 
 def confirm_and_add(store_name, selected_products):
@@ -196,8 +222,21 @@ def confirm_and_add(store_name, selected_products):
     group_variants = input("\n🔗 Group variants together? (y/n, default=y): ").strip().lower()
     group_variants = group_variants != "n"
     
-    added_count = 0
     skipped_count = 0
+    selected_names = [p.get("Name", "").strip() for p in selected_products]
+    if catalog_mirror.available():
+        existing_products = catalog_mirror.get_products_by_names(selected_names)
+    else:
+        existing_products = get_products_by_names(selected_names)
+    category_ids = {}
+    confirmed = []
+    
+    def category_id_for(category_name):
+        if category_name not in category_ids:
+            category_ids[category_name] = (
+                catalog_mirror.available() and catalog_mirror.get_category_id_by_name(category_name)
+            ) or get_category_id_by_name(category_name)
+        return category_ids[category_name]
     
     for product in selected_products:
         name = product.get("Name", "").strip()
@@ -225,43 +264,61 @@ def confirm_and_add(store_name, selected_products):
             skipped_count += 1
             continue
         
-        existing = get_product_by_name(name)
+        existing = existing_products.get(name_key(name))
+        category_name = product.get("Category", "MISCELLANEOUS SMOKE SHOP").strip().upper()
+        category_id = None
         
         if existing:
             print(f"   ✅ Product already exists (ID: {existing['id']})")
-            product_id = existing['id']
         else:
-            category_name = product.get("Category", "MISCELLANEOUS SMOKE SHOP").strip().upper()
-            category_id = get_category_id_by_name(category_name)
+            category_id = category_id_for(category_name)
             
             if not category_id:
                 print(f"   ⚠️  Category '{category_name}' not found. Using default.")
-                category_id = get_category_id_by_name("MISCELLANEOUS SMOKE SHOP")
+                category_id = category_id_for("MISCELLANEOUS SMOKE SHOP")
             
             if not category_id:
                 print(f"   ❌ Could not find category. Skipping.")
                 skipped_count += 1
                 continue
-            
-            product_id = insert_product(name, upc, stockcode, price, category_id)
-            print(f"   ✅ Product created (ID: {product_id})")
         
-        insert_inventory(product_id, store_name, quantity, price)
-        print(f"   ✅ Inventory updated for {store_name}")
-        
-        add_to_snapshot_table(store_name, name, upc, quantity)
-        print(f"   ✅ Added to {store_name} snapshot table")
-        
-        if add_to_featured_list(name, group_variants):
-            if group_variants:
-                print(f"   ✅ Added to featured products (grouped)")
-            else:
-                print(f"   ✅ Added to featured products (separate cards)")
+        confirmed.append({
+            "name": name, "upc": upc, "stockcode": stockcode, "unit_price": price,
+            "quantity": quantity, "category_id": category_id, "category_name": category_name,
+            "existing": existing,
+        })
+    
+    if confirmed and catalog_mirror.available():
+        confirmed, dropped = recheck_mirror_hits(confirmed)
+        skipped_count += dropped
+    
+    if confirmed:
+        # One transaction per table for the whole selection
+        new_products = [p for p in confirmed if not p["existing"]]
+        product_ids = insert_products_bulk(new_products)
+        for p in new_products:
+            print(f"   ✅ Product created: {p['name']} (ID: {product_ids.get(p['name'])})")
+        for p in confirmed:
+            p["product_id"] = p["existing"]["id"] if p["existing"] else product_ids[p["name"]]
+        
+        insert_inventory_bulk(store_name, confirmed)
+        print(f"   ✅ Inventory updated for {store_name} ({len(confirmed)} products)")
         
-        added_count += 1
+        try:
+            upsert_snapshot_rows_bulk(store_name, confirmed)
+            print(f"   ✅ Added to {store_name} snapshot table")
+        except Exception as e:
+            print(f"   ⚠️  Error adding to snapshot: {e}")
+        
+        for p in confirmed:
+            if add_to_featured_list(p["name"], group_variants):
+                if group_variants:
+                    print(f"   ✅ Added to featured products (grouped): {p['name']}")
+                else:
+                    print(f"   ✅ Added to featured products (separate cards): {p['name']}")
     
     print("\n" + "="*50)
-    print(f"✅ Added: {added_count} | ⏭️ Skipped: {skipped_count}")
+    print(f"✅ Added: {len(confirmed)} | ⏭️ Skipped: {skipped_count}")
     print("="*50)
 
 
@@ -1,6 +1,11 @@
 import os
 import re
 import math
+import sys
+import time
+import bisect
+import threading
+from array import array
 import pandas as pd
 import mysql.connector
 from dotenv import load_dotenv
@@ -8,22 +13,71 @@ from urllib.parse import urlparse, unquote
 
 load_dotenv()
 
-STORE_MAPPING = {
-    "CALLE8": "Calle 8",
-    "79TH": "79th Street",
-    "MKT": "Market"
+# Static facts about each store: the one place a store is added. Snapshot
+# tables, cleaned CSVs, POS export settings, sync tasks and store filters are
+# derived from it. "pos" names the POS flavour in pos_endpoints.json, and
+# "pos_url" is its admin host. Database ids are read from the stores table
+# once per process (see get_store_id / refresh_stores).
+STORES = {
+    "calle8": {
+        "code": "CALLE8",
+        "name": "Calle 8",
+        "pos": "cigarspos",
+        "pos_url": "https://miamismoke.cigarspos.com",
+    },
+    "79th": {
+        "code": "79TH",
+        "name": "79th Street",
+        "pos": "cigarspos",
+        "pos_url": "https://mvss.cigarspos.com",
+    },
+    "mkt": {
+        "code": "MKT",
+        "name": "Market",
+        "pos": "bottlepos",
+        "pos_url": "https://ms.bottlepos.com",
+    },
 }
 
-INVENTORY_CSV_PATHS = {
-    "Calle 8": "downloads/calle8/inventory_calle8_clean.csv",
-    "79th Street": "downloads/79th/inventory_79th_clean.csv",
-    "Market": "downloads/mkt/inventory_mkt_clean.csv"
-}
+_STORE_LOOKUP = {}
+for _key, _store in STORES.items():
+    _store["key"] = _key
+    _store.setdefault("snapshot_table", f"inventory_{_key}")
+    _store.setdefault("download_dir", f"downloads/{_key}")
+    _store.setdefault("raw_name", f"inventory_{_key}.csv")
+    _store.setdefault("csv_path", f"downloads/{_key}/inventory_{_key}_clean.csv")
+    for _alias in (_key, _store["code"], _store["name"]):
+        _STORE_LOOKUP[_alias.upper()] = _store
+
+STORE_MAPPING = {s["code"]: s["name"] for s in STORES.values()}
+
+INVENTORY_CSV_PATHS = {s["name"]: s["csv_path"] for s in STORES.values()}
+
+_store_ids = None   # {STORE NAME: id}, loaded on first use
+_store_ids_lock = threading.Lock()
+
+
+# Optional read replica (same URL format as MYSQL_PUBLIC_URL). Read-only
+# helpers connect to it unless this process wrote within the last
+# DB_READ_AFTER_WRITE_SECONDS or the replica lags more than DB_REPLICA_MAX_LAG.
+REPLICA_URL_ENV = "MYSQL_REPLICA_URL"
+READ_AFTER_WRITE_SECONDS = float(os.getenv("DB_READ_AFTER_WRITE_SECONDS", 10))
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", 30))
+REPLICA_CHECK_INTERVAL = 30   # seconds between lag checks / retries after a failure
+
+_last_write = None
+_replica_checked_at = None
+_replica_ok = True
 
 
-def get_db_connection():
-    """Create and return a MySQL database connection."""
-    mysql_url = os.getenv("MYSQL_PUBLIC_URL")
+def get_db_config(replica=False):
+    """
+    Connection settings (mysql.connector keyword arguments) from the environment.
+
+    Args:
+        replica: Use MYSQL_REPLICA_URL (when set) instead of the primary
+    """
+    mysql_url = (os.getenv(REPLICA_URL_ENV) if replica else None) or os.getenv("MYSQL_PUBLIC_URL")
     if mysql_url:
         url_cfg = parse_mysql_url(mysql_url)
         if url_cfg:
@@ -37,7 +91,7 @@ def get_db_connection():
                 "connection_timeout": 10,
             }
         else:
-            raise ValueError(f"Failed to parse MYSQL_PUBLIC_URL: {mysql_url}")
+            raise ValueError(f"Failed to parse MySQL URL: {mysql_url}")
     else:
         cfg = {
             "host": os.getenv("DB_HOST") or os.getenv("MYSQLHOST") or "127.0.0.1",
@@ -56,7 +110,110 @@ def get_db_connection():
             cfg["ssl_verify_identity"] = False
         else:
             cfg["ssl_disabled"] = False
-    return mysql.connector.connect(**cfg)
+    return cfg
+
+
+def mark_write():
+    """Record a committed write; read-only helpers use the primary for a while after it."""
+    global _last_write
+    _last_write = time.monotonic()
+
+
+def lag_from_status(row):
+    """Seconds behind from a SHOW REPLICA STATUS row (inf when replication is stopped, None if not a replica)."""
+    if not row:
+        return None
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return float("inf") if lag is None else float(lag)
+
+
+def replica_lag(conn):
+    """Seconds the replica is behind its source (inf when replication is stopped, None if not a replica)."""
+    cur = conn.cursor(dictionary=True)
+    try:
+        try:
+            cur.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            cur.execute("SHOW SLAVE STATUS")   # MySQL < 8.0.22
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    return lag_from_status(row)
+
+
+def use_replica():
+    """True when reads may go to the replica: one is configured, no recent write, and it was healthy (or is due a retry)."""
+    if not os.getenv(REPLICA_URL_ENV):
+        return False
+    now = time.monotonic()
+    if _last_write is not None and now - _last_write < READ_AFTER_WRITE_SECONDS:
+        return False
+    return _replica_ok or now - _replica_checked_at >= REPLICA_CHECK_INTERVAL
+
+
+def replica_check_due():
+    """True when the replica's lag should be checked before reading from it."""
+    return not (_replica_ok and _replica_checked_at is not None
+                and time.monotonic() - _replica_checked_at < REPLICA_CHECK_INTERVAL)
+
+
+def record_replica_check(lag=None, error=None):
+    """
+    Remember a replica health check (shared by the sync and async helpers).
+
+    Args:
+        lag: Result of replica_lag() (None: unknown, trust the replica)
+        error: The connection error, when the replica could not be reached
+
+    Returns:
+        True when reads may use the replica
+    """
+    global _replica_checked_at, _replica_ok
+    was_ok = _replica_ok
+    _replica_checked_at = time.monotonic()
+    if error is not None:
+        if was_ok:
+            print(f"⚠️  Read replica unavailable ({error}); reading from the primary")
+        _replica_ok = False
+        return False
+    _replica_ok = lag is None or lag <= REPLICA_MAX_LAG
+    if not _replica_ok:
+        print(f"⚠️  Read replica is {lag:.0f}s behind; reading from the primary")
+    return _replica_ok
+
+
+def _connect_replica():
+    """A replica connection, or None when the replica is down or too far behind."""
+    try:
+        conn = mysql.connector.connect(**get_db_config(replica=True))
+    except mysql.connector.Error as e:
+        record_replica_check(error=e)
+        return None
+    if not replica_check_due():
+        return conn
+    try:
+        lag = replica_lag(conn)
+    except mysql.connector.Error:
+        lag = None   # no REPLICATION CLIENT privilege: trust the replica
+    if not record_replica_check(lag):
+        conn.close()
+        return None
+    return conn
+
+
+def get_db_connection(read_only=False):
+    """
+    Create and return a MySQL database connection.
+
+    Args:
+        read_only: The caller only reads; use the read replica when one is
+            configured and fresh enough
+    """
+    if read_only and use_replica():
+        conn = _connect_replica()
+        if conn is not None:
+            return conn
+    return mysql.connector.connect(**get_db_config())
 
 
 def parse_mysql_url(url):
@@ -108,19 +265,99 @@ def normalize_product_name(name):
     return text
 
 
-def get_store_id(store_name):
-    """Get store ID from database by store name."""
-    conn = get_db_connection()
-    cur = conn.cursor()
+def name_key(name):
+    """
+    Canonical lookup key for product, category and snapshot names: upper case,
+    whitespace collapsed, "_" folded into "/" (image filenames can't hold "/").
+    Stored in the indexed name_key columns (see migrate_name_keys.py).
+    """
+    return " ".join(as_str(name).upper().replace("_", "/").split())
+
+
+def get_store(store):
+    """
+    Look up a store in the registry.
+
+    Args:
+        store: Store name ("Calle 8"), key ("calle8") or code ("CALLE8"), any case
+
+    Returns:
+        Dictionary with keys: key, code, name, snapshot_table, csv_path
+    """
+    found = _STORE_LOOKUP.get(as_str(store).upper())
+    if not found:
+        raise ValueError(f"Unknown store: {store}")
+    return found
+
+
+def store_names():
+    """Store names ("Calle 8", "79th Street", "Market") in menu order."""
+    return [s["name"] for s in STORES.values()]
+
+
+def get_snapshot_table(store):
+    """Snapshot table for a store (name, key or code)."""
+    return get_store(store)["snapshot_table"]
+
+
+def get_inventory_csv_path(store):
+    """Absolute path of a store's cleaned inventory CSV."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), get_store(store)["csv_path"])
+
+
+def refresh_stores(cur=None):
+    """
+    Reload store ids from the stores table.
+
+    Args:
+        cur: Optional open cursor to reuse instead of opening a connection
+    """
+    conn = None
+    if cur is None:
+        conn = get_db_connection(read_only=True)
+        cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM stores WHERE name = %s LIMIT 1", (store_name,))
-        row = cur.fetchone()
-        if not row:
-            raise ValueError(f"Store '{store_name}' not found in database.")
-        return row[0]
+        cur.execute("SELECT id, name FROM stores")
+        rows = cur.fetchall()
     finally:
-        cur.close()
-        conn.close()
+        if conn is not None:
+            cur.close()
+            conn.close()
+    return remember_store_ids(rows)
+
+
+def cached_store_ids():
+    """The cached {STORE NAME: id} map, or None before the stores table has been read."""
+    return dict(_store_ids) if _store_ids is not None else None
+
+
+def remember_store_ids(rows):
+    """Cache rows of the stores table ((id, name) tuples or dicts) as the store ids."""
+    global _store_ids
+    rows = [(r["id"], r["name"]) if isinstance(r, dict) else r for r in rows]
+    with _store_ids_lock:
+        _store_ids = {as_str(name).upper(): store_id for store_id, name in rows}
+        return dict(_store_ids)
+
+
+def get_store_id(store_name, cur=None):
+    """
+    Get a store's database id. The stores table is read once per process;
+    call refresh_stores() after adding or renaming a store.
+
+    Args:
+        store_name: Store name, key or code
+        cur: Optional open cursor, used only if the ids are not loaded yet
+    """
+    store = _STORE_LOOKUP.get(as_str(store_name).upper())
+    name = (store["name"] if store else as_str(store_name)).upper()
+    ids = _store_ids if _store_ids is not None else refresh_stores(cur)
+    if name not in ids:
+        # a store created since the ids were loaded
+        ids = refresh_stores(cur)
+    if name not in ids:
+        raise ValueError(f"Store '{store_name}' not found in database.")
+    return ids[name]
 
 
 def get_inventory_csv(store_name):
@@ -133,10 +370,7 @@ def get_inventory_csv(store_name):
     Returns:
         pandas DataFrame with columns: Name, StockCode, UPC, QtyOnHand, UnitPrice, Category
     """
-    if store_name not in INVENTORY_CSV_PATHS:
-        raise ValueError(f"Unknown store: {store_name}")
-    
-    csv_path = os.path.join(os.path.dirname(__file__), INVENTORY_CSV_PATHS[store_name])
+    csv_path = get_inventory_csv_path(store_name)
     
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"Inventory CSV not found: {csv_path}")
@@ -145,7 +379,96 @@ def get_inventory_csv(store_name):
     return df
 
 
-def search_products(store_name, search_term, exact_match=False):
+class InventoryIndex:
+    """
+    Search index over one store's cleaned inventory CSV.
+
+    Rows are kept in file order; lookups go through an exact-name dict, a
+    token → rows inverted index, and sorted name / token arrays for prefix
+    matches, so a query only compares the rows that can possibly match.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        stat = os.stat(csv_path)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.rows = pd.read_csv(csv_path, dtype=str).fillna("").to_dict('records')
+        self.names = [row.get("Name", "").upper() for row in self.rows]
+
+        self.by_name = {}
+        self.postings = {}
+        for idx, name in enumerate(self.names):
+            self.by_name.setdefault(name, []).append(idx)
+            for token in set(name.split()):
+                self.postings.setdefault(token, []).append(idx)
+        self.sorted_names = sorted((name, idx) for idx, name in enumerate(self.names))
+        self.sorted_tokens = sorted(self.postings)
+
+    def _prefixed(self, keys, prefix):
+        """Slice of a sorted list whose entries start with prefix."""
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff")
+        return keys[lo:hi]
+
+    def exact(self, term):
+        return list(self.by_name.get(term, []))
+
+    def prefix(self, term):
+        lo = bisect.bisect_left(self.sorted_names, (term,))
+        hi = bisect.bisect_left(self.sorted_names, (term + "\uffff",))
+        return sorted(idx for _, idx in self.sorted_names[lo:hi])
+
+    def substring(self, term):
+        pieces = term.split()
+        if not pieces:
+            return list(range(len(self.rows)))
+        # A space-free piece of the term always lies inside one name token:
+        # a piece between two others is a whole token, the last one starts a
+        # token, and a lone piece can sit anywhere inside one.
+        if len(pieces) > 2:
+            tokens = [pieces[1]] if pieces[1] in self.postings else []
+        elif len(pieces) == 2:
+            tokens = self._prefixed(self.sorted_tokens, pieces[-1])
+        else:
+            tokens = [t for t in self.sorted_tokens if pieces[0] in t]
+        candidates = set()
+        for token in tokens:
+            candidates.update(self.postings[token])
+        return sorted(idx for idx in candidates if term in self.names[idx])
+
+    def search(self, search_term, exact_match=False, prefix=False):
+        term = search_term.upper().strip()
+        if exact_match:
+            hits = self.exact(term)
+        elif prefix:
+            hits = self.prefix(term)
+        else:
+            hits = self.substring(term)
+        return [dict(self.rows[idx]) for idx in hits]
+
+
+_inventory_indexes = {}
+_inventory_indexes_lock = threading.Lock()
+
+
+def get_inventory_index(store_name):
+    """
+    Get the search index for a store, rebuilding it only when the cleaned
+    CSV has changed on disk since it was built.
+    """
+    csv_path = get_inventory_csv_path(store_name)
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Inventory CSV not found: {csv_path}")
+    stat = os.stat(csv_path)
+    with _inventory_indexes_lock:
+        index = _inventory_indexes.get(csv_path)
+        if index is None or index.version != (stat.st_mtime_ns, stat.st_size):
+            index = InventoryIndex(csv_path)
+            _inventory_indexes[csv_path] = index
+        return index
+
+
+def search_products(store_name, search_term, exact_match=False, prefix=False):
     """
     Search for products in a store's inventory.
     
@@ -153,21 +476,25 @@ def search_products(store_name, search_term, exact_match=False):
         store_name: "Calle 8", "79th Street", or "Market"
         search_term: Product name or partial name to search
         exact_match: If True, only exact matches; if False, partial matches
+        prefix: If True (and not exact_match), only names starting with the term
     
     Returns:
         List of matching product dictionaries with keys: Name, StockCode, UPC, QtyOnHand, UnitPrice
     """
-    df = get_inventory_csv(store_name)
-    
-    search_upper = search_term.upper().strip()
-    
-    if exact_match:
-        mask = df["Name"].str.upper() == search_upper
-    else:
-        mask = df["Name"].str.upper().str.contains(search_upper, regex=False, na=False)
+    return get_inventory_index(store_name).search(search_term, exact_match, prefix)
+
+
+def search_all_stores(search_term, exact_match=False, prefix=False):
+    """
+    Search every store's inventory.
     
-    matches = df[mask].to_dict('records')
-    return matches
+    Returns:
+        Dictionary of store name -> list of matching product dictionaries
+    """
+    return {
+        name: search_products(name, search_term, exact_match, prefix)
+        for name in store_names()
+    }
 
 
 def get_db_products_by_store(store_name):
@@ -180,10 +507,10 @@ def get_db_products_by_store(store_name):
     Returns:
         List of product dictionaries with keys: id, name, upc, stockcode, unit_price
     """
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cur = conn.cursor(dictionary=True)
     try:
-        store_id = get_store_id(store_name)
+        store_id = get_store_id(store_name, cur)
         cur.execute("""
             SELECT p.id, p.name, p.upc, p.stockcode, p.unit_price
             FROM products p
@@ -208,83 +535,370 @@ def get_product_by_name(product_name):
     Returns:
         Product dictionary or None if not found
     """
+    return get_products_by_names([product_name]).get(name_key(product_name))
+
+
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _placeholders(row_count, column_count):
+    row = "(" + ", ".join(["%s"] * column_count) + ")"
+    return ", ".join([row] * row_count)
+
+
+def get_products_by_names(names, cur=None):
+    """
+    Get products by name_key in one query.
+    
+    Args:
+        names: Product names
+        cur: Optional open dictionary cursor to reuse
+    
+    Returns:
+        Dictionary of name_key -> product dictionary (id, name, upc, stockcode, unit_price)
+    """
+    keys = list(dict.fromkeys(name_key(n) for n in names if name_key(n)))
+    if not keys:
+        return {}
+    conn = None
+    if cur is None:
+        conn = get_db_connection(read_only=True)
+        cur = conn.cursor(dictionary=True)
+    try:
+        found = {}
+        for chunk in _chunks(keys):
+            cur.execute(f"""
+                SELECT id, name, name_key, upc, stockcode, unit_price FROM products
+                WHERE name_key IN ({", ".join(["%s"] * len(chunk))})
+            """, chunk)
+            for product in cur.fetchall():
+                found[product.pop("name_key")] = product
+        return found
+    finally:
+        if conn is not None:
+            cur.close()
+            conn.close()
+
+
+def insert_products_bulk(products):
+    """
+    Insert products in one transaction; names that already exist keep their row.
+    
+    Args:
+        products: List of dicts with keys name, upc, stockcode, unit_price,
+            category_id and optionally supplier (default "Manual Entry")
+    
+    Returns:
+        Dictionary of product name -> product ID (new or existing)
+    """
+    if not products:
+        return {}
+    rows = [
+        (p["name"], name_key(p["name"]), p.get("upc", ""), p.get("stockcode", ""), p.get("unit_price", 0),
+         p["category_id"], p.get("supplier", "Manual Entry"))
+        for p in products
+    ]
     conn = get_db_connection()
     cur = conn.cursor(dictionary=True)
     try:
-        cur.execute("SELECT id, name, upc, stockcode, unit_price FROM products WHERE UPPER(name) = UPPER(%s) LIMIT 1", (product_name,))
-        product = cur.fetchone()
-        return product
+        for chunk in _chunks(rows):
+            cur.execute(f"""
+                INSERT INTO products (name, name_key, upc, stockcode, unit_price, category_id, supplier)
+                VALUES {_placeholders(len(chunk), 7)}
+                ON DUPLICATE KEY UPDATE id = id
+            """, [value for row in chunk for value in row])
+        found = get_products_by_names([p["name"] for p in products], cur)
+        conn.commit()
+        mark_write()
+        return {p["name"]: found[name_key(p["name"])]["id"]
+                for p in products if name_key(p["name"]) in found}
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cur.close()
         conn.close()
 
 
-def insert_product(name, upc, stockcode, unit_price, category_id):
+def insert_inventory_bulk(store_name, rows):
     """
-    Insert a new product into database.
+    Insert or update a store's inventory for many products in one transaction.
     
     Args:
-        name: Product name
-        upc: Product UPC
-        stockcode: Stock code
-        unit_price: Unit price
-        category_id: Category ID
+        store_name: Store name
+        rows: List of dicts with keys product_id, quantity, unit_price and optionally name
     
     Returns:
-        Product ID of inserted product
+        Dictionary of product name (or ID when no name is given) -> product ID
     """
+    if not rows:
+        return {}
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("""
-            INSERT INTO products (name, upc, stockcode, unit_price, category_id, supplier)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
-        """, (name, upc, stockcode, unit_price, category_id, "Manual Entry"))
-        product_id = cur.lastrowid
+        store_id = get_store_id(store_name, cur)
+        values = [(r["product_id"], store_id, r.get("quantity", 0), r.get("unit_price", 0)) for r in rows]
+        for chunk in _chunks(values):
+            cur.execute(f"""
+                INSERT INTO product_inventory (product_id, store_id, quantity_on_hand, unit_price)
+                VALUES {_placeholders(len(chunk), 4)}
+                ON DUPLICATE KEY UPDATE
+                    quantity_on_hand = VALUES(quantity_on_hand),
+                    unit_price = VALUES(unit_price),
+                    last_synced_at = CURRENT_TIMESTAMP
+            """, [value for row in chunk for value in row])
         conn.commit()
-        return product_id
+        mark_write()
+        return {r.get("name", r["product_id"]): r["product_id"] for r in rows}
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cur.close()
         conn.close()
 
 
-def insert_inventory(product_id, store_name, quantity, unit_price):
+def upsert_snapshot_rows_bulk(store_name, rows):
     """
-    Insert or update inventory for a product at a store.
+    Replace rows in a store's snapshot table (matched on name + UPC) in one transaction.
     
     Args:
-        product_id: Product ID
         store_name: Store name
-        quantity: Quantity on hand
-        unit_price: Unit price
+        rows: List of dicts with keys name, upc, quantity
+    
+    Returns:
+        Dictionary of name -> snapshot row ID
     """
+    if not rows:
+        return {}
+    table_name = get_snapshot_table(store_name)
+    keys = [(name_key(r["name"]), r.get("upc", "")) for r in rows]
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        store_id = get_store_id(store_name)
-        cur.execute("""
-            INSERT INTO product_inventory (product_id, store_id, quantity_on_hand, unit_price)
-            VALUES (%s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                quantity_on_hand = VALUES(quantity_on_hand),
-                unit_price = VALUES(unit_price),
-                last_synced_at = CURRENT_TIMESTAMP
-        """, (product_id, store_id, quantity, unit_price))
+        for chunk in _chunks(keys):
+            cur.execute(f"""
+                DELETE FROM `{table_name}`
+                WHERE (name_key, upc) IN ({_placeholders(len(chunk), 2)})
+            """, [value for key in chunk for value in key])
+        values = [(r["name"], name_key(r["name"]), r.get("upc", ""), r.get("quantity", 0)) for r in rows]
+        for chunk in _chunks(values):
+            cur.execute(f"""
+                INSERT INTO `{table_name}` (name, name_key, upc, quantity, is_active)
+                VALUES {", ".join(["(%s, %s, %s, %s, 1)"] * len(chunk))}
+            """, [value for row in chunk for value in row])
+        ids = {}
+        for chunk in _chunks(keys):
+            cur.execute(f"""
+                SELECT id, name FROM `{table_name}`
+                WHERE (name_key, upc) IN ({_placeholders(len(chunk), 2)})
+            """, [value for key in chunk for value in key])
+            ids.update({name: row_id for row_id, name in cur.fetchall()})
         conn.commit()
+        mark_write()
+        return ids
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cur.close()
         conn.close()
 
 
+def insert_product(name, upc, stockcode, unit_price, category_id):
+    """
+    Insert a new product into database.
+    
+    Args:
+        name: Product name
+        upc: Product UPC
+        stockcode: Stock code
+        unit_price: Unit price
+        category_id: Category ID
+    
+    Returns:
+        Product ID of inserted product
+    """
+    ids = insert_products_bulk([{
+        "name": name, "upc": upc, "stockcode": stockcode,
+        "unit_price": unit_price, "category_id": category_id,
+    }])
+    return ids.get(name)
+
+
+def insert_inventory(product_id, store_name, quantity, unit_price):
+    """
+    Insert or update inventory for a product at a store.
+    
+    Args:
+        product_id: Product ID
+        store_name: Store name
+        quantity: Quantity on hand
+        unit_price: Unit price
+    """
+    insert_inventory_bulk(store_name, [
+        {"product_id": product_id, "quantity": quantity, "unit_price": unit_price}
+    ])
+
+
 def get_category_id_by_name(category_name):
     """Get category ID by exact name match."""
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cur = conn.cursor()
     try:
-        cur.execute("SELECT id FROM categories WHERE UPPER(name) = UPPER(%s) LIMIT 1", (category_name,))
+        cur.execute("SELECT id FROM categories WHERE name_key = %s LIMIT 1", (name_key(category_name),))
         row = cur.fetchone()
         return row[0] if row else None
     finally:
         cur.close()
         conn.close()
+
+
+class CatalogProduct:
+    """
+    One product in a Catalog. Category and brand strings are interned and
+    shared; stock lives in the catalog's per-store arrays at index row.
+    """
+
+    __slots__ = ("row", "id", "name", "name_key", "upc", "stockcode", "unit_price", "category", "brand")
+
+    def __init__(self, row, name, upc, stockcode, unit_price, category, product_id=None):
+        key = name_key(name)
+        self.row = row
+        self.id = product_id
+        self.name = name
+        self.name_key = name if key == name else key
+        self.upc = upc
+        self.stockcode = stockcode
+        self.unit_price = unit_price
+        self.category = sys.intern(category) if category else ""
+        self.brand = sys.intern(key.split(" ", 1)[0]) if key else ""
+
+    def __repr__(self):
+        return f"CatalogProduct({self.name!r})"
+
+
+class Catalog:
+    """
+    Compact multi-store catalog: one CatalogProduct per name_key plus one
+    quantity array per store (keyed by store key, indexed by
+    CatalogProduct.row), loaded in one pass from the cleaned CSVs
+    (from_csvs) or the database (from_db).
+
+        catalog = Catalog.from_csvs()
+        product = catalog.get("GEEKBAR PULSE X BLUE RAZZ ICE")
+        catalog.quantity(product, "Market")
+    """
+
+    def __init__(self, stores=None):
+        self.stores = [get_store(store)["name"] for store in (stores or store_names())]
+        self.quantities = {get_store(store)["key"]: array("i") for store in self.stores}
+        self.products = []
+        self.by_key = {}
+        self._sorted_keys = None
+
+    def store_key(self, store):
+        """Key into Catalog.quantities for a store name, key or code."""
+        return get_store(store)["key"]
+
+    def _product(self, name, upc, stockcode, unit_price, category, product_id=None):
+        product = self.by_key.get(name_key(name))
+        if product is None:
+            product = CatalogProduct(len(self.products), name, upc, stockcode, unit_price, category, product_id)
+            self.by_key[product.name_key] = product
+            self.products.append(product)
+            self._sorted_keys = None
+            for quantities in self.quantities.values():
+                quantities.append(0)
+        return product
+
+    @classmethod
+    def from_csvs(cls, stores=None):
+        """Load the cleaned inventory CSVs of every store (missing files are skipped)."""
+        catalog = cls(stores)
+        for store in catalog.stores:
+            csv_path = get_inventory_csv_path(store)
+            if not os.path.exists(csv_path):
+                continue
+            quantities = catalog.quantities[catalog.store_key(store)]
+            df = pd.read_csv(csv_path, dtype=str, usecols=["Name", "StockCode", "UPC", "QtyOnHand", "UnitPrice", "Category"]).fillna("")
+            qtys = pd.to_numeric(df["QtyOnHand"], errors="coerce").fillna(0).astype(int)
+            prices = pd.to_numeric(df["UnitPrice"], errors="coerce").fillna(0.0)
+            for name, stockcode, upc, qty, price, category in zip(
+                df["Name"], df["StockCode"], df["UPC"], qtys, prices, df["Category"]
+            ):
+                if not name:
+                    continue
+                product = catalog._product(name, upc, stockcode, float(price), category)
+                quantities[product.row] += int(qty)
+        return catalog
+
+    @classmethod
+    def from_db(cls, stores=None):
+        """Load products, categories and per-store inventory in one streamed query."""
+        catalog = cls(stores)
+        ids = refresh_stores()
+        arrays_by_store_id = {
+            ids[store.upper()]: catalog.quantities[catalog.store_key(store)]
+            for store in catalog.stores if store.upper() in ids
+        }
+        conn = get_db_connection(read_only=True)
+        cur = conn.cursor(buffered=False)
+        try:
+            cur.execute("""
+                SELECT p.id, p.name, p.upc, p.stockcode, p.unit_price, c.name, pi.store_id, pi.quantity_on_hand
+                FROM products p
+                LEFT JOIN categories c ON c.id = p.category_id
+                LEFT JOIN product_inventory pi ON pi.product_id = p.id
+                ORDER BY p.id
+            """)
+            for product_id, name, upc, stockcode, price, category, store_id, qty in cur:
+                product = catalog._product(
+                    as_str(name), as_str(upc), as_str(stockcode), float(price or 0), as_str(category), product_id
+                )
+                quantities = arrays_by_store_id.get(store_id)
+                if quantities is not None:
+                    quantities[product.row] += int(qty or 0)
+        finally:
+            cur.close()
+            conn.close()
+        return catalog
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def get(self, name):
+        """Product by name (compared by name_key), or None."""
+        return self.by_key.get(name_key(name))
+
+    def with_prefix(self, prefix):
+        """Products whose name_key starts with the prefix's name_key, in name_key order."""
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.by_key)
+        key = name_key(prefix)
+        start = bisect.bisect_left(self._sorted_keys, key)
+        end = bisect.bisect_left(self._sorted_keys, key + "\uffff")
+        return [self.by_key[k] for k in self._sorted_keys[start:end]]
+
+    def quantity(self, product, store):
+        return self.quantities[self.store_key(store)][product.row]
+
+    def total_quantity(self, product):
+        return sum(quantities[product.row] for quantities in self.quantities.values())
+
+    def in_store(self, store):
+        """Products with stock at a store."""
+        quantities = self.quantities[self.store_key(store)]
+        return [p for p in self.products if quantities[p.row] > 0]
+
+    def by_brand(self, brand):
+        brand = name_key(brand)
+        return [p for p in self.products if p.brand == brand]
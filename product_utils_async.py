@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Asyncio versions of the product_utils read helpers, on aiomysql with one
+shared connection pool per event loop.
+
+Per-store queries can run side by side, so a report over all three stores
+takes as long as its slowest store. Reads go to the read replica under the
+same rules as product_utils.get_db_connection(read_only=True): not right
+after a write (mark_write) and not while it lags; otherwise the primary.
+
+    import asyncio
+    import product_utils_async as apu
+
+    async def main():
+        by_store = await apu.get_db_products_all_stores()
+        async for product in apu.iter_db_products_by_store("Market"):
+            ...
+        await apu.close_pool()
+
+    asyncio.run(main())
+
+Usage:
+    python3 product_utils_async.py [search term]
+"""
+import os
+import ssl
+import sys
+import time
+import asyncio
+import weakref
+import aiomysql
+
+from product_utils import (
+    get_db_config,
+    use_replica,
+    replica_check_due,
+    record_replica_check,
+    lag_from_status,
+    get_store,
+    store_names,
+    name_key,
+    cached_store_ids,
+    remember_store_ids,
+    search_products as _search_products,
+    BULK_CHUNK_SIZE,
+)
+
+POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 6))
+STREAM_BATCH_SIZE = 500
+
+_pools = weakref.WeakKeyDictionary()   # event loop -> {replica?: task creating that pool}
+
+
+def pool_config(replica=False):
+    """aiomysql.create_pool keyword arguments for the primary, or the read replica when MYSQL_REPLICA_URL is set."""
+    cfg = get_db_config(replica=replica)
+    pool_cfg = {
+        "host": cfg["host"],
+        "port": cfg["port"],
+        "user": cfg["user"],
+        "password": cfg["password"] or "",
+        "db": cfg["database"],
+        "autocommit": True,   # read-only helpers: no transaction left open on pooled connections
+        "connect_timeout": cfg["connection_timeout"],
+        "minsize": 1,
+        "maxsize": POOL_SIZE,
+    }
+    if cfg.get("ssl_disabled") is False:
+        context = ssl.create_default_context()
+        if cfg.get("ssl_verify_cert") is False:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        pool_cfg["ssl"] = context
+    return pool_cfg
+
+
+async def get_pool(replica=False):
+    """The running event loop's shared pool for the primary or the replica (created on first use)."""
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    task = pools.get(replica)
+    if task is None:
+        task = loop.create_task(aiomysql.create_pool(**pool_config(replica)))
+        pools[replica] = task
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        pools.pop(replica, None)   # let the next call retry
+        raise
+
+
+async def _replica_lag(pool):
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            try:
+                try:
+                    await cur.execute("SHOW REPLICA STATUS")
+                except aiomysql.Error:
+                    await cur.execute("SHOW SLAVE STATUS")   # MySQL < 8.0.22
+            except aiomysql.Error:
+                return None   # no REPLICATION CLIENT privilege: trust the replica
+            return lag_from_status(await cur.fetchone())
+
+
+async def read_pool():
+    """
+    The pool read helpers use: the replica when product_utils allows it
+    (no recent write, lag checked every REPLICA_CHECK_INTERVAL), else the primary.
+    """
+    if use_replica():
+        try:
+            pool = await get_pool(replica=True)
+            if not replica_check_due() or record_replica_check(await _replica_lag(pool)):
+                return pool
+        except (OSError, aiomysql.Error) as e:
+            record_replica_check(error=e)
+    return await get_pool()
+
+
+async def close_pool():
+    """Close the running loop's pools (call before the loop ends)."""
+    for task in _pools.pop(asyncio.get_running_loop(), {}).values():
+        if task.done() and not task.exception():
+            pool = task.result()
+            pool.close()
+            await pool.wait_closed()
+
+
+async def fetch_all(sql, params=()):
+    """Run a query on a pooled connection; returns a list of dictionaries."""
+    pool = await read_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchall()
+
+
+async def iter_rows(sql, params=(), batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream a query's rows as dictionaries through a server-side cursor,
+    batch_size rows at a time. The pooled connection is held until the
+    iteration finishes (or the iterator is closed).
+    """
+    pool = await read_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.SSDictCursor) as cur:
+            await cur.execute(sql, params)
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
+
+async def refresh_stores():
+    """Reload store ids from the stores table into the product_utils cache."""
+    return remember_store_ids(await fetch_all("SELECT id, name FROM stores"))
+
+
+async def get_store_id(store_name):
+    """Get a store's database id from the shared product_utils cache."""
+    try:
+        name = get_store(store_name)["name"].upper()
+    except ValueError:
+        name = str(store_name).strip().upper()
+    ids = cached_store_ids()
+    if ids is None or name not in ids:
+        ids = await refresh_stores()
+    if name not in ids:
+        raise ValueError(f"Store '{store_name}' not found in database.")
+    return ids[name]
+
+
+STORE_PRODUCTS_SQL = """
+    SELECT p.id, p.name, p.upc, p.stockcode, p.unit_price
+    FROM products p
+    JOIN product_inventory pi ON pi.product_id = p.id
+    WHERE pi.store_id = %s
+    ORDER BY p.name
+"""
+
+
+async def get_db_products_by_store(store_name):
+    """
+    Get all products in a store's inventory from database.
+
+    Args:
+        store_name: "Calle 8", "79th Street", or "Market"
+
+    Returns:
+        List of product dictionaries with keys: id, name, upc, stockcode, unit_price
+    """
+    return await fetch_all(STORE_PRODUCTS_SQL, (await get_store_id(store_name),))
+
+
+async def iter_db_products_by_store(store_name, batch_size=STREAM_BATCH_SIZE):
+    """Stream a store's products (same rows as get_db_products_by_store)."""
+    store_id = await get_store_id(store_name)
+    async for row in iter_rows(STORE_PRODUCTS_SQL, (store_id,), batch_size):
+        yield row
+
+
+async def get_db_products_all_stores():
+    """
+    Get every store's products concurrently.
+
+    Returns:
+        Dictionary of store name -> list of product dictionaries
+    """
+    names = store_names()
+    results = await asyncio.gather(*(get_db_products_by_store(name) for name in names))
+    return dict(zip(names, results))
+
+
+async def get_products_by_names(names):
+    """
+    Get products by name_key, one query per chunk of names, chunks in parallel.
+
+    Returns:
+        Dictionary of name_key -> product dictionary (id, name, upc, stockcode, unit_price)
+    """
+    keys = list(dict.fromkeys(name_key(n) for n in names if name_key(n)))
+    chunks = [keys[i:i + BULK_CHUNK_SIZE] for i in range(0, len(keys), BULK_CHUNK_SIZE)]
+    results = await asyncio.gather(*(
+        fetch_all(f"""
+            SELECT id, name, name_key, upc, stockcode, unit_price FROM products
+            WHERE name_key IN ({", ".join(["%s"] * len(chunk))})
+        """, chunk)
+        for chunk in chunks
+    ))
+    return {product.pop("name_key"): product for rows in results for product in rows}
+
+
+async def get_product_by_name(product_name):
+    """Get a product by name_key, or None if not found."""
+    return (await get_products_by_names([product_name])).get(name_key(product_name))
+
+
+async def get_category_id_by_name(category_name):
+    """Get category ID by name_key."""
+    rows = await fetch_all("SELECT id FROM categories WHERE name_key = %s LIMIT 1", (name_key(category_name),))
+    return rows[0]["id"] if rows else None
+
+
+async def search_products(store_name, search_term, exact_match=False, prefix=False):
+    """product_utils.search_products off the event loop (the first call per store builds its index)."""
+    return await asyncio.to_thread(_search_products, store_name, search_term, exact_match, prefix)
+
+
+async def search_all_stores(search_term, exact_match=False, prefix=False):
+    """
+    Search every store's inventory concurrently.
+
+    Returns:
+        Dictionary of store name -> list of matching product dictionaries
+    """
+    names = store_names()
+    results = await asyncio.gather(*(search_products(n, search_term, exact_match, prefix) for n in names))
+    return dict(zip(names, results))
+
+
+async def _report(search_term):
+    started = time.perf_counter()
+    try:
+        db_products, matches = await asyncio.gather(
+            get_db_products_all_stores(),
+            search_all_stores(search_term) if search_term else asyncio.sleep(0, {}),
+        )
+    finally:
+        await close_pool()
+    print(f"📊 All stores in {time.perf_counter() - started:.2f}s")
+    for name in store_names():
+        line = f"  {name:12} {len(db_products[name]):6} products in DB"
+        if search_term:
+            line += f", {len(matches[name])} inventory matches for '{search_term}'"
+        print(line)
+
+
+def main(argv):
+    try:
+        asyncio.run(_report(" ".join(argv)))
+    except Exception as e:
+        print(f"❌ {type(e).__name__}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Long-running sync: re-export, clean and load every store on an interval.
+
+One worker thread per store keeps a warm headless Chrome (only started if
+the HTTP export falls back to the browser) and syncs every SYNC_INTERVAL
+seconds plus random jitter. After a failure the next attempt backs off
+exponentially up to SYNC_MAX_BACKOFF. Triggers that arrive while a store is
+syncing coalesce into a single follow-up run.
+
+Status (last success per store, last error, next run) is written to
+downloads/sync_status.json and served over HTTP:
+
+    GET  http://127.0.0.1:8766/status         → JSON for all stores
+    POST http://127.0.0.1:8766/sync/<store>   → sync that store now
+
+Usage:
+    python3 sync_daemon.py [store ...]
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+import traceback
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from pos_cleaner import run_loader, STORE_CLEAN_CONFIG
+from export_diff import clean_for_load, record_load
+from pos_export import STORE_EXPORTS, EXPORT_MODE, export_store, make_driver, profile_dir_for
+from pipeline_trace import span, start_run
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATUS_PATH = os.path.join(BASE_DIR, "downloads", "sync_status.json")
+
+SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL", 900))       # seconds between syncs per store
+SYNC_JITTER = float(os.getenv("SYNC_JITTER", 0.1))         # ± fraction of the interval
+SYNC_BASE_BACKOFF = int(os.getenv("SYNC_BASE_BACKOFF", 60))
+SYNC_MAX_BACKOFF = int(os.getenv("SYNC_MAX_BACKOFF", 3600))
+STATUS_PORT = int(os.getenv("SYNC_DAEMON_PORT", 8766))
+
+_status_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class StoreWorker(threading.Thread):
+    def __init__(self, store_key, daemon_status):
+        super().__init__(name=f"sync-{store_key}", daemon=True)
+        self.store_key = store_key
+        self.status = daemon_status
+        self.driver = None
+        self.use_browser = False   # set once the HTTP export has failed for this store
+        self.failures = 0
+        self.trigger = threading.Event()   # set by manual triggers; many sets = one run
+        self.stopping = threading.Event()
+
+    def next_delay(self):
+        if self.failures:
+            return min(SYNC_MAX_BACKOFF, SYNC_BASE_BACKOFF * 2 ** (self.failures - 1))
+        return SYNC_INTERVAL * (1 + random.uniform(-SYNC_JITTER, SYNC_JITTER))
+
+    def warm_driver(self):
+        if self.driver is None:
+            cfg = STORE_EXPORTS[self.store_key]
+            self.driver = make_driver(cfg["download_dir"], profile_dir_for(self.store_key), headless=True)
+        return self.driver
+
+    def drop_driver(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def export(self):
+        mode = EXPORT_MODE
+        if mode != "browser" and not self.use_browser:
+            try:
+                return export_store(self.store_key, "http")
+            except Exception as e:
+                if mode == "http":
+                    raise
+                print(f"⚠️  HTTP export failed for {self.store_key} ({e}); keeping a warm Chrome instead")
+                self.use_browser = True
+        try:
+            return export_store(self.store_key, "browser", self.warm_driver())
+        except Exception:
+            self.drop_driver()   # a broken session is not worth keeping warm
+            raise
+
+    def sync_once(self):
+        start_run()   # one trace per cycle
+        with span("sync", store=self.store_key):
+            dest, entry = self.export()
+            cleaned_path = clean_for_load(dest, self.store_key)
+            with span("load", store=self.store_key):
+                if not run_loader(cleaned_path, STORE_CLEAN_CONFIG[self.store_key]["location"]):
+                    raise RuntimeError("loader failed")
+            record_load(self.store_key, entry, cleaned_path)
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.trigger.clear()   # triggers from here on ask for another run
+            self.status.update(self.store_key, state="syncing", started_at=_now())
+            started = time.time()
+            try:
+                self.sync_once()
+                self.failures = 0
+                self.status.update(self.store_key, state="idle", last_success=_now(),
+                                   last_duration=round(time.time() - started, 1), last_error=None)
+            except Exception as e:
+                traceback.print_exc()
+                self.failures += 1
+                self.status.update(self.store_key, state="backoff", last_failure=_now(),
+                                   last_error=f"{type(e).__name__}: {e}", failures=self.failures)
+            delay = self.next_delay()
+            self.status.update(self.store_key, next_run=datetime.fromtimestamp(time.time() + delay)
+                               .isoformat(timespec="seconds"))
+            self.trigger.wait(delay)
+        self.drop_driver()
+
+
+class DaemonStatus:
+    """Per-store status shared by the workers and the HTTP endpoint."""
+
+    def __init__(self, stores, path=STATUS_PATH):
+        self.path = path
+        self.stores = {s: {"state": "starting", "last_success": None} for s in stores}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f).get("stores", {})
+            for s in stores:
+                self.stores[s]["last_success"] = saved.get(s, {}).get("last_success")
+
+    def update(self, store_key, **fields):
+        with _status_lock:
+            self.stores[store_key].update(fields)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot_locked(), f, indent=2)
+            os.replace(tmp, self.path)
+
+    def snapshot_locked(self):
+        return {"updated_at": _now(), "stores": self.stores}
+
+    def snapshot(self):
+        with _status_lock:
+            return json.loads(json.dumps(self.snapshot_locked()))
+
+
+def make_status_handler(status, workers):
+    class StatusHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _json(self, code, payload):
+            body = json.dumps(payload, indent=2).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") in ("", "/status"):
+                return self._json(200, status.snapshot())
+            self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 2 and parts[0] == "sync" and parts[1] in workers:
+                workers[parts[1]].trigger.set()   # coalesces with any pending trigger
+                return self._json(202, {"queued": parts[1]})
+            self._json(404, {"error": "unknown store"})
+
+    return StatusHandler
+
+
+def main(argv):
+    stores = argv or list(STORE_EXPORTS)
+    unknown = [s for s in stores if s not in STORE_EXPORTS]
+    if unknown:
+        print(f"❌ Unknown store(s): {', '.join(unknown)}")
+        return 1
+    status = DaemonStatus(stores)
+    workers = {s: StoreWorker(s, status) for s in stores}
+    for w in workers.values():
+        w.start()
+        time.sleep(random.uniform(0, 2))   # don't hit every POS in the same second
+
+    server = ThreadingHTTPServer(("127.0.0.1", STATUS_PORT), make_status_handler(status, workers))
+    print(f"🔄 Sync daemon running for {', '.join(stores)}; status on http://127.0.0.1:{STATUS_PORT}/status")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping sync daemon...")
+    finally:
+        server.server_close()
+        for w in workers.values():
+            w.stopping.set()
+            w.trigger.set()
+        for w in workers.values():
+            w.join(timeout=30)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Sync every store in parallel: export → clean → load → snapshot tables per
+store, then the RAZ 9K image sync once all loads are done.
+
+Each task runs in its own process (so every store has its own Chrome and
+download directory), with a per-task timeout and retries. Total time is
+roughly the slowest store instead of the sum of all three.
+
+Usage:
+    python3 sync_pipeline.py [store ...] [--workers N] [--no-images]
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import wait
+
+from pos_cleaner import STORE_CLEAN_CONFIG
+import pipeline_trace
+from pipeline_trace import span, record, run_id, new_span_id
+import product_utils
+
+STORES = tuple(product_utils.STORES)
+
+EXPORT_TIMEOUT = int(os.getenv("SYNC_EXPORT_TIMEOUT", 300))
+CLEAN_TIMEOUT = int(os.getenv("SYNC_CLEAN_TIMEOUT", 120))
+LOAD_TIMEOUT = int(os.getenv("SYNC_LOAD_TIMEOUT", 480))
+SHARED_TIMEOUT = int(os.getenv("SYNC_SHARED_TIMEOUT", 300))
+EXPORT_RETRIES = int(os.getenv("SYNC_EXPORT_RETRIES", 2))
+
+# Task states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class Task:
+    """
+    One node of the sync graph.
+
+    fn is called as fn(*args, upstream) in a child process, where upstream is
+    {dependency name: its return value}. The return value must be picklable.
+    """
+
+    def __init__(self, name, fn, args=(), deps=(), timeout=300, retries=0):
+        self.name = name
+        self.fn = fn
+        self.args = tuple(args)
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.retries = retries
+        self.state = PENDING
+        self.attempts = 0
+        self.result = None
+        self.error = None
+        self.started = None
+        self.elapsed = 0.0
+        self.span_id = None
+
+
+def _task_main(fn, args, upstream, conn, trace_parent):
+    if hasattr(os, "setsid"):
+        os.setsid()   # own process group, so a timeout also stops chromedriver and Chrome
+    os.environ[pipeline_trace.PARENT_ENV] = trace_parent   # spans in the task nest under it
+    try:
+        conn.send((True, fn(*args, upstream)))
+    except BaseException as e:
+        traceback.print_exc()
+        conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _signal_task(proc, sig):
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, sig)   # the task is its group's leader (see _task_main)
+        elif sig == signal.SIGTERM:
+            proc.terminate()
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+def stop_task(proc, grace=5):
+    """Stop a task process and everything it started (Chrome keeps the profile locked otherwise)."""
+    _signal_task(proc, signal.SIGTERM)
+    proc.join(grace)
+    # SIGKILL the group even if the task itself exited: Chrome children may outlive it
+    _signal_task(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+    proc.join()
+
+
+def run_graph(tasks, max_workers=None):
+    """
+    Run tasks as their dependencies finish, up to max_workers at a time.
+
+    A task that fails or times out is retried up to task.retries times;
+    if it still fails, everything depending on it is skipped.
+
+    Returns:
+        {task name: Task} with final state, result/error and timing
+    """
+    by_name = {t.name: t for t in tasks}
+    for t in tasks:
+        missing = [d for d in t.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Task '{t.name}' depends on unknown task(s): {', '.join(missing)}")
+    max_workers = max_workers or len(tasks)
+    ctx = mp.get_context("spawn")   # no Selenium/MySQL state leaks across forks
+    running = {}                    # name -> (process, parent_conn, deadline)
+
+    def start(task):
+        upstream = {d: by_name[d].result for d in task.deps}
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        task.span_id = new_span_id()
+        proc = ctx.Process(target=_task_main,
+                           args=(task.fn, task.args, upstream, child_conn, task.span_id),
+                           name=task.name)
+        proc.start()
+        child_conn.close()
+        task.state = RUNNING
+        task.attempts += 1
+        task.started = time.time()
+        running[task.name] = (proc, parent_conn, task.started + task.timeout)
+        print(f"▶️  {task.name} (attempt {task.attempts})")
+
+    def finish(task, ok, value):
+        ended = time.time()
+        task.elapsed += ended - task.started
+        record(f"task:{task.name}", task.started, ended, span_id=task.span_id,
+               after=[f"task:{d}" for d in task.deps], attempt=task.attempts, ok=ok,
+               **({} if ok else {"error": value}))
+        if ok:
+            task.state, task.result = DONE, value
+            print(f"✅ {task.name} done in {task.elapsed:.1f}s")
+        elif task.attempts <= task.retries:
+            task.state, task.error = PENDING, value
+            print(f"🔁 {task.name} failed ({value}); retrying")
+        else:
+            task.state, task.error = FAILED, value
+            print(f"❌ {task.name} failed: {value}")
+
+    while True:
+        # Skip anything whose upstream failed
+        changed = True
+        while changed:
+            changed = False
+            for t in tasks:
+                if t.state == PENDING and any(by_name[d].state in (FAILED, SKIPPED) for d in t.deps):
+                    t.state = SKIPPED
+                    changed = True
+
+        for t in tasks:
+            if len(running) >= max_workers:
+                break
+            if t.state == PENDING and all(by_name[d].state == DONE for d in t.deps):
+                start(t)
+
+        if not running:
+            break
+
+        # Wait for the next process to finish (or a deadline to pass)
+        nearest = min(deadline for _, _, deadline in running.values())
+        wait([p.sentinel for p, _, _ in running.values()],
+             timeout=max(0.0, min(nearest - time.time(), 1.0)))
+
+        for name, (proc, conn, deadline) in list(running.items()):
+            task = by_name[name]
+            if not proc.is_alive():
+                proc.join()
+                if conn.poll():
+                    ok, value = conn.recv()
+                else:
+                    ok, value = False, f"process exited with code {proc.exitcode}"
+            elif time.time() > deadline:
+                stop_task(proc)
+                ok, value = False, f"timed out after {task.timeout}s"
+            else:
+                continue
+            conn.close()
+            del running[name]
+            finish(task, ok, value)
+
+    return by_name
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Store steps (run in child processes)
+# ─────────────────────────────────────────────────────────────────────────────
+def export_step(store_key, upstream):
+    from pos_export import export_store
+    dest, entry = export_store(store_key)
+    return {"raw_path": dest, "entry": entry}
+
+
+def clean_step(store_key, upstream):
+    from export_diff import clean_for_load
+    exported = upstream[f"export_{store_key}"]
+    return dict(exported, cleaned_path=clean_for_load(exported["raw_path"], store_key))
+
+
+def load_step(store_key, upstream):
+    from clean_data import load_csv_to_db
+    from export_diff import record_load
+    cleaned = upstream[f"clean_{store_key}"]
+    # The store's snapshot table is rebuilt by its own "snapshots_<store>" task
+    with span("load", store=store_key):
+        load_csv_to_db(cleaned["cleaned_path"], location=STORE_CLEAN_CONFIG[store_key]["location"],
+                       refresh_snapshot=False)
+    record_load(store_key, cleaned["entry"], cleaned["cleaned_path"])
+    return cleaned["cleaned_path"]
+
+
+def snapshots_step(store_key, upstream):
+    from clean_data import rebuild_snapshot_tables
+    rebuild_snapshot_tables([STORE_CLEAN_CONFIG[store_key]["location"]])
+
+
+def images_step(upstream):
+    from sync_raz9k_images import sync_images
+    sync_images()
+
+
+def build_tasks(stores=STORES, images=True):
+    tasks = []
+    for s in stores:
+        tasks += [
+            Task(f"export_{s}", export_step, (s,), timeout=EXPORT_TIMEOUT, retries=EXPORT_RETRIES),
+            Task(f"clean_{s}", clean_step, (s,), deps=(f"export_{s}",), timeout=CLEAN_TIMEOUT),
+            Task(f"load_{s}", load_step, (s,), deps=(f"clean_{s}",), timeout=LOAD_TIMEOUT, retries=1),
+            # only its own load: a failed store doesn't hold back the others' storefront tables
+            Task(f"snapshots_{s}", snapshots_step, (s,), deps=(f"load_{s}",), timeout=SHARED_TIMEOUT),
+        ]
+    loads = tuple(f"load_{s}" for s in stores)
+    if images:
+        tasks.append(Task("images", images_step, deps=loads, timeout=SHARED_TIMEOUT))
+    return tasks
+
+
+def print_summary(results, total):
+    print("\n📊 Sync summary")
+    for t in results.values():
+        note = f"  {t.error}" if t.state == FAILED else ""
+        print(f"  {t.name:16} {t.state:8} {t.elapsed:7.1f}s  x{t.attempts}{note}")
+    print(f"  {'total':16} {'':8} {total:7.1f}s")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Export, clean and load all stores in parallel.")
+    parser.add_argument("stores", nargs="*", metavar="store",
+                        help="stores to sync (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="max tasks running at once")
+    parser.add_argument("--no-images", action="store_true", help="skip the RAZ 9K image sync")
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.stores if s not in STORES]
+    if unknown:
+        parser.error(f"unknown store(s): {', '.join(unknown)} (choose from {', '.join(STORES)})")
+
+    started = time.time()
+    print(f"🧭 Run id {run_id()}")   # children inherit it through SYNC_RUN_ID
+    with span("pipeline", stores=",".join(args.stores or STORES)):
+        results = run_graph(build_tasks(args.stores or STORES, images=not args.no_images), args.workers)
+    print_summary(results, time.time() - started)
+    print(f"   Trace: python3 pipeline_trace.py report {run_id()}")
+    return 0 if all(t.state == DONE for t in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
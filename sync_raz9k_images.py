@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from urllib.parse import urlparse, unquote
 import re
 
+from image_manifest import ImageManifest
+
 load_dotenv()
 
 def parse_mysql_url(url):
@@ -46,18 +48,16 @@ def normalize(s):
     return re.sub(r'[^A-Z0-9]', '', s.upper())
 
 def sync_images():
-    img_dir = "public/images/imagesForProducts/RAZ 9K"
-    if not os.path.exists(img_dir):
-        print(f"❌ Directory not found: {img_dir}")
+    folder = "RAZ 9K"
+    manifest = ImageManifest.load()
+    if manifest.image_count(folder) == 0:
+        print(f"❌ No images found in {os.path.join(manifest.images_dir, folder)}")
         return
 
-    images = os.listdir(img_dir)
     img_map = {}
-    for img in images:
-        if img.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-            name_part = os.path.splitext(img)[0]
-            norm_name = normalize(name_part)
-            img_map[norm_name] = img
+    for image in manifest.images(folder):
+        if image["file"].lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
+            img_map[normalize(image["stem"])] = image["file"]
 
     conn = get_conn()
     cur = conn.cursor(dictionary=True)
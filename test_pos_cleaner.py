@@ -0,0 +1,121 @@
+"""
+pos_cleaner's vectorized UPC / quantity parsing must give exactly what the
+old per-cell helpers (copied below from the exporters) gave, and its Arrow
+hand-off must carry any price through to inventory_validation.
+
+    python -m pytest -q test_pos_cleaner.py
+"""
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pos_cleaner
+from pos_cleaner import clean_upc_series, to_int_series
+from inventory_validation import PRICE_OUTLIER, validate_inventory
+
+
+def clean_upc(val):
+    if not isinstance(val, str):
+        val = "" if pd.isna(val) else str(val)
+    val = val.split(",")[0]
+    digits = re.sub(r"\D", "", val)
+    return digits
+
+
+def to_int_series_per_cell(s):
+    def parse_cell(val):
+        if pd.isna(val):
+            return 0
+        numbers = re.findall(r"-?\d+(?:\.\d+)?", str(val))
+        if not numbers:
+            return 0
+        total = sum(float(num) for num in numbers)
+        return int(round(total))
+    return s.apply(parse_cell)
+
+
+QTY_CELLS = [
+    "8.00, 5.00", "1,2,3", "12", "12.0", "-3", "-2.5", "0.5", "1.5", "2.5",
+    "", " ", "nan", "NaN", None, np.nan, "abc", "qty: 4 units", "4 pcs + 2",
+    "1e3", "--5", "3.", ".5", "1.2.3", " 7 ", "10, -4", "٣", "5\n6",
+]
+
+UPC_CELLS = [
+    "012345678905", "012345678905, 987654321098", ",123", "0-12345-67890-5",
+    "  00123  ", "", "nan", None, np.nan, "abc", "UPC 8500 1234", "1.2e11",
+    "٣٤٥", "123\n,456", "12,34,56",
+]
+
+
+def _series(cells):
+    return pd.Series(cells, dtype=object)
+
+
+@pytest.mark.parametrize("cell", QTY_CELLS)
+def test_to_int_series_matches_per_cell(cell):
+    s = _series([cell])
+    assert to_int_series(s).tolist() == to_int_series_per_cell(s).tolist()
+
+
+@pytest.mark.parametrize("cell", UPC_CELLS)
+def test_clean_upc_series_matches_per_cell(cell):
+    s = _series([cell])
+    assert clean_upc_series(s).tolist() == s.map(clean_upc).tolist()
+
+
+def test_mixed_columns_match_per_cell():
+    """Whole columns, as read from an export (index and row order kept)."""
+    qty = _series(QTY_CELLS * 3)
+    qty.index = range(100, 100 + len(qty))
+    expected = to_int_series_per_cell(qty)
+    result = to_int_series(qty)
+    assert result.index.equals(expected.index)
+    assert result.tolist() == expected.tolist()
+
+    upc = _series(UPC_CELLS * 3)
+    assert clean_upc_series(upc).tolist() == upc.map(clean_upc).tolist()
+
+
+def test_examples():
+    assert to_int_series(_series(["8.00, 5.00", "", "nan", "abc"])).tolist() == [13, 0, 0, 0]
+    assert clean_upc_series(_series(["0123, 4567", ""])).tolist() == ["0123", ""]
+
+
+def test_read_export_keeps_digits_as_text(tmp_path):
+    """Every column is read as the raw text (no "12436996499.0")."""
+    path = tmp_path / "items.csv"
+    path.write_bytes(
+        "\ufeffName,UPC,Qty On Hand,Unit Price\n"
+        "A,012436996499,8.00,25.00\n"
+        "B,12436996499,NA,\n"
+        "C,,\"8.00, 5.00\",17.50\n".encode("utf-8")
+    )
+    df, mapping = pos_cleaner.read_export(str(path))
+    assert df[mapping["upc"]].tolist() == ["012436996499", "12436996499", ""]
+    assert df[mapping["qty"]].tolist() == ["8.00", "", "8.00, 5.00"]
+    assert df[mapping["price"]].tolist() == ["25.00", "", "17.50"]
+
+
+@pytest.mark.parametrize("price", [1e9, 1e20, -1e20])
+def test_absurd_price_reaches_validation(tmp_path, price):
+    """A mistyped price survives the Arrow hand-off and is quarantined as PRICE_OUTLIER."""
+    out = pd.DataFrame({
+        "Name": ["GOOD", "BAD"], "StockCode": ["1", "2"], "UPC": ["", ""],
+        "QtyOnHand": [1, 1], "UnitPrice": [19.99, price], "Category": ["VAPES", "VAPES"],
+    })
+    path = str(tmp_path / "clean.arrow")
+    pos_cleaner.write_clean_table(pos_cleaner.to_arrow_table(out), path)
+    df = pos_cleaner.read_clean_table(path).to_pandas()
+    accepted, rejects = validate_inventory(df, {"VAPES"})
+    assert accepted["Name"].tolist() == ["GOOD"]
+    assert rejects["Name"].tolist() == ["BAD"]
+    assert rejects["reason"].tolist() == [PRICE_OUTLIER]
+
+
+def test_store_filter_categories_are_known():
+    """Every category a store publishes must be one the loader can place (not UNKNOWN_CATEGORY)."""
+    from clean_data import KNOWN_CATEGORIES
+    for store_key, config in pos_cleaner.STORE_CLEAN_CONFIG.items():
+        assert not (config["allowed_categories"] or set()) - KNOWN_CATEGORIES, store_key